@@ -1,13 +1,14 @@
 """Analyze endpoint."""
-from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException
+import asyncio
+from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
 from backend.schemas.analyze import AnalyzeRequest, AnalyzeResponse
 from backend.db.base import get_db
-from backend.services.analyzer import start_analysis
+from backend.services.job_queue import enqueue_analysis
+from backend.services.git_service import resolve_remote_commit
 from backend.services.github_service import get_repository_size
 from backend.services.passphrase_service import can_crawl_repository, record_repository_crawl
 from backend.config import settings
-import uuid
 import logging
 
 logger = logging.getLogger(__name__)
@@ -18,14 +19,16 @@ router = APIRouter()
 @router.post("/analyze", response_model=AnalyzeResponse, status_code=202)
 async def analyze_repo(
     request: AnalyzeRequest,
-    background_tasks: BackgroundTasks,
     db: Session = Depends(get_db),
 ):
     """Start recursive analysis of a Git repository."""
     logger.info(f"=== ANALYZE REQUEST RECEIVED ===")
     print(f"[ANALYZE] Request received for: {request.repo_url}")  # Backup logging
     logger.info(f"Repository URL: {request.repo_url}")
-    logger.info(f"Depth: {request.depth}")
+    logger.info(
+        f"Depth: {request.depth}, max files: {request.max_files}, "
+        f"max tokens: {request.max_tokens}, subtree: {request.subtree or '/'}"
+    )
     logger.info(f"Passphrase provided: {'Yes' if request.passphrase else 'No'}")
     
     repo_url = str(request.repo_url)
@@ -55,22 +58,27 @@ async def analyze_repo(
             logger.warning(f"Repository too large: {size_kb}KB > {settings.max_git_size_kb}KB")
             raise HTTPException(status_code=400, detail=error_msg)
     
-    task_id = str(uuid.uuid4())
-    logger.info(f"Generated task_id: {task_id}")
+    # Resolve the commit to analyze so duplicate requests share one task
+    target_commit = await asyncio.to_thread(resolve_remote_commit, repo_url)
+    logger.info(f"Remote HEAD: {target_commit or 'unresolved'}")
     
-    # Start analysis in background
+    # Queue the analysis; worker processes pick it up with their own sessions
     # Pass passphrase to record usage after successful analysis
-    logger.info(f"Adding background task for analysis...")
-    background_tasks.add_task(
-        start_analysis,
-        task_id=task_id,
+    task = enqueue_analysis(
+        db,
         repo_url=repo_url,
-        depth=request.depth or 10,
-        db=db,
-        passphrase=request.passphrase
+        depth=request.depth,
+        passphrase=request.passphrase,
+        target_commit=target_commit,
+        max_files=request.max_files,
+        max_tokens=request.max_tokens,
+        subtree=request.subtree,
+        lazy=request.lazy,
+        batch=request.batch,
     )
+    task_id = task.id
     
-    logger.info(f"Background task added successfully, returning task_id: {task_id}")
+    logger.info(f"Analysis queued, returning task_id: {task_id}")
     logger.info(f"=== ANALYZE REQUEST COMPLETED ===")
     return AnalyzeResponse(task_id=task_id)
 
@@ -3,8 +3,10 @@ from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
 from backend.db.base import get_db
 from backend.models.repository import Repository
-from backend.services.git_service import get_repo_cache_path
-from backend.services.summary_files import get_summary_file_path, read_summary
+from backend.models.node import Node
+from backend.services.git_service import BlobReader, get_path_type, get_repo_cache_path, list_folder
+from backend.services.summary_files import get_summary_file_path, get_summary_root, read_summary
+from backend.services.lazy_summary import ensure_summary
 from pathlib import Path
 from backend.config import settings
 
@@ -44,6 +46,18 @@ def secure_path_join(base: Path, *parts: str) -> Path:
     return target
 
 
+def _stored_summaries(db: Session, repo_id: str, paths: list[str]) -> dict[str, str]:
+    """Get node summaries from the database, for items without a summary file."""
+    if not paths:
+        return {}
+    rows = db.query(Node.path, Node.summary).filter(
+        Node.repo_id == repo_id,
+        Node.path.in_(paths),
+        Node.summary.isnot(None),
+    )
+    return {node_path: summary for node_path, summary in rows}
+
+
 @router.get("/browse/{repo_id}")
 async def browse_repository(
     repo_id: str,
@@ -89,116 +103,28 @@ async def browse_repository(
         print(traceback.format_exc())
         raise HTTPException(status_code=500, detail=f"Error resolving path: {str(e)}")
     
-    if not target_path.exists():
+    # Listings and contents come from the git tree: blobless checkouts
+    # have no files on disk
+    relative_path = "/".join(p for p in path.split("/") if p)
+    try:
+        path_type = get_path_type(str(cache_path), relative_path)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error resolving path: {str(e)}")
+    if path_type is None:
         raise HTTPException(status_code=404, detail="Path not found")
     
-    # Get repository name for summary file lookup
+    # Get repository name and summary directory for summary file lookup
     repo_name = cache_path.name
+    summary_root = str(get_summary_root(repo_name))
     
     # If it's a directory, list contents
-    if target_path.is_dir():
+    if path_type == "folder":
         items = []
         try:
-            # Get all items first to check for summary files
-            all_items = list(target_path.iterdir())
-            
-            for item in sorted(all_items):
-                # Skip .git directory and hidden files/folders
-                if item.name.startswith('.'):
-                    if item.is_dir() and item.name == '.git':
-                        continue
-                    # Skip hidden items
-                    continue
-                
-                # Skip summary .md files (they're metadata, not files to browse)
-                # Summary files can be:
-                # 1. File summaries: <filename>.md where <filename> exists as another file
-                # 2. Folder summaries: <foldername>.md where <foldername> exists as a folder
-                # 3. Root summary: <repo-name>.md (shown in folder summary section, not as file)
-                # Original .md files (like README.md) should still be shown
-                if item.is_file() and item.name.endswith('.md'):
-                    # Special case: Root summary file (<repo-name>.md) should be hidden
-                    root_summary_name = f"{repo_name}.md"
-                    if item.name == root_summary_name:
-                        continue  # Skip root summary (shown in folder summary section)
-                    
-                    # Remove .md extension to get base name
-                    base_name = item.name[:-3]  # Remove .md extension
-                    
-                    # Check if this is a file summary: does a file with this name exist?
-                    # This includes checking for .md files too (e.g., README.md.md is summary of README.md)
-                    is_file_summary = False
-                    for other_item in all_items:
-                        if (other_item != item and 
-                            other_item.is_file() and
-                            other_item.name == base_name):
-                            # Found matching file - this .md is a summary
-                            # Exception: don't match if the other file is also a summary file (ends with .md.md)
-                            # A summary file would be like README.md.md, so check if it ends with .md.md
-                            other_is_summary_file = other_item.name.endswith('.md.md')
-                            if not other_is_summary_file:
-                                is_file_summary = True
-                                break
-                    
-                    # Check if this is a folder summary: does a folder with this name exist?
-                    is_folder_summary = False
-                    for other_item in all_items:
-                        if (other_item != item and 
-                            other_item.is_dir() and
-                            other_item.name == base_name):
-                            is_folder_summary = True
-                            break
-                    
-                    # Skip if it's either a file summary or folder summary
-                    if is_file_summary or is_folder_summary:
-                        continue  # Skip summary files
-                
-                try:
-                    item_path = item.relative_to(cache_path)
-                    item_type = "folder" if item.is_dir() else "file"
-                    
-                    # Check for summary file
-                    has_summary = False
-                    if item_type == "file":
-                        # Check if there's a summary file: <filename>.md
-                        summary_path = get_summary_file_path(str(cache_path), str(item_path), "file", repo_name)
-                        has_summary = summary_path.exists()
-                    else:  # folder
-                        # Check if there's a folder summary: <foldername>.md in parent directory
-                        summary_path = get_summary_file_path(str(cache_path), str(item_path), "folder", repo_name)
-                        has_summary = summary_path.exists()
-                    
-                    items.append({
-                        "name": item.name,
-                        "type": item_type,
-                        "path": str(item_path),
-                        "has_summary": has_summary,
-                    })
-                except (ValueError, Exception) as e:
-                    # Log the error for debugging
-                    import traceback
-                    print(f"Warning: Could not process item {item.name} in {target_path}: {e}")
-                    print(traceback.format_exc())
-                    # Try to add it anyway with basic info using the path from current directory
-                    try:
-                        # Use path relative to current target_path instead of cache_path
-                        if path:
-                            relative_path = f"{path}/{item.name}" if path else item.name
-                        else:
-                            relative_path = item.name
-                        
-                        items.append({
-                            "name": item.name,
-                            "type": "folder" if item.is_dir() else "file",
-                            "path": relative_path,
-                            "has_summary": False,
-                        })
-                    except Exception as e2:
-                        # If even that fails, skip it
-                        print(f"Could not add item {item.name} even with fallback: {e2}")
-                        continue
-        except PermissionError:
-            raise HTTPException(status_code=403, detail="Permission denied")
+            for entry in list_folder(str(cache_path), relative_path):
+                # Check for summary file (<name>.md in the summary directory)
+                summary_path = get_summary_file_path(summary_root, entry["path"], entry["type"], repo_name)
+                items.append({**entry, "has_summary": summary_path.exists()})
         except Exception as e:
             # Log the error and return empty list
             import traceback
@@ -206,31 +132,22 @@ async def browse_repository(
             print(traceback.format_exc())
             raise HTTPException(status_code=500, detail=f"Error listing directory: {str(e)}")
         
-        # Also check for folder summary if this is a folder
-        folder_summary = None
-        if path:  # Not root
-            try:
-                folder_summary_path = get_summary_file_path(str(cache_path), path, "folder", repo_name)
-                if folder_summary_path.exists():
-                    try:
-                        folder_summary = folder_summary_path.read_text(encoding="utf-8")
-                    except Exception:
-                        pass
-            except Exception:
-                pass
+        # Items analyzed before summary files moved out of the worktree only
+        # have their summary in the database
+        folder_path = path.strip("/")
+        missing = [item["path"] for item in items if not item["has_summary"]]
+        stored = _stored_summaries(db, repo_id, missing + [folder_path])
+        for item in items:
+            if item["path"] in stored:
+                item["has_summary"] = True
         
-        # Check for root summary if at root
-        root_summary = None
-        if not path:
-            try:
-                root_summary_path = get_summary_file_path(str(cache_path), "", "folder", repo_name)
-                if root_summary_path.exists():
-                    try:
-                        root_summary = root_summary_path.read_text(encoding="utf-8")
-                    except Exception:
-                        pass
-            except Exception:
-                pass
+        # Folder summary (or root summary at the root)
+        folder_summary = read_summary(summary_root, folder_path, "folder", repo_name)
+        if folder_summary is None:
+            folder_summary = stored.get(folder_path)
+        if folder_summary is None:
+            # Not reached yet by a lazy analysis
+            folder_summary = await ensure_summary(db, repo_id, folder_path)
         
         # Add parent folder navigation if not at root
         if path:
@@ -254,32 +171,33 @@ async def browse_repository(
             "type": "folder",
             "path": path or "/",
             "items": items,
-            "summary": folder_summary or root_summary,
+            "summary": folder_summary,
         }
     
     # If it's a file, return file content and summary
     else:
         # Read file content (if text file)
         file_content = None
+        blob_reader = BlobReader(str(cache_path))
         try:
-            with open(target_path, "r", encoding="utf-8", errors="ignore") as f:
-                file_content = f.read()
+            data = blob_reader.read(relative_path)
+            if data is not None:
+                file_content = data.decode("utf-8", errors="ignore")
         except Exception:
             file_content = None
+        finally:
+            blob_reader.close()
         
-        # Get summary from corresponding .md file
+        # Get summary from the corresponding .md file in the summary directory
         # Use the path parameter directly since target_path was constructed from it
         file_path_str = path  # path parameter is already relative to repo root
         
-        summary_path = get_summary_file_path(str(cache_path), file_path_str, "file", repo_name)
-        summary_exists = False
-        summary = None
-        if summary_path.exists():
-            try:
-                summary = summary_path.read_text(encoding="utf-8")
-                summary_exists = True
-            except Exception:
-                pass
+        summary = read_summary(summary_root, file_path_str, "file", repo_name)
+        if summary is None:
+            summary = _stored_summaries(db, repo_id, [file_path_str]).get(file_path_str)
+        if summary is None:
+            summary = await ensure_summary(db, repo_id, file_path_str)
+        summary_exists = summary is not None
         
         return {
             "type": "file",
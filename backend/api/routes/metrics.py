@@ -0,0 +1,24 @@
+"""Metrics endpoint."""
+import os
+import socket
+from fastapi import APIRouter, Depends
+from sqlalchemy.orm import Session
+from backend.db.base import get_db
+from backend.models.blob_summary import BlobSummary
+from backend.services.process_metrics import aggregate_counters, publish_counters
+
+router = APIRouter()
+
+
+@router.get("/metrics")
+async def get_metrics(db: Session = Depends(get_db)):
+    """
+    Get cache and processing counters summed over the API and all workers.
+    
+    Workers publish their counters during and after every job; this
+    process publishes its own before they are summed.
+    """
+    publish_counters(db, f"{socket.gethostname()}-{os.getpid()}-api", "api")
+    metrics = aggregate_counters(db)
+    metrics.setdefault("summary_store", {})["entries"] = db.query(BlobSummary).count()
+    return metrics
@@ -1,30 +1,45 @@
-"""Q&A endpoint."""
+"""Q&A endpoints."""
+import json
+import logging
 from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 from backend.schemas.qa import QARequest, QAResponse
 from backend.db.base import get_db
 from backend.models.repository import Repository
-from backend.services.qa_service import answer_question
+from backend.services.qa_service import answer_question, stream_answer
+from backend.services.llm_scheduler import scheduling
 from backend.services.passphrase_service import can_ask_question, record_question_asked
 
+logger = logging.getLogger(__name__)
+
 router = APIRouter()
 
 
-@router.post("/qa", response_model=QAResponse)
-async def ask_question(request: QARequest, db: Session = Depends(get_db)):
-    """Answer questions about a repository."""
-    # Check passphrase and access limits
+def _check_access(request: QARequest, db: Session):
+    """Reject requests without question quota or for unknown repositories."""
     can_ask, error_msg = can_ask_question(db, request.passphrase)
     if not can_ask:
         raise HTTPException(status_code=403, detail=error_msg)
     
-    # Check if repository exists
     repo = db.query(Repository).filter(Repository.id == request.repo_id).first()
     if not repo:
         raise HTTPException(status_code=404, detail="Repository not found")
+
+
+def _sse(event: str, data: dict) -> str:
+    """Format a Server-Sent Event."""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+@router.post("/qa", response_model=QAResponse)
+async def ask_question(request: QARequest, db: Session = Depends(get_db)):
+    """Answer questions about a repository."""
+    _check_access(request, db)
     
     # Answer question
-    result = await answer_question(db, request.repo_id, request.question)
+    with scheduling(flow=request.repo_id, tenant=request.passphrase):
+        result = await answer_question(db, request.repo_id, request.question, request.use_cache)
     
     # Record question usage
     record_question_asked(db, request.passphrase)
@@ -34,3 +49,35 @@ async def ask_question(request: QARequest, db: Session = Depends(get_db)):
         sources=result["sources"],
     )
 
+
+
+@router.post("/qa/stream")
+async def ask_question_stream(request: QARequest, db: Session = Depends(get_db)):
+    """
+    Answer questions about a repository as Server-Sent Events.
+    
+    Emits a `sources` event, then `token` events with pieces of the answer
+    as the LLM generates them, and finally `done` (or `error`).
+    """
+    _check_access(request, db)
+    
+    async def events():
+        # Set inside the generator: it runs after this handler returns
+        with scheduling(flow=request.repo_id, tenant=request.passphrase):
+            try:
+                async for event, data in stream_answer(
+                    db, request.repo_id, request.question, request.use_cache
+                ):
+                    yield _sse(event, data)
+            except Exception as e:
+                logger.error(f"Streaming answer failed: {str(e)}", exc_info=True)
+                yield _sse("error", {"detail": str(e)})
+                return
+        record_question_asked(db, request.passphrase)
+        yield _sse("done", {})
+    
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -20,5 +20,6 @@ async def get_status(task_id: str, db: Session = Depends(get_db)):
         progress=task.progress,
         status_message=task.status_message,
         result_id=task.result_id,
+        metrics=task.metrics,
     )
 
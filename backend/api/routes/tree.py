@@ -5,18 +5,19 @@ from backend.schemas.node import RepoNode
 from backend.db.base import get_db
 from backend.models.repository import Repository
 from backend.models.node import Node
+from backend.services.folder_scheduler import parent_path
+from backend.services.lazy_summary import ensure_summary
 from typing import List, Dict
 
 router = APIRouter()
 
 
-def build_tree(nodes: List[Node], parent_id: str | None = None) -> List[RepoNode]:
-    """Build recursive tree structure."""
-    children = [n for n in nodes if n.parent_id == parent_id]
+def build_tree(children_by_path: Dict[str, List[Node]], path: str = "") -> List[RepoNode]:
+    """Build recursive tree structure below `path` from nodes grouped by parent path."""
     result = []
     
-    for node in children:
-        child_nodes = build_tree(nodes, node.id)
+    for node in children_by_path.get(path, []):
+        child_nodes = build_tree(children_by_path, node.path)
         result.append(RepoNode(
             name=node.name,
             type=node.type,
@@ -42,31 +43,28 @@ async def get_tree(repo_id: str, db: Session = Depends(get_db)):
     if not nodes:
         raise HTTPException(status_code=404, detail="Repository tree not found")
     
-    # Find root node explicitly (path="" and parent_id=None)
-    root_node = None
-    for node in nodes:
-        if node.path == "" and node.parent_id is None:
-            root_node = node
-            break
-    
-    if not root_node:
-        # Fallback: find any node with parent_id=None (should be root)
-        root_nodes = [n for n in nodes if n.parent_id is None]
-        if root_nodes:
-            root_node = root_nodes[0]
-    
+    # Find root node explicitly (path="")
+    root_node = next((node for node in nodes if node.path == ""), None)
     if not root_node:
         raise HTTPException(status_code=404, detail="Root node not found")
     
+    # A lazy analysis may not have reached the root yet
+    root_summary = root_node.summary or await ensure_summary(db, repo_id, "")
+    
+    # Nodes are linked by path (the analyzer upserts on path, not parent_id)
+    children_by_path: Dict[str, List[Node]] = {}
+    for node in sorted(nodes, key=lambda n: n.path):
+        if node.path:
+            children_by_path.setdefault(parent_path(node.path), []).append(node)
+    
     # Build full tree starting from root
-    tree_nodes = build_tree(nodes, root_node.id)
+    tree_nodes = build_tree(children_by_path)
     
     # Return root node with children
     return RepoNode(
         name=root_node.name,
         type=root_node.type,
         path=root_node.path,
-        summary=root_node.summary or "",
+        summary=root_summary or "",
         children=tree_nodes,
     )
-
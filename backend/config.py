@@ -36,6 +36,66 @@ class Settings(BaseSettings):
     max_file_size: int = 1_000_000  # 1MB
     temp_dir: str = "/tmp/r2ce"
     cache_dir: str = "cache"  # Permanent cache directory for repositories
+    clone_mode: Literal["full", "shallow", "blobless", "sparse"] = "blobless"
+    clone_sparse_paths: str = ""  # Comma-separated folders checked out in sparse mode
+    
+    # Analysis
+    analysis_concurrency: int = 8  # Max concurrent LLM calls while summarizing files
+    node_flush_size: int = 200  # Buffered node upserts before a bulk write
+    node_flush_interval: float = 2.0  # Max seconds between bulk node writes
+    progress_interval: float = 1.0  # Min seconds between task progress commits
+    folder_context_tokens: int = 6000  # Token budget for a folder summary prompt's context
+    root_context_tokens: int = 12000  # Token budget for the root summary prompt's context
+    chunk_size: int = 24_000  # Files longer than this (chars) are summarized in chunks
+    max_chunked_file_size: int = 4_000_000  # Largest file (bytes) summarized in chunks
+    lazy_analysis: bool = False  # Publish the node tree first; summarize on demand and in the background
+    pack_max_files: int = 8  # Small files of one folder summarized per LLM request (below 2 disables packing)
+    pack_file_max_tokens: int = 1_000  # Largest file (estimated tokens) that is packed
+    pack_max_tokens: int = 6_000  # Budget for the file contents of one packed request
+    prompt_compression: bool = True  # Strip license headers, blank runs and data blobs from file prompts
+    compress_literal_lines: int = 30  # Runs of literal-only lines this long are elided (0 = keep)
+    
+    # LLM connections, pooled per provider and process
+    llm_max_connections: int = 20
+    llm_timeout: float = 120.0  # Seconds to wait for a response
+    
+    # LLM response cache (memory LRU in front of a size-bounded disk tier in cache_dir)
+    llm_cache_enabled: bool = True
+    llm_cache_memory_entries: int = 1000
+    llm_cache_disk_mb: int = 500  # 0 = memory only
+    llm_cache_qa: bool = True  # Reuse answers to identical questions and context
+    
+    # Batch mode: file summaries are submitted through a provider batch API
+    batch_analysis: bool = False  # Default for analyze requests without "batch"
+    llm_batch_backend: Literal["auto", "local"] = "auto"  # auto = provider's batch API if it has one
+    llm_batch_poll_interval: float = 30.0  # Seconds between batch status checks
+    llm_batch_timeout: float = 86_400.0  # Give up waiting (summarize the rest directly) after this
+    
+    # LLM rate limits, per provider, shared by all processes (0 = unlimited)
+    llm_requests_per_minute: int = 0
+    llm_tokens_per_minute: int = 0
+    # Processes exchange their LLM demand through the database this often and
+    # divide the limits above (and llm_max_concurrency) by it (0 = equal shares)
+    llm_quota_interval: float = 5.0
+    # Processes the limits are divided between equally until demand is known;
+    # 0 = the API and its embedded workers (1 + embedded_workers)
+    llm_limit_processes: int = 0
+    
+    # LLM resilience: retries, adaptive concurrency and circuit breaker
+    llm_max_retries: int = 5  # Retries of throttled or failed requests
+    llm_retry_base_delay: float = 1.0  # Backoff before the first retry (seconds, jittered, doubling)
+    llm_retry_max_delay: float = 60.0
+    llm_max_concurrency: int = 16  # Ceiling of the adaptive in-flight limit (0 = unlimited)
+    llm_breaker_threshold: int = 5  # Failures in a row that pause all requests
+    llm_breaker_cooldown: float = 30.0  # Seconds requests are paused when the breaker trips
+    
+    # Job queue and workers
+    worker_count: int = 2  # Worker processes started by `python -m backend.worker`
+    embedded_workers: int = 1  # Worker processes started by the API itself (0 = separate workers only)
+    worker_poll_interval: float = 2.0  # Seconds an idle worker waits before polling again
+    job_visibility_timeout: int = 300  # Seconds a running job stays leased without a heartbeat
+    job_max_attempts: int = 3  # Attempts before a job is marked failed
+    job_retry_backoff: float = 30.0  # Seconds before the first retry; doubles per attempt
     
     # Repository size limit (in KB)
     max_git_size_kb: int = 10  # Default 10KB for demo version
@@ -11,6 +11,11 @@ from backend.models.repository import Repository
 from backend.models.node import Node
 from backend.models.task import Task
 from backend.models.passphrase_usage import PassphraseUsage
+from backend.models.blob_summary import BlobSummary
+from backend.models.analysis_job import AnalysisJob
+from backend.models.analysis_checkpoint import AnalysisCheckpoint
+from backend.models.process_metrics import ProcessMetrics
+from backend.models.llm_demand import LLMDemand
 from backend.config import settings
 
 # this is the Alembic Config object, which provides
@@ -0,0 +1,31 @@
+"""add content-addressed blob summary store
+
+Revision ID: 003
+Revises: 002
+Create Date: 2026-10-17 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '003'
+down_revision = '002'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'blob_summaries',
+        sa.Column('blob_sha', sa.String(), nullable=False),
+        sa.Column('summary_version', sa.String(), nullable=False),
+        sa.Column('summary', sa.Text(), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.PrimaryKeyConstraint('blob_sha', 'summary_version')
+    )
+
+
+def downgrade():
+    op.drop_table('blob_summaries')
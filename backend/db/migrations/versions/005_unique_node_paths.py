@@ -0,0 +1,37 @@
+"""make node paths unique per repository
+
+Revision ID: 005
+Revises: 004
+Create Date: 2026-10-17 11:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '005'
+down_revision = '004'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Remove duplicate (repo_id, path) nodes left by earlier analyses, keeping one
+    # (portable SQL: DELETE ... USING is PostgreSQL-only)
+    op.execute("""
+        DELETE FROM nodes
+        WHERE id NOT IN (
+            SELECT keep_id FROM (
+                SELECT MIN(id) AS keep_id FROM nodes GROUP BY repo_id, path
+            ) AS kept
+        )
+    """)
+    # Batch mode recreates the table on SQLite, which cannot add constraints
+    with op.batch_alter_table('nodes') as batch_op:
+        batch_op.create_unique_constraint('uq_nodes_repo_path', ['repo_id', 'path'])
+
+
+def downgrade():
+    with op.batch_alter_table('nodes') as batch_op:
+        batch_op.drop_constraint('uq_nodes_repo_path', type_='unique')
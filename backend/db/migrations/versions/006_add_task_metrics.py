@@ -0,0 +1,24 @@
+"""add metrics to tasks
+
+Revision ID: 006
+Revises: 005
+Create Date: 2026-10-17 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '006'
+down_revision = '005'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('tasks', sa.Column('metrics', sa.JSON(), nullable=True))
+
+
+def downgrade():
+    op.drop_column('tasks', 'metrics')
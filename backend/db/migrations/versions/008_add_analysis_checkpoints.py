@@ -0,0 +1,35 @@
+"""add analysis checkpoints
+
+Revision ID: 008
+Revises: 007
+Create Date: 2026-10-17 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '008'
+down_revision = '007'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'analysis_checkpoints',
+        sa.Column('task_id', sa.String(), nullable=False),
+        sa.Column('base_commit', sa.String(), nullable=True),
+        sa.Column('target_commit', sa.String(), nullable=False),
+        sa.Column('phase', sa.String(), nullable=False),
+        sa.Column('completed', sa.JSON(), nullable=False),
+        sa.Column('pending', sa.JSON(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.ForeignKeyConstraint(['task_id'], ['tasks.id'], ),
+        sa.PrimaryKeyConstraint('task_id')
+    )
+
+
+def downgrade():
+    op.drop_table('analysis_checkpoints')
@@ -0,0 +1,32 @@
+"""add job deduplication keys
+
+Revision ID: 009
+Revises: 008
+Create Date: 2026-10-17 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '009'
+down_revision = '008'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('analysis_jobs', sa.Column('repo_key', sa.String(), nullable=True))
+    op.add_column('analysis_jobs', sa.Column('target_commit', sa.String(), nullable=True))
+    op.add_column('analysis_jobs', sa.Column('active_key', sa.String(), nullable=True))
+    op.create_index(op.f('ix_analysis_jobs_repo_key'), 'analysis_jobs', ['repo_key'], unique=False)
+    op.create_index(op.f('ix_analysis_jobs_active_key'), 'analysis_jobs', ['active_key'], unique=True)
+
+
+def downgrade():
+    op.drop_index(op.f('ix_analysis_jobs_active_key'), table_name='analysis_jobs')
+    op.drop_index(op.f('ix_analysis_jobs_repo_key'), table_name='analysis_jobs')
+    op.drop_column('analysis_jobs', 'active_key')
+    op.drop_column('analysis_jobs', 'target_commit')
+    op.drop_column('analysis_jobs', 'repo_key')
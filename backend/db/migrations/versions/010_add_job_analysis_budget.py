@@ -0,0 +1,28 @@
+"""add job analysis budget
+
+Revision ID: 010
+Revises: 009
+Create Date: 2026-10-17 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '010'
+down_revision = '009'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('analysis_jobs', sa.Column('max_files', sa.Integer(), nullable=True))
+    op.add_column('analysis_jobs', sa.Column('max_tokens', sa.Integer(), nullable=True))
+    op.add_column('analysis_jobs', sa.Column('subtree', sa.String(), nullable=True))
+
+
+def downgrade():
+    op.drop_column('analysis_jobs', 'subtree')
+    op.drop_column('analysis_jobs', 'max_tokens')
+    op.drop_column('analysis_jobs', 'max_files')
@@ -0,0 +1,24 @@
+"""add job lazy flag
+
+Revision ID: 011
+Revises: 010
+Create Date: 2026-10-17 14:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '011'
+down_revision = '010'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('analysis_jobs', sa.Column('lazy', sa.Boolean(), nullable=True))
+
+
+def downgrade():
+    op.drop_column('analysis_jobs', 'lazy')
@@ -0,0 +1,24 @@
+"""add job batch flag
+
+Revision ID: 012
+Revises: 011
+Create Date: 2026-10-17 16:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '012'
+down_revision = '011'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('analysis_jobs', sa.Column('batch', sa.Boolean(), nullable=True))
+
+
+def downgrade():
+    op.drop_column('analysis_jobs', 'batch')
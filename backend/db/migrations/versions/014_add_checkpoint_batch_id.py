@@ -0,0 +1,24 @@
+"""add checkpoint batch id
+
+Revision ID: 014
+Revises: 013
+Create Date: 2026-10-18 14:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '014'
+down_revision = '013'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('analysis_checkpoints', sa.Column('batch_id', sa.String(), nullable=True))
+
+
+def downgrade():
+    op.drop_column('analysis_checkpoints', 'batch_id')
@@ -0,0 +1,30 @@
+"""add llm demand
+
+Revision ID: 015
+Revises: 014
+Create Date: 2026-10-19 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '015'
+down_revision = '014'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'llm_demand',
+        sa.Column('process_id', sa.String(), nullable=False),
+        sa.Column('demand', sa.JSON(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.PrimaryKeyConstraint('process_id')
+    )
+
+
+def downgrade():
+    op.drop_table('llm_demand')
@@ -0,0 +1,69 @@
+"""Dialect-aware bulk upsert helper."""
+from sqlalchemy import Table, and_, select, update
+from sqlalchemy.orm import Session
+
+# Rows per INSERT statement; keeps bound parameters below SQLite's limit
+UPSERT_CHUNK_SIZE = 100
+
+
+def bulk_upsert(
+    db: Session,
+    table: Table,
+    rows: list[dict],
+    conflict_columns: list[str],
+    update_columns: list[str],
+):
+    """
+    Insert rows, updating (or ignoring) rows that hit a unique constraint.
+
+    Uses INSERT ... ON CONFLICT on PostgreSQL and SQLite, and falls back to
+    a select-then-write per row on other databases. Does not commit.
+
+    Args:
+        db: Database session
+        table: Target table
+        rows: Row dictionaries; all rows must have the same keys
+        conflict_columns: Columns of the unique constraint to upsert on
+        update_columns: Columns to overwrite on conflict (empty = do nothing)
+    """
+    if not rows:
+        return
+
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    elif dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        _upsert_rows_individually(db, table, rows, conflict_columns, update_columns)
+        return
+
+    for start in range(0, len(rows), UPSERT_CHUNK_SIZE):
+        stmt = insert(table).values(rows[start:start + UPSERT_CHUNK_SIZE])
+        if update_columns:
+            stmt = stmt.on_conflict_do_update(
+                index_elements=conflict_columns,
+                set_={column: stmt.excluded[column] for column in update_columns},
+            )
+        else:
+            stmt = stmt.on_conflict_do_nothing(index_elements=conflict_columns)
+        db.execute(stmt)
+
+
+def _upsert_rows_individually(
+    db: Session,
+    table: Table,
+    rows: list[dict],
+    conflict_columns: list[str],
+    update_columns: list[str],
+):
+    """Fallback upsert for databases without ON CONFLICT support."""
+    for row in rows:
+        match = and_(*(table.c[column] == row[column] for column in conflict_columns))
+        exists = db.execute(select(table.c[conflict_columns[0]]).where(match)).first()
+        if exists is None:
+            db.execute(table.insert().values(row))
+        elif update_columns:
+            db.execute(update(table).where(match).values(
+                {column: row[column] for column in update_columns}
+            ))
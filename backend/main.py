@@ -5,13 +5,19 @@ from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 from backend.config import settings
-from backend.api.routes import analyze, status, tree, search, qa, browse, cache
+from backend.api.routes import analyze, status, tree, search, qa, browse, cache, metrics
 from backend.db.base import Base, engine
 # Import models to ensure tables are created
-from backend.models import Repository, Node, Task, PassphraseUsage
+from backend.models import (
+    Repository, Node, Task, PassphraseUsage, BlobSummary, AnalysisJob, AnalysisCheckpoint
+)
+from backend.worker import WorkerPool
+from backend.services.llm_http import close_http_clients
+from backend.services.llm_quota import start_demand_exchange
 from fastapi.exceptions import RequestValidationError
 from starlette.exceptions import HTTPException as StarletteHTTPException
 import os
+import socket
 import traceback
 
 # Configure logging - force stdout and disable propagation issues
@@ -52,7 +58,25 @@ async def startup_event():
     logger.info(f"LLM Provider: {settings.llm_provider}")
     logger.info(f"Database URL: {settings.database_url[:20]}...")
     logger.info(f"Frontend URL: {settings.frontend_url}")
+    logger.info(f"Embedded workers: {settings.embedded_workers}")
     logger.info("=" * 50)
+    
+    # Analysis runs in separate worker processes, never in the API process
+    if settings.embedded_workers > 0:
+        app.state.worker_pool = WorkerPool(settings.embedded_workers)
+        app.state.worker_pool.start()
+    # Q&A in this process and the analyses in the workers share the LLM limits
+    app.state.demand_exchange = start_demand_exchange(f"{socket.gethostname()}-{os.getpid()}-api")
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    worker_pool = getattr(app.state, "worker_pool", None)
+    if worker_pool:
+        worker_pool.stop()
+    demand_exchange = getattr(app.state, "demand_exchange", None)
+    if demand_exchange:
+        demand_exchange.stop()
+    await close_http_clients()
 
 # CORS middleware - MUST be added before exception handlers
 # Allow frontend URL from environment variable, plus localhost for development
@@ -130,6 +154,7 @@ app.include_router(search.router, prefix="/api", tags=["search"])
 app.include_router(qa.router, prefix="/api", tags=["qa"])
 app.include_router(browse.router, prefix="/api", tags=["browse"])
 app.include_router(cache.router, prefix="/api", tags=["cache"])
+app.include_router(metrics.router, prefix="/api", tags=["metrics"])
 
 
 @app.get("/")
@@ -3,6 +3,11 @@ from backend.models.repository import Repository
 from backend.models.node import Node
 from backend.models.task import Task
 from backend.models.passphrase_usage import PassphraseUsage
+from backend.models.blob_summary import BlobSummary
+from backend.models.analysis_job import AnalysisJob
+from backend.models.analysis_checkpoint import AnalysisCheckpoint
+from backend.models.process_metrics import ProcessMetrics
+from backend.models.llm_demand import LLMDemand
 
-__all__ = ["Repository", "Node", "Task", "PassphraseUsage"]
+__all__ = ["Repository", "Node", "Task", "PassphraseUsage", "BlobSummary", "AnalysisJob", "AnalysisCheckpoint", "ProcessMetrics", "LLMDemand"]
 
@@ -0,0 +1,26 @@
+"""Analysis checkpoint model for resuming interrupted analyses."""
+from sqlalchemy import Column, String, ForeignKey, JSON, DateTime
+from sqlalchemy.sql import func
+from backend.db.base import Base
+
+
+class AnalysisCheckpoint(Base):
+    """
+    Progress of an in-flight analysis, written together with each node flush.
+    
+    `completed` maps every node written by the run to its blob SHA (null for
+    folders); `pending` lists the paths still to be summarized in the
+    current phase; `batch_id` is the provider batch the files phase is
+    waiting for, polled again on resume. The row is deleted when the
+    analysis completes.
+    """
+    __tablename__ = "analysis_checkpoints"
+    
+    task_id = Column(String, ForeignKey("tasks.id"), primary_key=True)
+    base_commit = Column(String, nullable=True)  # Commit the run diffs against (None = full run)
+    target_commit = Column(String, nullable=False)  # Commit being analyzed
+    phase = Column(String, nullable=False)  # "files" or "folders"
+    completed = Column(JSON, nullable=False, default=dict)
+    pending = Column(JSON, nullable=False, default=list)
+    batch_id = Column(String, nullable=True)  # Submitted batch whose results are not stored yet
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
@@ -0,0 +1,46 @@
+"""Analysis job model for the persistent work queue."""
+from sqlalchemy import Column, String, Integer, Boolean, ForeignKey, Text, DateTime
+from sqlalchemy.sql import func
+import enum
+from backend.db.base import Base
+
+
+class JobStatus(str, enum.Enum):
+    """Analysis job status."""
+    QUEUED = "queued"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"
+
+
+class AnalysisJob(Base):
+    """
+    Queued repository analysis, drained by worker processes.
+    
+    A running job is leased to one worker until `locked_until`; if the
+    worker dies and the lease expires, another worker picks the job up.
+    Times are naive UTC.
+    """
+    __tablename__ = "analysis_jobs"
+    
+    id = Column(String, primary_key=True)
+    task_id = Column(String, ForeignKey("tasks.id"), nullable=False, unique=True)
+    repo_url = Column(String, nullable=False)
+    repo_key = Column(String, nullable=True, index=True)  # Normalized repo URL
+    target_commit = Column(String, nullable=True)  # Remote HEAD when queued (None if unresolved)
+    active_key = Column(String, nullable=True, unique=True, index=True)  # Cleared when finished
+    depth = Column(Integer, nullable=True)  # Folder levels to summarize files in (None = all)
+    max_files = Column(Integer, nullable=True)  # Analysis budget; None = unlimited
+    max_tokens = Column(Integer, nullable=True)
+    subtree = Column(String, nullable=True)  # Folder the analysis is limited to
+    lazy = Column(Boolean, nullable=True)  # Summarize on demand first (None = settings default)
+    batch = Column(Boolean, nullable=True)  # Summarize files through a batch API (None = settings default)
+    passphrase = Column(String, nullable=True)  # Usage is recorded after a successful run
+    status = Column(String, default=JobStatus.QUEUED.value, index=True)
+    attempts = Column(Integer, default=0)
+    available_at = Column(DateTime, nullable=False)  # Not claimed before this time (retry backoff)
+    locked_until = Column(DateTime, nullable=True)  # Lease expiry while running
+    worker_id = Column(String, nullable=True)
+    last_error = Column(Text, nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
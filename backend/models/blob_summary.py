@@ -0,0 +1,20 @@
+"""Content-addressed summary store model."""
+from sqlalchemy import Column, String, Text, DateTime
+from sqlalchemy.sql import func
+from backend.db.base import Base
+
+
+class BlobSummary(Base):
+    """
+    File summary keyed by git blob SHA and summary version.
+    
+    Identical file contents share one summary across repositories, forks and
+    branches. The summary version encodes provider, model and prompt version,
+    so changing any of them produces fresh summaries.
+    """
+    __tablename__ = "blob_summaries"
+    
+    blob_sha = Column(String, primary_key=True)
+    summary_version = Column(String, primary_key=True)
+    summary = Column(Text, nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -0,0 +1,19 @@
+"""Per-process LLM demand model."""
+from sqlalchemy import Column, String, JSON, DateTime
+from sqlalchemy.sql import func
+from backend.db.base import Base
+
+
+class LLMDemand(Base):
+    """
+    What one process recently asked of each LLM provider.
+    
+    Every process schedules its own LLM requests. They publish their
+    demand here and each takes the share of the provider limits that
+    the demand of all processes leaves it (see `llm_quota`).
+    """
+    __tablename__ = "llm_demand"
+    
+    process_id = Column(String, primary_key=True)  # host-pid[-worker index]
+    demand = Column(JSON, nullable=False)  # provider -> priority -> rates, flows
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
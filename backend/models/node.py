@@ -1,5 +1,5 @@
 """Node model for repository tree."""
-from sqlalchemy import Column, String, ForeignKey, Text, JSON
+from sqlalchemy import Column, String, ForeignKey, Text, JSON, UniqueConstraint
 from sqlalchemy.dialects.postgresql import ARRAY
 from sqlalchemy import Float, TypeDecorator
 from sqlalchemy.orm import relationship
@@ -48,6 +48,10 @@ class NodeType(str, enum.Enum):
 class Node(Base):
     """Repository node (file or folder) model."""
     __tablename__ = "nodes"
+    __table_args__ = (
+        # One node per path; lets the analyzer bulk upsert on (repo_id, path)
+        UniqueConstraint("repo_id", "path", name="uq_nodes_repo_path"),
+    )
     
     id = Column(String, primary_key=True)
     repo_id = Column(String, ForeignKey("repositories.id"), nullable=False)
@@ -0,0 +1,20 @@
+"""Per-process counters model."""
+from sqlalchemy import Column, String, JSON, DateTime
+from sqlalchemy.sql import func
+from backend.db.base import Base
+
+
+class ProcessMetrics(Base):
+    """
+    Latest snapshot of one process's in-memory counters.
+    
+    Summary store, LLM scheduler and response cache counters live in the
+    memory of the process that uses them. Workers and the API publish them
+    here so the metrics endpoint can report totals across processes.
+    """
+    __tablename__ = "process_metrics"
+    
+    process_id = Column(String, primary_key=True)  # host-pid[-worker index]
+    role = Column(String, nullable=False)  # "api" or "worker"
+    counters = Column(JSON, nullable=False)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
@@ -20,6 +20,7 @@ class Repository(Base):
     id = Column(String, primary_key=True)
     url = Column(String, nullable=False, unique=True)
     status = Column(SQLEnum(RepositoryStatus), default=RepositoryStatus.PENDING)
+    last_analyzed_commit = Column(String, nullable=True)  # HEAD of the last completed analysis
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
 
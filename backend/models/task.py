@@ -1,5 +1,5 @@
 """Task model for async processing."""
-from sqlalchemy import Column, String, Integer, ForeignKey, Text
+from sqlalchemy import Column, String, Integer, ForeignKey, Text, JSON
 from sqlalchemy.orm import relationship
 import enum
 from backend.db.base import Base
@@ -24,6 +24,7 @@ class Task(Base):
     status_message = Column(Text, nullable=True)  # Detailed status message
     error_message = Column(Text, nullable=True)
     result_id = Column(String, nullable=True)  # Repository ID when completed
+    metrics = Column(JSON, nullable=True)  # Analysis counters (e.g. context tokens dropped)
     
     # Relationships
     repository = relationship("Repository", backref="tasks")
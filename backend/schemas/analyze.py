@@ -1,12 +1,18 @@
 """Analyze endpoint schemas."""
-from pydantic import BaseModel, HttpUrl
+from typing import Optional
+from pydantic import BaseModel, Field, HttpUrl
 
 
 class AnalyzeRequest(BaseModel):
     """Analyze request schema (matches OpenAPI)."""
     repo_url: HttpUrl
-    depth: int = 3
+    depth: Optional[int] = Field(None, ge=0)  # Folder levels with per-file summaries; None = all
     passphrase: str  # Required passphrase for access control
+    max_files: Optional[int] = Field(None, ge=1)  # Most files summarized in this run
+    max_tokens: Optional[int] = Field(None, ge=1)  # Most estimated file tokens summarized
+    subtree: Optional[str] = None  # Folder to analyze (or deepen) instead of the whole repository
+    lazy: Optional[bool] = None  # Usable before summarization finishes; None = server default
+    batch: Optional[bool] = None  # Summarize files through the provider's batch API; None = server default
 
 
 class AnalyzeResponse(BaseModel):
@@ -8,6 +8,7 @@ class QARequest(BaseModel):
     repo_id: str
     question: str
     passphrase: str  # Required passphrase for access control
+    use_cache: bool = True  # False always asks the LLM again
 
 
 class QAResponse(BaseModel):
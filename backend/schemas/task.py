@@ -15,6 +15,7 @@ class TaskStatus(BaseModel):
     progress: int  # 0-100
     status_message: Optional[str] = None  # Detailed status message
     result_id: Optional[str] = None
+    metrics: Optional[dict] = None  # Analysis counters
 
 
 class TaskResponse(BaseModel):
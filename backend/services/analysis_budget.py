@@ -0,0 +1,78 @@
+"""Work budgets for partial (coarse or subtree) repository analysis."""
+from dataclasses import dataclass
+from backend.services.context_builder import CHARS_PER_TOKEN
+
+
+@dataclass
+class AnalysisBudget:
+    """
+    Limits on how much of a repository an analysis summarizes.
+
+    Levels are counted below `subtree` (the repository root by default):
+    files directly in it are at level 0. Files deeper than `depth` are not
+    summarized; the folders at the cutoff (level `depth + 1`) are
+    summarized from their structure listing instead, so the map still
+    covers the whole tree. `max_files` and `max_tokens` cap the files
+    summarized in one run, shallowest first.
+    """
+    depth: int | None = None
+    max_files: int | None = None
+    max_tokens: int | None = None  # Estimated tokens of file contents
+    subtree: str = ""
+
+    def __post_init__(self):
+        self.subtree = (self.subtree or "").strip("/")
+
+    def level(self, path: str) -> int | None:
+        """Folder level of a path below the subtree, or None if outside it."""
+        if not self.subtree:
+            relative = path
+        elif path == self.subtree:
+            return 0
+        elif path.startswith(self.subtree + "/"):
+            relative = path[len(self.subtree) + 1:]
+        else:
+            return None
+        return relative.count("/") + (1 if relative else 0)
+
+    def file_in_scope(self, path: str) -> bool:
+        """Whether a file is shallow enough (and inside the subtree) to be summarized."""
+        level = self.level(path)
+        # A file's level is that of the folder it is in
+        return level is not None and (self.depth is None or level - 1 <= self.depth)
+
+    def folder_in_scope(self, path: str) -> bool:
+        """Whether a folder gets a summary: down to one level below the file cutoff."""
+        level = self.level(path)
+        return level is not None and (self.depth is None or level <= self.depth + 1)
+
+    def is_outline_folder(self, path: str) -> bool:
+        """Whether a folder is at the cutoff and is summarized from its structure."""
+        return self.depth is not None and self.level(path) == self.depth + 1
+
+    def select_files(self, files: list[dict]) -> tuple[list[dict], list[dict]]:
+        """
+        Split files into those summarized in this run and those left out.
+
+        Args:
+            files: Candidate files (dicts with path and size)
+
+        Returns:
+            Tuple of (files to summarize, files left out)
+        """
+        in_scope = sorted(
+            (item for item in files if self.file_in_scope(item["path"])),
+            key=lambda item: (item["path"].count("/"), item["path"]),
+        )
+        selected = []
+        tokens = 0
+        for item in in_scope:
+            if self.max_files is not None and len(selected) >= self.max_files:
+                break
+            cost = (item.get("size") or 0) // CHARS_PER_TOKEN
+            if self.max_tokens is not None and tokens + cost > self.max_tokens:
+                continue
+            selected.append(item)
+            tokens += cost
+        chosen = {item["path"] for item in selected}
+        return selected, [item for item in files if item["path"] not in chosen]
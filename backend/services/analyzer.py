@@ -1,4 +1,5 @@
 """Recursive analyzer for repository summarization."""
+import asyncio
 import os
 import uuid
 import logging
@@ -7,14 +8,34 @@ from sqlalchemy.orm import Session
 from backend.models.repository import Repository, RepositoryStatus
 from backend.models.node import Node
 from backend.models.task import Task, TaskStatus
+from backend.models.analysis_checkpoint import AnalysisCheckpoint
+from backend.config import settings
+from backend.db.upsert import bulk_upsert
 from backend.services.git_service import (
-    clone_repository, get_file_tree, read_file_content, cleanup_repository,
-    get_repo_cache_path, get_folder_structure
+    get_file_tree, get_repo_cache_path, get_head_commit, get_changed_paths, get_blob_sha,
+    normalize_repo_url, BlobReader
 )
-from backend.services.llm_service import get_llm_service
+from backend.services.job_queue import find_repository
+from backend.services.mirror_pool import acquire_checkout, publish_checkout, release_checkout
+from backend.services.llm_service import LLMService, get_llm_service
 from backend.services.embedding_service import create_embedding
+from backend.services.folder_scheduler import parent_path, schedule_folders
+from backend.services.summary_store import get_blob_summaries
+from backend.services.persistence import NodeWriter, ProgressReporter
+from backend.services.analysis_budget import AnalysisBudget
+from backend.services.checkpoint import (
+    PHASE_FILES, PHASE_FOLDERS, clear_checkpoint, load_checkpoint, plan_resume, record_batch, set_phase
+)
+from backend.services.tree_index import TreeIndex
+from backend.services.context_builder import CHARS_PER_TOKEN, BuiltContext, build_context, estimate_tokens
+from backend.services.chunking import summarize_chunked
+from backend.services.file_packing import pack_files, summarize_packed
+from backend.services.prompt_compression import compress_source
+from backend.services.file_classifier import (
+    BINARY, UNREADABLE, FileClassifier, describe_skip, is_binary
+)
 from backend.services.summary_files import (
-    summary_exists, read_summary, write_summary, get_summary_file_path
+    read_summary, write_summary, remove_summary, get_summary_root
 )
 from backend.services.passphrase_service import record_repository_crawl
 
@@ -22,13 +43,836 @@ from backend.services.passphrase_service import record_repository_crawl
 logger = logging.getLogger(__name__)
 
 
-def start_analysis(task_id: str, repo_url: str, depth: int, db: Session, passphrase: str = None):
+def _run_async(coro):
+    """Run a coroutine to completion on this thread's event loop."""
+    try:
+        loop = asyncio.get_event_loop()
+    except RuntimeError:
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+    return loop.run_until_complete(coro)
+
+
+def _content_key(item: dict) -> str:
+    """Key shared by copies of a file: its blob SHA, or its path if it has none."""
+    return item.get("sha") or item["path"]
+
+
+def _compress_content(path: str, content: str) -> tuple[str, int]:
+    """
+    Compress file content for its summary prompt (if `prompt_compression` is on).
+    
+    Returns:
+        Tuple of (content to prompt with, estimated tokens saved)
+    """
+    if not settings.prompt_compression:
+        return content, 0
+    compressed = compress_source(path, content, settings.compress_literal_lines)
+    saved = estimate_tokens(content) - estimate_tokens(compressed)
+    if saved <= 0:
+        return content, 0
+    logger.info(f"Compression saved {saved} tokens in {path}")
+    return compressed, saved
+
+
+def _record_compression(progress: ProgressReporter | None, saved: int):
+    """Count a file's compression savings in the task metrics."""
+    if progress and saved:
+        progress.increment("compressed_files")
+        progress.increment("compression_tokens_saved", saved)
+
+
+async def _prefetch_blobs(
+    blob_reader: BlobReader,
+    files: list[dict],
+    stored_summaries: dict[str, str],
+    classifier: FileClassifier,
+):
+    """Fetch the blobs of the files that may be read in one request (partial clones only)."""
+    wanted = [
+        item.get("sha") for item in files
+        if item.get("sha") not in stored_summaries and not classifier.classify_path(item["path"])
+    ]
+    fetched = await asyncio.to_thread(blob_reader.prefetch, wanted)
+    if fetched:
+        logger.info(f"Fetched {fetched} blobs ahead of reading them")
+
+
+async def _read_single_request_files(
+    files: list[dict],
+    summary_root: str,
+    repo_name: str,
+    stored_summaries: dict[str, str],
+    classifier: FileClassifier,
+    blob_reader: BlobReader,
+    max_chars: int,
+    refresh: bool = False,
+) -> dict[str, tuple[dict, str, int]]:
+    """
+    Read the files `_summarize_file` would send to the LLM in one request.
+    
+    Files the classifier rejects, files with a summary file (unless
+    `refresh`) or a stored summary, unreadable and binary files, and files
+    longer than `max_chars` once compressed are left out. Copies of a blob
+    are read once.
+    
+    Returns:
+        Tuples of (file item, compressed content, tokens saved) by `_content_key`
+    """
+    contents = {}
+    for item in files:
+        key = _content_key(item)
+        if key in contents or item.get("sha") in stored_summaries:
+            continue
+        # Cheap pre-check on the uncompressed size in bytes, saving reads
+        if (item.get("size") or 0) > max_chars or classifier.classify_path(item["path"]):
+            continue
+        if not refresh and read_summary(summary_root, item["path"], "file", repo_name):
+            continue
+        data = await asyncio.to_thread(
+            blob_reader.read, item["path"], item.get("sha"), settings.max_chunked_file_size
+        )
+        if not data or is_binary(data):
+            continue
+        content = data.decode("utf-8", errors="ignore")
+        if classifier.classify_content(content):
+            continue
+        content, saved = _compress_content(item["path"], content)
+        if len(content) > max_chars:
+            continue
+        contents[key] = (item, content, saved)
+    return contents
+
+
+async def _summarize_file(
+    item: dict,
+    summary_root: str,
+    repo_name: str,
+    llm_service: LLMService,
+    stored_summaries: dict[str, str],
+    semaphore: asyncio.Semaphore,
+    classifier: FileClassifier,
+    blob_reader: BlobReader,
+    refresh: bool = False,
+    packed_summaries: dict[str, str] | None = None,
+    progress: ProgressReporter | None = None,
+) -> tuple[str, bool, str | None]:
+    """
+    Produce the summary for a single file.
+    
+    Files the classifier rejects (binary, vendored, generated, ...) and
+    files without readable content get a templated summary without an LLM
+    call, so later runs count them as done. Otherwise the filesystem cache
+    takes precedence (unless `refresh` marks it stale), then the
+    content-addressed summary store, then `packed_summaries` (by
+    `_content_key`, from `_summarize_packed_files`); only when all miss is
+    the LLM called, with the content compressed (savings are counted in
+    `progress`). New summaries are written to the summary files. Contents are read
+    from the git object database by blob SHA. Files longer than
+    `chunk_size` are summarized chunk by chunk and merged. Reads and LLM
+    calls each hold a slot of `semaphore`.
+    
+    Returns:
+        Tuple of (summary, whether the summary was freshly generated,
+        skip category or None)
+    """
+    skipped = classifier.classify_path(item["path"])
+    if skipped:
+        return describe_skip(item["path"], skipped), False, skipped
+    
+    existing_summary = None
+    if not refresh:
+        existing_summary = read_summary(summary_root, item["path"], "file", repo_name)
+    if existing_summary:
+        logger.info(f"Using cached summary for {item['path']}")
+        return existing_summary, False, None
+    
+    stored_summary = stored_summaries.get(item.get("sha"))
+    if stored_summary:
+        logger.info(f"Using stored summary for blob {item['sha']} ({item['path']})")
+        write_summary(summary_root, item["path"], "file", stored_summary, repo_name)
+        return stored_summary, False, None
+    
+    summary = packed_summaries.pop(_content_key(item), None) if packed_summaries else None
+    if summary is None:
+        async with semaphore:
+            data = await asyncio.to_thread(
+                blob_reader.read, item["path"], item.get("sha"), settings.max_chunked_file_size
+            )
+            if not data:
+                return describe_skip(item["path"], UNREADABLE), False, UNREADABLE
+            if is_binary(data):
+                return describe_skip(item["path"], BINARY), False, BINARY
+            content = data.decode("utf-8", errors="ignore")
+            skipped = classifier.classify_content(content)
+            if skipped:
+                return describe_skip(item["path"], skipped), False, skipped
+            content, saved = _compress_content(item["path"], content)
+            _record_compression(progress, saved)
+            
+            if len(content) <= settings.chunk_size:
+                logger.info(f"Calling LLM service for {item['path']}, size: {len(content)} chars")
+                summary = await llm_service.generate_summary(content, item_type="file")
+        
+        if summary is None:
+            # Chunk calls take their own semaphore slots
+            summary = await summarize_chunked(
+                llm_service, item["path"], content, settings.chunk_size, semaphore
+            )
+    logger.info(f"LLM returned summary for {item['path']}, length: {len(summary)} chars")
+    
+    write_summary(summary_root, item["path"], "file", summary, repo_name)
+    if item.get("sha"):
+        # Later copies of the same blob in this run reuse the summary
+        stored_summaries[item["sha"]] = summary
+    return summary, True, None
+
+
+async def _summarize_packed_files(
+    progress: ProgressReporter,
+    summary_root: str,
+    repo_name: str,
+    files: list[dict],
+    llm_service: LLMService,
+    stored_summaries: dict[str, str],
+    semaphore: asyncio.Semaphore,
+    classifier: FileClassifier,
+    blob_reader: BlobReader,
+    refresh: bool = False,
+) -> dict[str, str]:
+    """
+    Summarize small files several per LLM request, ahead of the per-file workers.
+    
+    Files of at most `pack_file_max_tokens` are grouped by folder into
+    packs of up to `pack_max_files` files and `pack_max_tokens` (see
+    `file_packing.pack_files`), saving the per-request overhead and the
+    instruction prompt for all but one file of each pack. Files a pack's
+    response does not cover are left to the workers.
+    
+    Returns:
+        Summaries by `_content_key`
+    """
+    if settings.pack_max_files < 2:
+        return {}
+    candidates = await _read_single_request_files(
+        files, summary_root, repo_name, stored_summaries, classifier, blob_reader,
+        settings.pack_file_max_tokens * CHARS_PER_TOKEN, refresh
+    )
+    contents = {item["path"]: content for item, content, _ in candidates.values()}
+    packs = pack_files(contents, settings.pack_max_tokens, settings.pack_max_files)
+    if not packs:
+        return {}
+    
+    packed_files = sum(len(pack) for pack in packs)
+    progress.update(message=f"Summarizing {packed_files} small files in {len(packs)} requests...", force=True)
+    results = await asyncio.gather(*(
+        summarize_packed(llm_service, {path: contents[path] for path in pack}, semaphore)
+        for pack in packs
+    ), return_exceptions=True)
+    
+    keys = {item["path"]: key for key, (item, _, _) in candidates.items()}
+    summaries = {}
+    for pack, result in zip(packs, results):
+        if isinstance(result, Exception):
+            logger.error(f"Error summarizing packed files in {parent_path(pack[0]) or 'root'}: {str(result)}")
+            continue
+        for path, summary in result.items():
+            summaries[keys[path]] = summary
+            # Files left to the workers are counted when they are summarized
+            _record_compression(progress, candidates[keys[path]][2])
+    progress.set_metric("packed_requests", len(packs))
+    progress.set_metric("packed_files", len(summaries))
+    logger.info(f"Summarized {len(summaries)} of {packed_files} small files in {len(packs)} packed requests")
+    return summaries
+
+
+async def _summarize_files(
+    db: Session,
+    node_writer: NodeWriter,
+    progress: ProgressReporter,
+    tree_index: TreeIndex,
+    repo_path: str,
+    summary_root: str,
+    repo_name: str,
+    files: list[dict],
+    llm_service: LLMService,
+    refresh: bool = False,
+) -> int:
+    """
+    Summarize files concurrently with at most `analysis_concurrency` in flight.
+    
+    Small files are first summarized in packs (`_summarize_packed_files`).
+    Workers only read files and talk to the LLM; every database write goes
+    through a single writer coroutine that buffers nodes for bulk upserts
+    and reports progress (and per-category skip counts) at a capped rate.
+    With `refresh`, existing summary files are treated as stale.
+    
+    Returns:
+        Number of files that were summarized and stored
+    """
+    semaphore = asyncio.Semaphore(max(1, settings.analysis_concurrency))
+    results: asyncio.Queue = asyncio.Queue()
+    total_files = len(files)
+    summary_version = llm_service.summary_version
+    stored_summaries = get_blob_summaries(
+        db, [item.get("sha") for item in files], summary_version
+    )
+    logger.info(f"Summary store has {len(stored_summaries)} of {total_files} file blobs")
+    blob_reader = BlobReader(repo_path)
+    classifier = FileClassifier.for_repo(blob_reader)
+    skip_counts: dict[str, int] = {}
+    packed_summaries: dict[str, str] = {}
+    
+    async def worker(item: dict):
+        summary, generated, skipped = None, False, None
+        try:
+            summary, generated, skipped = await _summarize_file(
+                item, summary_root, repo_name, llm_service, stored_summaries, semaphore,
+                classifier, blob_reader, refresh, packed_summaries, progress
+            )
+        except Exception as file_error:
+            logger.error(f"Error processing file {item['path']}: {str(file_error)}", exc_info=True)
+        await results.put((item, summary, generated, skipped))
+    
+    async def writer() -> int:
+        processed = 0
+        for finished in range(1, total_files + 1):
+            item, summary, generated, skipped = await results.get()
+            try:
+                if skipped:
+                    skip_counts[skipped] = skip_counts.get(skipped, 0) + 1
+                    progress.increment(f"skipped_{skipped}")
+                if summary is not None:
+                    tree_index.set_summary(item["path"], summary)
+                    if generated:
+                        node_writer.add_blob_summary(item.get("sha"), summary_version, summary)
+                    node_writer.add_node(
+                        item["path"], "file", summary,
+                        embedding=create_embedding(summary), blob_sha=item.get("sha"),
+                    )
+                    processed += 1
+                # Files take 80% of progress
+                progress.update(
+                    int((finished / total_files) * 80) if total_files > 0 else 80,
+                    f"Processing file: {item['path']}",
+                )
+            except Exception as db_error:
+                logger.error(f"Error storing summary for {item['path']}: {str(db_error)}", exc_info=True)
+        
+        node_writer.flush()
+        progress.update(force=True)
+        if skip_counts:
+            logger.info(f"Skipped {sum(skip_counts.values())} files without LLM calls: {skip_counts}")
+        return processed
+    
+    try:
+        await _prefetch_blobs(blob_reader, files, stored_summaries, classifier)
+        packed_summaries = await _summarize_packed_files(
+            progress, summary_root, repo_name, files, llm_service, stored_summaries, semaphore,
+            classifier, blob_reader, refresh
+        )
+        writer_task = asyncio.create_task(writer())
+        await asyncio.gather(*(worker(item) for item in files))
+        return await writer_task
+    finally:
+        blob_reader.close()
+
+
+async def _summarize_files_in_batch(
+    db: Session,
+    node_writer: NodeWriter,
+    progress: ProgressReporter,
+    repo_path: str,
+    summary_root: str,
+    repo_name: str,
+    files: list[dict],
+    llm_service: LLMService,
+    refresh: bool = False,
+    checkpoint: AnalysisCheckpoint | None = None,
+) -> int:
+    """
+    Summarize files through one batch submission ahead of the regular pass.
+    
+    Only files the regular pass would send to the LLM in a single request
+    are batched: not skipped, not cached or stored already, and short
+    enough not to be chunked. Their summaries go into the blob summary
+    store, where the regular pass picks them up; files the batch does not
+    answer are summarized directly by that pass. The submitted batch is
+    recorded in `checkpoint`, so a resumed run waits for it instead of
+    submitting another one.
+    
+    Returns:
+        Number of distinct blobs summarized by the batch
+    """
+    summary_version = llm_service.summary_version
+    stored_summaries = get_blob_summaries(db, [item.get("sha") for item in files], summary_version)
+    blob_reader = BlobReader(repo_path)
+    classifier = FileClassifier.for_repo(blob_reader)
+    try:
+        await _prefetch_blobs(blob_reader, files, stored_summaries, classifier)
+        candidates = await _read_single_request_files(
+            files, summary_root, repo_name, stored_summaries, classifier, blob_reader,
+            settings.chunk_size, refresh
+        )
+    finally:
+        blob_reader.close()
+    # Only blobs can go into the summary store
+    contents = {key: content for key, (item, content, _) in candidates.items() if item.get("sha")}
+    if not contents:
+        return 0
+    
+    progress.update(message=f"Waiting for batch summaries of {len(contents)} files...", force=True)
+    summaries = await llm_service.generate_summaries_batch(
+        contents,
+        batch_id=checkpoint.batch_id if checkpoint else None,
+        on_submit=(lambda batch_id: record_batch(db, checkpoint, batch_id)) if checkpoint else None,
+    )
+    for blob_sha, summary in summaries.items():
+        node_writer.add_blob_summary(blob_sha, summary_version, summary)
+        _record_compression(progress, candidates[blob_sha][2])
+    node_writer.flush()
+    if checkpoint is not None and checkpoint.batch_id:
+        record_batch(db, checkpoint, None)
+    progress.set_metric("batch_summaries", len(summaries))
+    logger.info(f"Batch summarized {len(summaries)}/{len(contents)} file blobs")
+    return len(summaries)
+
+
+async def _summarize_folders(
+    node_writer: NodeWriter,
+    progress: ProgressReporter,
+    tree_index: TreeIndex,
+    repo_url: str,
+    summary_root: str,
+    repo_name: str,
+    folders: list[str],
+    llm_service: LLMService,
+    refresh: bool = False,
+    completed: set[str] | None = None,
+    outline_folders: set[str] | None = None,
+):
+    """
+    Summarize folders in dependency order, finishing with the root summary.
+    
+    Each folder's LLM call starts as soon as all of its child folders are
+    finished, so sibling subtrees are summarized concurrently. Contexts are
+    built from the in-memory tree index, so no database reads are needed.
+    With `refresh`, existing summary files are treated as stale. Folders in
+    `completed` were written by an interrupted run and are kept as stored.
+    Folders in `outline_folders` are below the analysis depth and are
+    summarized from their full structure listing.
+    """
+    completed = completed or set()
+    outline_folders = outline_folders or set()
+    total_folders = len(folders) + 1  # Including root
+    finished = 0
+    
+    async def summarize_folder(folder_path: str) -> str:
+        nonlocal finished
+        is_root = folder_path == ""
+        folder_display = folder_path if folder_path else "root"
+        
+        stored_summary = tree_index.get_summary(folder_path)
+        if folder_path in completed and stored_summary:
+            finished += 1
+            progress.update(80 + int((finished / total_folders) * 19))
+            return stored_summary
+        
+        # Filesystem cache takes precedence: check if summary file exists
+        # If file doesn't exist, re-summarize even if DB has entry
+        folder_summary = None
+        if not refresh:
+            folder_summary = read_summary(summary_root, folder_path, "folder", repo_name)
+        
+        if not folder_summary:
+            if is_root:
+                folder_context = _build_root_context(tree_index)
+            elif folder_path in outline_folders:
+                folder_context = _build_folder_context(tree_index, folder_path, levels=None)
+            else:
+                folder_context = _build_folder_context(tree_index, folder_path)
+            if folder_context.dropped_tokens:
+                logger.info(
+                    f"Context for {folder_display} trimmed by {folder_context.dropped_tokens} "
+                    f"tokens to {folder_context.tokens}"
+                )
+                progress.increment("context_tokens_dropped", folder_context.dropped_tokens)
+            
+            logger.info(f"Calling LLM service for folder: {folder_display}")
+            folder_summary = await llm_service.generate_summary(
+                folder_context.text,
+                context=None,
+                item_type="folder"
+            )
+            
+            # Save summary to file (in parent directory, or <repo>.md for root)
+            write_summary(summary_root, folder_path, "folder", folder_summary, repo_name)
+        
+        tree_index.set_summary(folder_path, folder_summary)
+        if is_root:
+            node_writer.add_node(
+                "", "folder", folder_summary,
+                name=repo_name or os.path.basename(repo_url.rstrip("/")) or "root",
+            )
+        else:
+            node_writer.add_node(folder_path, "folder", folder_summary)
+        
+        finished += 1
+        # Folders and root take the remaining 80-100% of progress
+        progress.update(
+            80 + int((finished / total_folders) * 19),
+            "Generating repository summary..." if is_root else f"Processing folder: {folder_display}",
+        )
+        return folder_summary
+    
+    await schedule_folders(folders, summarize_folder, settings.analysis_concurrency)
+    node_writer.flush()
+    progress.update(force=True)
+
+
+def _build_folder_context(
+    tree_index: TreeIndex, folder_path: str, levels: int | None = 1
+) -> BuiltContext:
+    """
+    Build the LLM context for a folder from its structure and direct children's summaries.
+    
+    `levels` limits how deep the structure listing goes (None for all levels).
+    """
+    folder_summaries = []
+    file_summaries = []
+    for child_path, node_type, summary in tree_index.child_summaries(folder_path):
+        if node_type == "folder":
+            folder_summaries.append((child_path, summary))
+        else:
+            file_summaries.append((child_path, summary))
+    
+    context = build_context(
+        structure=tree_index.structure_listing(folder_path, levels),
+        structure_heading="Folder Structure:\n",
+        folder_summaries=folder_summaries,
+        file_summaries=file_summaries,
+        budget=settings.folder_context_tokens,
+        folder_heading="Child Folder Summaries:\n",
+        file_heading="Child File Summaries:\n",
+        folder_label="{path}: {summary}",
+        file_label="{path}: {summary}",
+        separator="\n",
+    )
+    if not context.text:
+        context.text = f"Folder: {folder_path}"
+    return context
+
+
+def _build_root_context(tree_index: TreeIndex) -> BuiltContext:
+    """
+    Build the LLM context for the repository root summary.
+    
+    Top-level folder summaries already cover their subtrees, so they come
+    first; file summaries from anywhere in the repository (shallowest first,
+    ranked by importance) fill whatever budget is left.
+    """
+    folder_summaries = [
+        (path, summary)
+        for path, node_type, summary in tree_index.child_summaries("")
+        if node_type == "folder"
+    ]
+    file_summaries = [
+        (path, summary)
+        for path, node_type, summary in tree_index.summarized_descendants("")
+        if node_type == "file"
+    ]
+    
+    context = build_context(
+        structure=tree_index.structure_listing(""),
+        structure_heading="Repository Structure:\n",
+        folder_summaries=folder_summaries,
+        file_summaries=file_summaries,
+        budget=settings.root_context_tokens,
+        folder_heading="## Folder Summaries:\n",
+        file_heading="## File Summaries:\n",
+        folder_label="## Folder: {path}\n{summary}",
+        file_label="### File: {path}\n{summary}",
+        separator="\n\n",
+    )
+    
+    # Handle case where no summaries exist
+    if not context.text.strip():
+        context.text = "This repository structure and its contents."
+    
+    return context
+
+
+def _plan_incremental(
+    changes: dict[str, list[str]], files: list[dict], folders: list[str]
+) -> tuple[list[dict], list[str]]:
+    """
+    Select the files and folders affected by a set of changes.
+    
+    Added and modified files are re-summarized; every ancestor folder of an
+    added, modified or deleted path is recomputed (the root always is).
+    
+    Returns:
+        Tuple of (files to summarize, folders to summarize)
+    """
+    changed = set(changes["added"]) | set(changes["modified"])
+    dirty_folders = set()
+    for path in changed | set(changes["deleted"]):
+        parent = parent_path(path)
+        while parent:
+            dirty_folders.add(parent)
+            parent = parent_path(parent)
+    
+    return (
+        [item for item in files if item["path"] in changed],
+        [folder for folder in folders if folder in dirty_folders],
+    )
+
+
+def _fill_unknown_sizes(repo_path: str, budget: AnalysisBudget, files: list[dict]):
+    """
+    Look up the sizes a partial clone does not know yet for files in scope.
+    
+    The token budget is counted from file sizes, so their blobs are
+    fetched (in one request) first.
+    """
+    unknown = [item for item in files if item.get("size") is None and budget.file_in_scope(item["path"])]
+    if not unknown:
+        return
+    blob_reader = BlobReader(repo_path)
+    try:
+        blob_reader.prefetch([item["sha"] for item in unknown])
+        for item in unknown:
+            item["size"] = blob_reader.size(item["sha"])
+    finally:
+        blob_reader.close()
+
+
+def _apply_budget(
+    budget: AnalysisBudget,
+    tree_index: TreeIndex,
+    all_files: list[dict],
+    all_folders: list[str],
+    files: list[dict],
+    folders: list[str],
+) -> tuple[list[dict], list[str], set[str], list[tuple[str, str]]]:
+    """
+    Fit the planned work to an analysis budget.
+    
+    Files and folders in scope that have no summary yet (e.g. left out by
+    an earlier, shallower run) are added to the changed ones, then files
+    are capped by the budget. Ancestors of the selected files are always
+    recomputed so the new summaries reach the root.
+    
+    Args:
+        budget: Depth, subtree and size limits of this run
+        tree_index: Index with the stored summaries loaded
+        all_files: Every file in the repository
+        all_folders: Every folder path in the repository
+        files: Changed files to summarize
+        folders: Folders affected by the changes
+    
+    Returns:
+        Tuple of (files to summarize, folders to summarize, folders to
+        summarize from their structure, (path, type) of changed nodes left
+        out whose stored summaries are now stale)
+    """
+    changed = {item["path"] for item in files}
+    candidates = [
+        item for item in all_files
+        if item["path"] in changed or tree_index.get_summary(item["path"]) is None
+    ]
+    selected, left_out = budget.select_files(candidates)
+    
+    needed = set()
+    for item in selected:
+        parent = parent_path(item["path"])
+        while parent:
+            needed.add(parent)
+            parent = parent_path(parent)
+    dirty = set(folders)
+    for folder in all_folders:
+        if budget.folder_in_scope(folder) and (
+            folder in dirty or tree_index.get_summary(folder) is None
+        ):
+            needed.add(folder)
+    parent = budget.subtree
+    while parent:
+        # The subtree's ancestors pick up its new summaries
+        needed.add(parent)
+        parent = parent_path(parent)
+    
+    stale = [
+        (item["path"], "file") for item in left_out
+        if item["path"] in changed and tree_index.get_summary(item["path"]) is not None
+    ] + [
+        (folder, "folder") for folder in folders
+        if folder not in needed and tree_index.get_summary(folder) is not None
+    ]
+    planned_folders = [folder for folder in all_folders if folder in needed]
+    outline = {folder for folder in planned_folders if budget.is_outline_folder(folder)}
+    return selected, planned_folders, outline, stale
+
+
+def _delete_nodes(
+    db: Session, repo_id: str, summary_root: str, repo_name: str, stale: list[tuple[str, str]]
+):
+    """Delete the nodes and summary files at the given (path, type) pairs."""
+    if not stale:
+        return
+    for path, node_type in stale:
+        remove_summary(summary_root, path, node_type, repo_name)
+    stale_paths = [path for path, _ in stale]
+    for start in range(0, len(stale_paths), 500):
+        db.query(Node).filter(
+            Node.repo_id == repo_id, Node.path.in_(stale_paths[start:start + 500])
+        ).delete(synchronize_session=False)
+    db.commit()
+
+
+def _remove_deleted_nodes(
+    db: Session, repo_id: str, summary_root: str, repo_name: str, file_tree: list[dict]
+):
+    """Delete nodes and summary files for paths no longer in the repository."""
+    current_paths = {item["path"] for item in file_tree}
+    current_paths.add("")
+    
+    stale = [
+        (path, node_type)
+        for path, node_type in db.query(Node.path, Node.type).filter(Node.repo_id == repo_id)
+        if path not in current_paths
+    ]
+    if stale:
+        logger.info(f"Removing {len(stale)} nodes for deleted paths")
+        _delete_nodes(db, repo_id, summary_root, repo_name, stale)
+
+
+def _write_skeleton(db: Session, repo_id: str, repo_name: str, file_tree: list[dict]):
+    """
+    Store a node without a summary for every path that has no node yet.
+    
+    Existing nodes (and their summaries) are left untouched, so a resumed
+    or incremental run keeps what is already summarized.
+    """
+    rows = [{
+        "id": str(uuid.uuid4()),
+        "repo_id": repo_id,
+        "path": "",
+        "name": repo_name or "root",
+        "type": "folder",
+        "summary": None,
+        "embedding": None,
+    }] + [
+        {
+            "id": str(uuid.uuid4()),
+            "repo_id": repo_id,
+            "path": item["path"],
+            "name": os.path.basename(item["path"]),
+            "type": item["type"],
+            "summary": None,
+            "embedding": None,
+        }
+        for item in file_tree
+    ]
+    bulk_upsert(db, Node.__table__, rows, conflict_columns=["repo_id", "path"], update_columns=[])
+    db.commit()
+
+
+async def summarize_node(db: Session, repo: Repository, path: str, node_type: str) -> str:
+    """
+    Summarize one node of a repository right away and store the summary.
+    
+    Used for nodes a lazy analysis has not reached yet. Files are read from
+    the published checkout (reusing stored summaries of the same blob);
+    folders are summarized from whatever their children have so far and
+    only stored in the database, so the background pass replaces them.
+    
+    Args:
+        db: Database session
+        repo: Repository the node belongs to
+        path: Node path ("" for the root)
+        node_type: "file" or "folder"
+    
+    Returns:
+        The summary
+    """
+    cache_path = get_repo_cache_path(repo.url)
+    repo_name = cache_path.name
+    summary_root = str(get_summary_root(repo_name))
+    llm_service = get_llm_service()
+    node_writer = NodeWriter(db, repo.id)
+    
+    if node_type == "file":
+        blob_sha = await asyncio.to_thread(get_blob_sha, str(cache_path), path)
+        stored_summaries = (
+            get_blob_summaries(db, [blob_sha], llm_service.summary_version) if blob_sha else {}
+        )
+        blob_reader = BlobReader(str(cache_path))
+        try:
+            summary, generated, _ = await _summarize_file(
+                {"path": path, "sha": blob_sha}, summary_root, repo_name, llm_service,
+                stored_summaries, asyncio.Semaphore(max(1, settings.analysis_concurrency)),
+                FileClassifier.for_repo(blob_reader), blob_reader,
+            )
+        finally:
+            blob_reader.close()
+        if generated:
+            node_writer.add_blob_summary(blob_sha, llm_service.summary_version, summary)
+        node_writer.add_node(
+            path, "file", summary, embedding=create_embedding(summary), blob_sha=blob_sha
+        )
+    else:
+        tree_index = TreeIndex.from_file_tree([
+            {"path": node_path, "type": node_type}
+            for node_path, node_type in db.query(Node.path, Node.type).filter(Node.repo_id == repo.id)
+            if node_path
+        ])
+        tree_index.load_summaries(db, repo.id)
+        if path:
+            folder_context = _build_folder_context(tree_index, path)
+        else:
+            folder_context = _build_root_context(tree_index)
+        summary = await llm_service.generate_summary(folder_context.text, context=None, item_type="folder")
+        # Kept out of the summary files: the background pass would reuse
+        # them, although they predate most of the folder's children
+        node_writer.add_node(path, "folder", summary, name=None if path else repo_name)
+    
+    node_writer.flush()
+    return summary
+
+
+def start_analysis(
+    task_id: str,
+    repo_url: str,
+    depth: int | None,
+    db: Session,
+    passphrase: str = None,
+    max_files: int | None = None,
+    max_tokens: int | None = None,
+    subtree: str | None = None,
+    lazy: bool | None = None,
+    batch: bool | None = None,
+):
     """
     Start recursive analysis of a repository.
     
-    This function runs in the background and updates task status.
+    Runs in a worker process with its own session and updates task status;
+    failures are recorded on the task rather than raised.
+    
+    `depth`, `max_files`, `max_tokens` and `subtree` bound the work of one
+    run (see `AnalysisBudget`); a later run with a larger budget summarizes
+    only what earlier runs left out. With `lazy` (default
+    `settings.lazy_analysis`), the node tree and checkout are published
+    before any summaries, so the API can summarize the nodes it is asked
+    about on demand while this run fills in the rest. With `batch` (default
+    `settings.batch_analysis`), file summaries are requested through the
+    provider's batch API first and the folders follow once it completes.
     """
+    if lazy is None:
+        lazy = settings.lazy_analysis
+    if batch is None:
+        batch = settings.batch_analysis
     repo_path = None
+    checkout = None
     repo = None
     repo_id = None
     try:
@@ -36,10 +880,10 @@ def start_analysis(task_id: str, repo_url: str, depth: int, db: Session, passphr
         print(f"[ANALYZER] Starting analysis: {repo_url}, task: {task_id}")  # Backup logging
         
         # Create or get repository
-        repo = db.query(Repository).filter(Repository.url == repo_url).first()
+        repo = find_repository(db, repo_url)
         if not repo:
             repo_id = str(uuid.uuid4())
-            repo = Repository(id=repo_id, url=repo_url, status=RepositoryStatus.PROCESSING)
+            repo = Repository(id=repo_id, url=normalize_repo_url(repo_url), status=RepositoryStatus.PROCESSING)
             db.add(repo)
             db.commit()
         else:
@@ -47,54 +891,66 @@ def start_analysis(task_id: str, repo_url: str, depth: int, db: Session, passphr
             # Update status to processing
             repo.status = RepositoryStatus.PROCESSING
             db.commit()
+        previous_commit = repo.last_analyzed_commit
         
-        # Create task
-        task = Task(
-            id=task_id,
-            repo_id=repo_id,
-            status=TaskStatus.PROCESSING.value,
-            progress=0,
-            status_message="Getting repository...",
-        )
-        db.add(task)
+        # Create task, or pick up the one created when the job was queued
+        task = db.query(Task).filter(Task.id == task_id).first()
+        if not task:
+            task = Task(id=task_id, repo_id=repo_id)
+            db.add(task)
+        task.status = TaskStatus.PROCESSING.value
+        task.progress = 0
+        task.status_message = "Getting repository..."
+        task.error_message = None
         db.commit()
         
         # Clone repository
         task.status_message = "Cloning repository..."
         db.commit()
         logger.info(f"Cloning repository from {repo_url}")
-        repo_path = clone_repository(repo_url)
-        logger.info(f"Repository cloned to {repo_path}")
+        checkout = acquire_checkout(repo_url, base_commit=previous_commit)
+        repo_path = checkout.path
+        clone_stats = checkout.stats
+        logger.info(
+            f"Repository checked out to {repo_path} ({clone_stats.mode}) in {clone_stats.seconds:.1f}s, "
+            f"{clone_stats.bytes_received} bytes received"
+        )
         
         # Get repository name for root summary naming
         cache_path = get_repo_cache_path(repo_url)
         repo_name = cache_path.name
+        summary_root = str(get_summary_root(repo_name))
         
         # Get file tree
         file_tree = get_file_tree(repo_path)
+        head_commit = get_head_commit(repo_path)
         total_files = len([f for f in file_tree if f["type"] == "file"])
-        logger.info(f"Found {total_files} files in repository")
+        logger.info(f"Found {total_files} files in repository at {head_commit}")
+        
+        node_writer = NodeWriter(db, repo_id)
+        progress = ProgressReporter(db, task)
+        for key, value in clone_stats.as_metrics().items():
+            progress.set_metric(key, value)
+        
+        # Drop nodes (and summary files) for paths that no longer exist
+        _remove_deleted_nodes(db, repo_id, summary_root, repo_name, file_tree)
         
         # Handle empty repository
         if not file_tree or total_files == 0:
             # Create a minimal root node
             root_summary = f"This repository ({repo_url}) appears to be empty or contains no analyzable files."
             # Save root summary to file with repo name
-            root_summary_path = get_summary_file_path(repo_path, "", "folder", repo_name)
-            root_summary_path.parent.mkdir(parents=True, exist_ok=True)
-            root_summary_path.write_text(root_summary, encoding="utf-8")
+            write_summary(summary_root, "", "folder", root_summary, repo_name)
             
-            root_node = Node(
-                id=str(uuid.uuid4()),
-                repo_id=repo_id,
-                path="",
+            node_writer.add_node(
+                "", "folder", root_summary,
                 name=os.path.basename(repo_url.rstrip("/")) or "root",
-                type="folder",
-                summary=root_summary,
-                parent_id=None,
             )
-            db.add(root_node)
+            node_writer.flush()
+            publish_checkout(checkout)
+            clear_checkpoint(db, task_id)
             repo.status = RepositoryStatus.COMPLETED
+            repo.last_analyzed_commit = head_commit
             task.status = TaskStatus.COMPLETED.value
             task.progress = 100
             task.result_id = repo_id
@@ -106,300 +962,116 @@ def start_analysis(task_id: str, repo_url: str, depth: int, db: Session, passphr
             
             return
         
-        # Process files (leaves first)
-        processed = 0
-        llm_service = get_llm_service()
-        
-        task.status_message = f"Processing {total_files} files..."
-        db.commit()
+        all_files = [item for item in file_tree if item["type"] == "file"]
+        all_folders = [f["path"] for f in file_tree if f["type"] == "folder"]
+        files, folders = all_files, all_folders
         
-        for item in file_tree:
-            if item["type"] == "file":
-                try:
-                    file_path = os.path.join(repo_path, item["path"])
-                    content = read_file_content(file_path)
-                    
-                    if content:
-                        # Update status message
-                        task.status_message = f"Processing file: {item['path']}"
-                        db.commit()
-                        logger.info(f"Processing file: {item['path']}, size: {len(content)} chars")
-                        
-                        # Filesystem cache takes precedence: check if summary file exists
-                        # If file doesn't exist, re-summarize even if DB has entry
-                        existing_summary = read_summary(repo_path, item["path"], "file", repo_name)
-                        
-                        if existing_summary:
-                            # Use existing summary from filesystem
-                            logger.info(f"Using cached summary for {item['path']}")
-                            summary = existing_summary
-                        else:
-                            # Generate new summary
-                            logger.info(f"Generating new summary for {item['path']}")
-                            import asyncio
-                            try:
-                                loop = asyncio.get_event_loop()
-                            except RuntimeError:
-                                loop = asyncio.new_event_loop()
-                                asyncio.set_event_loop(loop)
-                            
-                            logger.info(f"Calling LLM service for {item['path']}")
-                            print(f"[ANALYZER] Calling LLM for: {item['path']}")  # Backup logging
-                            summary = loop.run_until_complete(
-                                llm_service.generate_summary(content, item_type="file")
-                            )
-                            logger.info(f"LLM returned summary for {item['path']}, length: {len(summary)} chars")
-                            print(f"[ANALYZER] LLM returned summary, length: {len(summary)}")  # Backup logging
-                            
-                            # Save summary to file
-                            write_summary(repo_path, item["path"], "file", summary, repo_name)
-                            logger.info(f"Saved summary to filesystem for {item['path']}")
-                        
-                        # Create embedding
-                        embedding = create_embedding(summary)
-                        
-                        # Check if node already exists in DB
-                        existing_node = db.query(Node).filter(
-                            Node.repo_id == repo_id,
-                            Node.path == item["path"]
-                        ).first()
-                        
-                        if existing_node:
-                            # Update existing node
-                            existing_node.summary = summary
-                            existing_node.embedding = embedding
-                        else:
-                            # Create new node
-                            node_id = str(uuid.uuid4())
-                            node = Node(
-                                id=node_id,
-                                repo_id=repo_id,
-                                path=item["path"],
-                                name=os.path.basename(item["path"]),
-                                type="file",
-                                summary=summary,
-                                embedding=embedding,
-                            )
-                            db.add(node)
-                        
-                        processed += 1
-                        
-                        # Update progress (avoid division by zero)
-                        if total_files > 0:
-                            progress = int((processed / total_files) * 80)  # Files take 80% of progress
-                        else:
-                            progress = 80
-                        task.progress = progress
-                        db.commit()
-                        logger.info(f"Successfully processed and committed {item['path']}")
-                
-                except Exception as file_error:
-                    logger.error(f"Error processing file {item['path']}: {str(file_error)}", exc_info=True)
-                    db.rollback()
-                    # Continue with next file
-                    continue
-        
-        # Process folders bottom-up
-        folders = [f for f in file_tree if f["type"] == "folder"]
-        folders.sort(key=lambda x: x["path"].count("/"), reverse=True)  # Deepest first
-        
-        task.status_message = f"Processing {len(folders)} folders..."
-        db.commit()
-        
-        for folder in folders:
-            # Update status message
-            folder_display = folder["path"] if folder["path"] else "root"
-            task.status_message = f"Processing folder: {folder_display}"
-            db.commit()
-            
-            # Filesystem cache takes precedence: check if summary file exists
-            # If file doesn't exist, re-summarize even if DB has entry
-            existing_summary = read_summary(repo_path, folder["path"], "folder", repo_name)
-            
-            if existing_summary:
-                # Use existing summary
-                folder_summary = existing_summary
-            else:
-                # Get folder structure (list of files/subfolders)
-                folder_structure = get_folder_structure(repo_path, folder["path"])
-                
-                # Get child summaries (from DB or files)
-                child_nodes = db.query(Node).filter(
-                    Node.repo_id == repo_id,
-                    Node.path.like(f"{folder['path']}/%")
-                ).all()
-                
-                # Build context with folder structure and child summaries
-                context_parts = []
-                
-                if folder_structure:
-                    context_parts.append(f"Folder Structure:\n{folder_structure}")
-                
-                # Also check for child summaries in files
-                child_summaries_list = []
-                for child_node in child_nodes:
-                    if child_node.summary:
-                        child_summaries_list.append(f"{child_node.path}: {child_node.summary}")
-                    else:
-                        # Try reading from file
-                        file_summary = read_summary(repo_path, child_node.path, child_node.type, repo_name)
-                        if file_summary:
-                            child_summaries_list.append(f"{child_node.path}: {file_summary}")
-                
-                if child_summaries_list:
-                    context_parts.append("Child Summaries:\n" + "\n".join(child_summaries_list))
-                
-                folder_context = "\n\n".join(context_parts) if context_parts else f"Folder: {folder['path']}"
-                
-                # Generate folder summary
-                import asyncio
-                try:
-                    loop = asyncio.get_event_loop()
-                except RuntimeError:
-                    loop = asyncio.new_event_loop()
-                    asyncio.set_event_loop(loop)
-                
-                folder_summary = loop.run_until_complete(
-                    llm_service.generate_summary(
-                        folder_context,
-                        context=None,
-                        item_type="folder"
-                    )
-                )
-                
-                # Save summary to file (in parent directory)
-                write_summary(repo_path, folder["path"], "folder", folder_summary, repo_name)
-            
-            # Check if node already exists in DB
-            existing_node = db.query(Node).filter(
-                Node.repo_id == repo_id,
-                Node.path == folder["path"]
-            ).first()
-            
-            if existing_node:
-                # Update existing node
-                existing_node.summary = folder_summary
+        # Re-analysis: only re-summarize what changed since the last analyzed commit.
+        # Summary files of changed paths are stale, so they are bypassed.
+        refresh = False
+        if previous_commit:
+            changes = get_changed_paths(repo_path, previous_commit, head_commit)
+            refresh = True
+            if changes is None:
+                logger.info(f"Commit {previous_commit} is unavailable, re-analyzing all files")
             else:
-                # Create folder node
-                node_id = str(uuid.uuid4())
-                node = Node(
-                    id=node_id,
-                    repo_id=repo_id,
-                    path=folder["path"],
-                    name=os.path.basename(folder["path"]) or "root",
-                    type="folder",
-                    summary=folder_summary,
+                files, folders = _plan_incremental(changes, files, folders)
+                logger.info(
+                    f"Incremental analysis {previous_commit[:8]}..{head_commit[:8]}: "
+                    f"{len(files)} changed files, {len(changes['deleted'])} deleted, "
+                    f"{len(folders)} folders to update"
                 )
-                db.add(node)
         
-        # Generate root summary
-        task.status_message = "Generating repository summary..."
-        task.progress = 90
-        db.commit()
+        # Index the tree once; unchanged nodes keep their stored summaries
+        tree_index = TreeIndex.from_file_tree(file_tree)
+        tree_index.load_summaries(db, repo_id)
         
-        root_summary_path = get_summary_file_path(repo_path, "", "folder", repo_name)
-        existing_root_summary = None
-        if root_summary_path.exists():
-            try:
-                existing_root_summary = root_summary_path.read_text(encoding="utf-8")
-            except Exception:
-                pass
+        # Fit the work to the budget, picking up what earlier, smaller runs left out
+        budget = AnalysisBudget(
+            depth=depth, max_files=max_files, max_tokens=max_tokens, subtree=subtree or ""
+        )
+        if budget.max_tokens is not None:
+            _fill_unknown_sizes(repo_path, budget, all_files)
+        files, folders, outline_folders, stale = _apply_budget(
+            budget, tree_index, all_files, all_folders, files, folders
+        )
+        if stale:
+            logger.info(f"Dropping {len(stale)} stale summaries outside the analysis budget")
+            _delete_nodes(db, repo_id, summary_root, repo_name, stale)
+            for path, _ in stale:
+                tree_index.drop_summary(path)
+        unsummarized = sum(1 for item in all_files if tree_index.get_summary(item["path"]) is None)
+        progress.set_metric("files_unsummarized", unsummarized - len(files))
         
-        if existing_root_summary:
-            root_summary = existing_root_summary
+        if previous_commit == head_commit and not files and not folders:
+            task.status_message = "Repository is up to date"
         else:
-            # Get root folder structure
-            root_structure = get_folder_structure(repo_path, "")
-            
-            # Get ALL summaries (files and folders)
-            all_nodes = db.query(Node).filter(
-                Node.repo_id == repo_id,
-                Node.path != ""  # Exclude root itself
-            ).all()
-            
-            # Organize summaries by type
-            folder_summaries = []
-            file_summaries = []
-            
-            for n in all_nodes:
-                summary_text = n.summary
-                if not summary_text:
-                    # Try reading from file
-                    file_summary = read_summary(repo_path, n.path, n.type, repo_name)
-                    if file_summary:
-                        summary_text = file_summary
-                
-                if summary_text:
-                    if n.type == "folder":
-                        folder_summaries.append(f"## Folder: {n.path}\n{summary_text}")
-                    else:
-                        file_summaries.append(f"### File: {n.path}\n{summary_text}")
-            
-            # Build comprehensive root context
-            context_parts = []
-            
-            if root_structure:
-                context_parts.append(f"Repository Structure:\n{root_structure}")
-            
-            if folder_summaries:
-                context_parts.append("## Folder Summaries:\n" + "\n\n".join(folder_summaries))
+            if lazy:
+                # Make the repository browsable before the background pass
+                _write_skeleton(db, repo_id, repo_name, file_tree)
+                publish_checkout(checkout)
+                repo_path = checkout.path
+                task.status_message = "Repository tree ready, summarizing in the background..."
+                db.commit()
             
-            if file_summaries:
-                context_parts.append("## File Summaries:\n" + "\n\n".join(file_summaries))
+            # Resume an interrupted run of this task: nodes it wrote are in the
+            # database (and tree index) already, so only the rest is redone
+            checkpoint, resumed = load_checkpoint(db, task_id, previous_commit, head_commit)
+            done_folders = set()
+            if resumed:
+                files, done_folders = plan_resume(checkpoint, files, head_commit)
+            node_writer.checkpoint = checkpoint
             
-            root_context = "\n\n".join(context_parts)
+            # Process files (leaves first) through a bounded worker pool
+            llm_service = get_llm_service()
             
-            # Handle case where no summaries exist
-            if not root_context.strip():
-                root_context = "This repository structure and its contents."
+            set_phase(checkpoint, PHASE_FILES, [item["path"] for item in files])
+            task.status_message = f"Processing {len(files)} files..."
+            db.commit()
             
-            import asyncio
-            try:
-                loop = asyncio.get_event_loop()
-            except RuntimeError:
-                loop = asyncio.new_event_loop()
-                asyncio.set_event_loop(loop)
+            if batch and files:
+                # Cheaper and higher-limit than one request per file; the
+                # regular pass below picks the results up from the summary store
+                _run_async(
+                    _summarize_files_in_batch(
+                        db, node_writer, progress, repo_path, summary_root, repo_name,
+                        files, llm_service, refresh, checkpoint
+                    )
+                )
+                task.status_message = f"Processing {len(files)} files..."
+                db.commit()
             
-            root_summary = loop.run_until_complete(
-                llm_service.generate_summary(
-                    root_context,
-                    context=None,
-                    item_type="folder"
+            processed = _run_async(
+                _summarize_files(
+                    db, node_writer, progress, tree_index, repo_path, summary_root, repo_name,
+                    files, llm_service, refresh
                 )
             )
+            logger.info(f"Summarized {processed}/{len(files)} files")
             
-            # Save root summary to file with repo name
-            root_summary_path.parent.mkdir(parents=True, exist_ok=True)
-            root_summary_path.write_text(root_summary, encoding="utf-8")
-        
-        # Check if root node exists
-        existing_root = db.query(Node).filter(
-            Node.repo_id == repo_id,
-            Node.path == "",
-            Node.parent_id.is_(None)
-        ).first()
-        
-        if existing_root:
-            existing_root.summary = root_summary
-            existing_root.name = repo_name or os.path.basename(repo_url.rstrip("/")) or "root"
-        else:
-            # Create root node
-            root_node = Node(
-                id=str(uuid.uuid4()),
-                repo_id=repo_id,
-                path="",
-                name=repo_name or os.path.basename(repo_url.rstrip("/")) or "root",
-                type="folder",
-                summary=root_summary,
-                parent_id=None,
+            # Process folders bottom-up; each folder starts once its children are done
+            set_phase(
+                checkpoint, PHASE_FOLDERS,
+                [path for path in folders + [""] if path not in done_folders],
+            )
+            task.status_message = f"Processing {len(folders)} folders..."
+            db.commit()
+            
+            _run_async(
+                _summarize_folders(
+                    node_writer, progress, tree_index, repo_url, summary_root, repo_name,
+                    folders, llm_service, refresh, done_folders, outline_folders
+                )
             )
-            db.add(root_node)
+            task.status_message = "Analysis completed!"
         
         # Update repository and task status
+        publish_checkout(checkout)
+        clear_checkpoint(db, task_id)
         repo.status = RepositoryStatus.COMPLETED
         task.status = TaskStatus.COMPLETED.value
+        repo.last_analyzed_commit = head_commit
         task.progress = 100
-        task.status_message = "Analysis completed!"
         task.result_id = repo_id
         
         # Record passphrase usage for successful crawl
@@ -430,6 +1102,6 @@ def start_analysis(task_id: str, repo_url: str, depth: int, db: Session, passphr
             logger.error(f"Cleanup failed: {str(cleanup_error)}")
             db.rollback()
     finally:
-        # No cleanup - repositories are cached permanently
-        pass
+        # Mirrors are cached permanently; unpublished worktrees are not
+        release_checkout(checkout)
 
@@ -0,0 +1,116 @@
+"""Checkpoints that let an interrupted analysis resume where it stopped."""
+import logging
+from sqlalchemy.orm import Session
+from backend.models.analysis_checkpoint import AnalysisCheckpoint
+
+logger = logging.getLogger(__name__)
+
+PHASE_FILES = "files"
+PHASE_FOLDERS = "folders"
+
+
+def load_checkpoint(
+    db: Session, task_id: str, base_commit: str | None, target_commit: str
+) -> tuple[AnalysisCheckpoint, bool]:
+    """
+    Get the checkpoint of a task, creating it on the first run.
+
+    A checkpoint left by a run with a different base commit describes
+    other work and is reset.
+
+    Args:
+        db: Database session
+        task_id: Task ID
+        base_commit: Commit the run diffs against (None for a full run)
+        target_commit: Commit being analyzed
+
+    Returns:
+        Tuple of (checkpoint, whether an earlier run is being resumed)
+    """
+    checkpoint = db.query(AnalysisCheckpoint).filter(AnalysisCheckpoint.task_id == task_id).first()
+    if checkpoint and checkpoint.base_commit == base_commit:
+        return checkpoint, True
+
+    if checkpoint:
+        db.delete(checkpoint)
+        db.flush()
+    checkpoint = AnalysisCheckpoint(
+        task_id=task_id,
+        base_commit=base_commit,
+        target_commit=target_commit,
+        phase=PHASE_FILES,
+        completed={},
+        pending=[],
+    )
+    db.add(checkpoint)
+    db.commit()
+    return checkpoint, False
+
+
+def plan_resume(
+    checkpoint: AnalysisCheckpoint,
+    files: list[dict],
+    target_commit: str,
+) -> tuple[list[dict], set[str]]:
+    """
+    Drop the work an interrupted run already finished.
+
+    Files are done if their node was written for the same blob. Folder
+    summaries are only reused if the target commit has not moved, since
+    any change below a folder invalidates it.
+
+    Args:
+        checkpoint: Checkpoint of the interrupted run
+        files: Files planned for this run
+        target_commit: Commit being analyzed now
+
+    Returns:
+        Tuple of (files still to summarize, folders already summarized)
+    """
+    completed = checkpoint.completed or {}
+    remaining = [
+        item for item in files
+        if item["path"] not in completed or completed[item["path"]] != (item.get("sha") or "")
+    ]
+
+    done_folders = set()
+    if checkpoint.target_commit == target_commit:
+        done_folders = {path for path, sha in completed.items() if sha is None}
+    else:
+        # Earlier folder summaries describe another commit
+        checkpoint.completed = {path: sha for path, sha in completed.items() if sha is not None}
+        checkpoint.target_commit = target_commit
+
+    logger.info(
+        f"Resuming task {checkpoint.task_id} in phase {checkpoint.phase}: "
+        f"{len(files) - len(remaining)} files and {len(done_folders)} folders already done"
+    )
+    return remaining, done_folders
+
+
+def record_completed(checkpoint: AnalysisCheckpoint, completed: dict[str, str]):
+    """Add written nodes to a checkpoint (committed with the nodes' flush)."""
+    if not completed:
+        return
+    # Assign new objects so the JSON columns are marked as changed
+    checkpoint.completed = {**(checkpoint.completed or {}), **completed}
+    checkpoint.pending = [path for path in checkpoint.pending or [] if path not in completed]
+
+
+def set_phase(checkpoint: AnalysisCheckpoint, phase: str, pending: list[str]):
+    """Start a phase with the paths it still has to summarize."""
+    checkpoint.phase = phase
+    checkpoint.pending = list(pending)
+
+
+def record_batch(db: Session, checkpoint: AnalysisCheckpoint, batch_id: str | None):
+    """Remember the batch the files phase waits for (None once its results are stored). Commits."""
+    checkpoint.batch_id = batch_id
+    db.commit()
+
+
+def clear_checkpoint(db: Session, task_id: str):
+    """Delete a finished task's checkpoint (committed with the task's completion)."""
+    db.query(AnalysisCheckpoint).filter(AnalysisCheckpoint.task_id == task_id).delete(
+        synchronize_session=False
+    )
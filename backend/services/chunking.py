@@ -0,0 +1,152 @@
+"""Map-reduce summarization of files too large for a single prompt."""
+import asyncio
+import re
+import logging
+from backend.services.llm_service import LLMService
+
+logger = logging.getLogger(__name__)
+
+# Unindented lines that start a top-level definition in common languages
+_DEFINITION = re.compile(
+    r"(?:export\s+)?(?:(?:pub(?:\([\w:]+\))?|public|private|protected|internal|static|"
+    r"abstract|final|async|default|unsafe|extern)\s+)*"
+    r"(?:def|class|function|fn|func|impl|struct|enum|trait|interface|type|module|mod|"
+    r"namespace|object|const|let|var|val)\b"
+)
+# Lines that belong to the definition that follows them
+_PREFIX = re.compile(r"@|#\[|///|/\*\*")
+
+
+def _is_boundary(line: str, previous: str) -> bool:
+    """Check whether a line starts a new top-level definition."""
+    if not line or line[0].isspace():
+        return False
+    if not (_DEFINITION.match(line) or _PREFIX.match(line)):
+        return False
+    # Decorators and doc comments stay attached to the definition below them
+    return not _PREFIX.match(previous)
+
+
+def _split_lines(text: str, max_chars: int) -> list[str]:
+    """Split text into pieces of at most `max_chars`, on line ends where possible."""
+    pieces, current = [], ""
+    for line in text.splitlines(keepends=True):
+        while len(line) > max_chars:
+            if current:
+                pieces.append(current)
+                current = ""
+            pieces.append(line[:max_chars])
+            line = line[max_chars:]
+        if len(current) + len(line) > max_chars:
+            pieces.append(current)
+            current = ""
+        current += line
+    if current:
+        pieces.append(current)
+    return pieces
+
+
+def split_into_chunks(content: str, max_chars: int) -> list[str]:
+    """
+    Split file content into chunks on top-level definition boundaries.
+
+    Consecutive definitions are packed into chunks of at most `max_chars`;
+    a single definition longer than that is split on line ends.
+
+    Args:
+        content: File content
+        max_chars: Maximum chunk length in characters
+
+    Returns:
+        List of chunks that concatenate back to `content`
+    """
+    segments, current, previous = [], [], ""
+    for line in content.splitlines(keepends=True):
+        if current and _is_boundary(line, previous):
+            segments.append("".join(current))
+            current = []
+        current.append(line)
+        if line.strip():
+            previous = line
+    if current:
+        segments.append("".join(current))
+
+    chunks, chunk = [], ""
+    for segment in segments:
+        if len(segment) > max_chars:
+            if chunk:
+                chunks.append(chunk)
+                chunk = ""
+            chunks.extend(_split_lines(segment, max_chars))
+        elif len(chunk) + len(segment) > max_chars:
+            chunks.append(chunk)
+            chunk = segment
+        else:
+            chunk += segment
+    if chunk:
+        chunks.append(chunk)
+    return chunks
+
+
+async def summarize_chunked(
+    llm_service: LLMService,
+    path: str,
+    content: str,
+    max_chars: int,
+    semaphore: asyncio.Semaphore,
+) -> str:
+    """
+    Summarize a large file by summarizing its chunks and merging the results.
+
+    Chunks are summarized concurrently, each LLM call holding a slot of
+    `semaphore`. Partial summaries are merged in groups that fit in
+    `max_chars`, repeating until one summary is left, so the number of
+    sequential LLM rounds grows only logarithmically with file size.
+
+    Args:
+        llm_service: LLM service
+        path: File path (for prompts and logging)
+        content: File content
+        max_chars: Maximum chunk (and merge input) length in characters
+        semaphore: Semaphore bounding concurrent LLM calls
+
+    Returns:
+        Summary of the whole file
+    """
+    chunks = split_into_chunks(content, max_chars)
+    logger.info(f"Summarizing {path} in {len(chunks)} chunks")
+
+    async def summarize(text: str, context: str, item_type: str) -> str:
+        async with semaphore:
+            return await llm_service.generate_summary(text, context=context, item_type=item_type)
+
+    summaries = await asyncio.gather(*(
+        summarize(chunk, f"{path}, part {i} of {len(chunks)}", "chunk")
+        for i, chunk in enumerate(chunks, start=1)
+    ))
+
+    while True:
+        groups = _group_summaries(summaries, max_chars)
+        merged = await asyncio.gather(*(
+            summarize(group, path, "merge") for group in groups
+        ))
+        if len(merged) == 1:
+            return merged[0]
+        summaries = merged
+
+
+def _group_summaries(summaries: list[str], max_chars: int) -> list[str]:
+    """Join consecutive partial summaries into merge inputs of at most `max_chars`."""
+    groups, group, count = [], "", 0
+    for summary in summaries:
+        entry = f"### Part {count + 1}\n{summary}\n\n"
+        # Always merge at least two summaries per group so every round shrinks
+        if group and count >= 2 and len(group) + len(entry) > max_chars:
+            groups.append(group.rstrip())
+            group, count = "", 0
+            entry = f"### Part 1\n{summary}\n\n"
+        group += entry
+        count += 1
+    if group:
+        groups.append(group.rstrip())
+    return groups
@@ -0,0 +1,193 @@
+"""Token-budgeted context assembly for folder and root summary prompts."""
+import re
+from dataclasses import dataclass
+
+# Rough average for code and English prose; good enough for budgeting
+CHARS_PER_TOKEN = 4
+
+# Summaries squeezed below this many tokens are dropped rather than truncated
+MIN_SUMMARY_TOKENS = 24
+
+TRUNCATION_MARKER = " ...[truncated]"
+
+# Share of the budget the structure listing may take before it is truncated
+STRUCTURE_SHARE = 0.25
+
+# Files that usually explain a folder best; matched against the file name
+_IMPORTANT_NAMES = re.compile(
+    r"^(readme|main|app|index|__init__|setup|config|settings|server|cli|manage|"
+    r"package\.json|pyproject\.toml|cargo\.toml|go\.mod|dockerfile|makefile)",
+    re.IGNORECASE,
+)
+_LOW_VALUE_PATHS = re.compile(
+    r"(^|/)(tests?|specs?|__tests__|fixtures|examples?|docs?)(/|$)|"
+    r"(^|/)(test_[^/]*|[^/]*_test\.[^/]*|[^/]*\.(test|spec)\.[^/]*)$",
+    re.IGNORECASE,
+)
+
+
+def estimate_tokens(text: str) -> int:
+    """Estimate the number of tokens in a text."""
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """
+    Shorten text to roughly `max_tokens`, cutting at a line or sentence end.
+
+    Args:
+        text: Text to shorten
+        max_tokens: Token budget for the result
+
+    Returns:
+        The text unchanged if it fits, otherwise a truncated copy with a marker
+    """
+    if estimate_tokens(text) <= max_tokens:
+        return text
+
+    limit = max(0, max_tokens * CHARS_PER_TOKEN - len(TRUNCATION_MARKER))
+    cut = text[:limit]
+    boundary = max(cut.rfind("\n"), cut.rfind(". "))
+    if boundary > limit // 2:
+        cut = cut[:boundary + 1]
+    return cut.rstrip() + TRUNCATION_MARKER
+
+
+def importance(path: str) -> int:
+    """
+    Rank a file for inclusion in a parent's context (higher is more important).
+
+    Entry points, READMEs and manifests come first; tests, fixtures, docs and
+    examples come last.
+    """
+    name = path.rsplit("/", 1)[-1]
+    if _IMPORTANT_NAMES.match(name):
+        return 2
+    if _LOW_VALUE_PATHS.search(path):
+        return 0
+    return 1
+
+
+@dataclass
+class BuiltContext:
+    """A prompt context and how much was cut to fit its budget."""
+    text: str
+    tokens: int
+    dropped_tokens: int
+
+
+def _fit_summaries(entries: list[tuple[str, str]], budget: int) -> tuple[list[str], int, int]:
+    """
+    Fit (label, summary) entries into a budget, in order of priority.
+
+    Entries are admitted in order while each can still get at least
+    MIN_SUMMARY_TOKENS; the rest are dropped. The budget left after labels
+    is then shared out evenly ("water-filling"): entries that fit keep their
+    full text and leave the rest of their share to the others, larger ones
+    are truncated to their share.
+
+    Returns:
+        Tuple of (rendered entries, tokens used, tokens dropped)
+    """
+    kept, dropped, reserved = [], 0, 0
+    for label, summary in entries:
+        tokens = estimate_tokens(summary)
+        cost = estimate_tokens(label) + min(tokens, MIN_SUMMARY_TOKENS)
+        if reserved + cost > budget:
+            dropped += tokens
+            continue
+        reserved += cost
+        kept.append((label, summary, tokens))
+
+    # Smallest first, so short summaries stay whole and free budget for the rest
+    order = sorted(range(len(kept)), key=lambda i: kept[i][2])
+    allowed = [0] * len(kept)
+    remaining = budget - sum(estimate_tokens(label) for label, _, _ in kept)
+    for position, i in enumerate(order):
+        share = remaining // (len(order) - position)
+        allowed[i] = min(kept[i][2], share)
+        remaining -= allowed[i]
+
+    rendered, used = [], 0
+    for (label, summary, tokens), limit in zip(kept, allowed):
+        text = truncate_to_tokens(summary, limit)
+        entry = label.replace("{summary}", text)
+        rendered.append(entry)
+        used += estimate_tokens(entry)
+        dropped += max(0, tokens - estimate_tokens(text))
+    return rendered, used, dropped
+
+
+def build_context(
+    structure: str,
+    structure_heading: str,
+    folder_summaries: list[tuple[str, str]],
+    file_summaries: list[tuple[str, str]],
+    budget: int,
+    folder_heading: str,
+    file_heading: str,
+    folder_label: str,
+    file_label: str,
+    separator: str,
+) -> BuiltContext:
+    """
+    Assemble a summary prompt context within a token budget.
+
+    The structure listing comes first (truncated if it would take more than
+    a quarter of the budget), then folder summaries, then file summaries with
+    whatever budget is left, most important files first.
+
+    Args:
+        structure: Tree-like listing of the folder's direct children
+        structure_heading: Heading placed before the structure listing
+        folder_summaries: (path, summary) of folders, most relevant first
+        file_summaries: (path, summary) of files, most relevant first
+        budget: Token budget for the whole context
+        folder_heading: Heading placed before the folder summaries
+        file_heading: Heading placed before the file summaries
+        folder_label: Template with {path} and {summary} for a folder entry
+        file_label: Template with {path} and {summary} for a file entry
+        separator: Separator between entries
+
+    Returns:
+        BuiltContext with the text, its estimated tokens and tokens dropped
+    """
+    parts = []
+    dropped = 0
+    remaining = budget
+
+    if structure:
+        full_tokens = estimate_tokens(structure)
+        structure = truncate_to_tokens(structure, int(budget * STRUCTURE_SHARE))
+        structure_tokens = estimate_tokens(structure)
+        dropped += max(0, full_tokens - structure_tokens)
+        remaining -= structure_tokens
+        parts.append(f"{structure_heading}{structure}")
+
+    folder_entries = [
+        (folder_label.replace("{path}", path), summary)
+        for path, summary in folder_summaries
+    ]
+    rendered, used, cut = _fit_summaries(folder_entries, max(0, remaining))
+    remaining -= used
+    dropped += cut
+    if rendered:
+        parts.append(folder_heading + separator.join(rendered))
+
+    # More important files get the budget first; each tier shares what is left
+    file_parts = []
+    for tier in sorted({importance(path) for path, _ in file_summaries}, reverse=True):
+        file_entries = [
+            (file_label.replace("{path}", path), summary)
+            for path, summary in file_summaries
+            if importance(path) == tier
+        ]
+        rendered, used, cut = _fit_summaries(file_entries, max(0, remaining))
+        remaining -= used
+        dropped += cut
+        file_parts.extend(rendered)
+    if file_parts:
+        parts.append(file_heading + separator.join(file_parts))
+
+    text = "\n\n".join(parts)
+    return BuiltContext(text=text, tokens=estimate_tokens(text), dropped_tokens=dropped)
@@ -0,0 +1,187 @@
+"""Pre-LLM classification of files that are not worth summarizing."""
+import fnmatch
+import os
+import logging
+from backend.services.git_service import BlobReader
+
+logger = logging.getLogger(__name__)
+
+# Per-repository ignore file (gitignore-style patterns, no negation)
+IGNORE_FILE = ".r2ceignore"
+
+# Bytes read to decide whether a file is binary
+SNIFF_SIZE = 8192
+
+# Skip categories
+BINARY = "binary"
+ASSET = "asset"
+LOCKFILE = "lockfile"
+VENDORED = "vendored"
+GENERATED = "generated"
+MINIFIED = "minified"
+FIXTURE = "fixture"
+IGNORED = "ignored"
+UNREADABLE = "unreadable"
+
+_DESCRIPTIONS = {
+    BINARY: "binary file",
+    ASSET: "media or font asset",
+    LOCKFILE: "dependency lockfile",
+    VENDORED: "vendored third-party file",
+    GENERATED: "generated file",
+    MINIFIED: "minified file",
+    FIXTURE: "test fixture data file",
+    IGNORED: f"file excluded by {IGNORE_FILE}",
+    UNREADABLE: "file that is empty, unreadable or too large",
+}
+
+_LOCKFILES = {
+    "package-lock.json", "npm-shrinkwrap.json", "yarn.lock", "pnpm-lock.yaml", "bun.lockb",
+    "poetry.lock", "pipfile.lock", "uv.lock", "pdm.lock", "cargo.lock", "gemfile.lock",
+    "composer.lock", "go.sum", "mix.lock", "pubspec.lock", "podfile.lock", "flake.lock",
+    "packages.lock.json", "gradle.lockfile",
+}
+_VENDOR_DIRS = {
+    "node_modules", "vendor", "vendors", "third_party", "third-party", "thirdparty",
+    "bower_components", "jspm_packages", "site-packages", ".yarn",
+}
+_FIXTURE_DIRS = {"fixtures", "__fixtures__", "testdata", "__snapshots__"}
+_ASSET_EXTENSIONS = {
+    ".png", ".jpg", ".jpeg", ".gif", ".bmp", ".ico", ".icns", ".webp", ".tif", ".tiff",
+    ".svg", ".psd", ".mp3", ".mp4", ".wav", ".ogg", ".mov", ".avi", ".webm",
+    ".woff", ".woff2", ".ttf", ".otf", ".eot",
+}
+_BINARY_EXTENSIONS = {
+    ".pdf", ".zip", ".gz", ".tgz", ".bz2", ".xz", ".7z", ".rar", ".jar", ".war",
+    ".exe", ".dll", ".so", ".dylib", ".a", ".o", ".class", ".pyc", ".pyo", ".wasm",
+    ".bin", ".dat", ".db", ".sqlite", ".sqlite3", ".pkl", ".npy", ".npz", ".parquet",
+}
+_DATA_EXTENSIONS = {".json", ".xml", ".yaml", ".yml", ".csv", ".tsv", ".txt", ".html", ".snap"}
+_GENERATED_SUFFIXES = (
+    "_pb2.py", "_pb2_grpc.py", ".pb.go", ".pb.cc", ".pb.h", ".g.dart", ".freezed.dart",
+    ".designer.cs", ".generated.ts", ".generated.js", ".js.map", ".css.map", ".d.ts.map",
+)
+_MINIFIED_SUFFIXES = (".min.js", ".min.css", ".min.mjs", "-min.js", ".bundle.js")
+_GENERATED_MARKERS = (
+    "@generated", "do not edit", "code generated by", "auto-generated", "autogenerated",
+    "automatically generated", "generated by the protocol buffer compiler",
+)
+
+# Average line length above which text is treated as minified or data dump
+MINIFIED_LINE_LENGTH = 300
+
+
+def describe_skip(path: str, category: str) -> str:
+    """Build the templated summary stored for a skipped file."""
+    return f"`{path}` is a {_DESCRIPTIONS[category]} and was not summarized."
+
+
+def is_binary(data: bytes) -> bool:
+    """Check the first block of a file's contents for NUL bytes."""
+    return b"\0" in data[:SNIFF_SIZE]
+
+
+class FileClassifier:
+    """
+    Decides which files to skip before any content is sent to the LLM.
+
+    Path rules (lockfiles, vendored directories, assets, generated file
+    names and the repository's ignore file) are checked without reading
+    the file; content rules (minified or generated code) need its text.
+    """
+
+    def __init__(self, ignore_patterns: list[str] | None = None):
+        self.ignore_patterns = ignore_patterns or []
+
+    @classmethod
+    def for_repo(cls, blob_reader: BlobReader) -> "FileClassifier":
+        """
+        Create a classifier with the patterns from the repository's ignore file.
+
+        Args:
+            blob_reader: Reader for the repository's files
+
+        Returns:
+            FileClassifier for the repository
+        """
+        ignore_file = blob_reader.read(IGNORE_FILE)
+        patterns = []
+        if ignore_file:
+            for line in ignore_file.decode("utf-8", errors="ignore").splitlines():
+                line = line.strip()
+                if line and not line.startswith(("#", "!")):
+                    patterns.append(line)
+            logger.info(f"Loaded {len(patterns)} patterns from {IGNORE_FILE}")
+        return cls(patterns)
+
+    def _is_ignored(self, path: str) -> bool:
+        """Match a path against the ignore patterns."""
+        parts = path.split("/")
+        for pattern in self.ignore_patterns:
+            directory_only = pattern.endswith("/")
+            anchored = "/" in pattern.rstrip("/")
+            pattern = pattern.strip("/")
+            # Folders containing the file, plus the file itself unless the pattern names folders
+            prefixes = ["/".join(parts[:i]) for i in range(1, len(parts))]
+            names = parts[:-1]
+            if not directory_only:
+                prefixes.append(path)
+                names = parts
+            candidates = prefixes if anchored else names
+            if any(fnmatch.fnmatch(candidate, pattern) for candidate in candidates):
+                return True
+        return False
+
+    def classify_path(self, path: str) -> str | None:
+        """
+        Classify a file by its path alone.
+
+        Args:
+            path: File path relative to the repository root
+
+        Returns:
+            Skip category, or None if the path gives no reason to skip
+        """
+        if path == IGNORE_FILE or (self.ignore_patterns and self._is_ignored(path)):
+            return IGNORED
+
+        parts = path.split("/")
+        name = parts[-1].lower()
+        extension = os.path.splitext(name)[1]
+        directories = {part.lower() for part in parts[:-1]}
+
+        if name in _LOCKFILES:
+            return LOCKFILE
+        if directories & _VENDOR_DIRS:
+            return VENDORED
+        if extension in _ASSET_EXTENSIONS:
+            return ASSET
+        if extension in _BINARY_EXTENSIONS:
+            return BINARY
+        if name.endswith(_MINIFIED_SUFFIXES):
+            return MINIFIED
+        if name.endswith(_GENERATED_SUFFIXES):
+            return GENERATED
+        if directories & _FIXTURE_DIRS and extension in _DATA_EXTENSIONS:
+            return FIXTURE
+        return None
+
+    def classify_content(self, content: str) -> str | None:
+        """
+        Classify a file by its text.
+
+        Args:
+            content: Decoded file content
+
+        Returns:
+            Skip category, or None if the content should be summarized
+        """
+        header = content[:2048].lower()
+        if any(marker in header for marker in _GENERATED_MARKERS):
+            return GENERATED
+
+        if len(content) > 2000:
+            lines = content.count("\n") + 1
+            if len(content) / lines > MINIFIED_LINE_LENGTH:
+                return MINIFIED
+        return None
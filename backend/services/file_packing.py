@@ -0,0 +1,114 @@
+"""Summarization of several small files in one LLM request."""
+import asyncio
+import re
+import logging
+from backend.services.context_builder import estimate_tokens
+from backend.services.folder_scheduler import parent_path
+from backend.services.llm_service import LLMService
+
+logger = logging.getLogger(__name__)
+
+# Header the packed prompt asks the model to put before each file's summary
+_SUMMARY_HEADER = re.compile(r"^=== SUMMARY: (.+?) ===[ \t]*$", re.MULTILINE)
+
+
+def pack_files(contents: dict[str, str], max_tokens: int, max_files: int) -> list[list[str]]:
+    """
+    Group small files from the same folder into packs.
+
+    Files are taken in path order and added to their folder's current pack
+    until it would exceed `max_tokens` or hold `max_files` files. Packs of
+    a single file are left out; those files are cheaper to summarize alone.
+
+    Args:
+        contents: File contents by path
+        max_tokens: Token budget for the contents of one pack
+        max_files: Maximum number of files per pack
+
+    Returns:
+        Lists of paths, one per pack
+    """
+    by_folder: dict[str, list[str]] = {}
+    for path in sorted(contents):
+        by_folder.setdefault(parent_path(path), []).append(path)
+
+    packs = []
+    for paths in by_folder.values():
+        pack, tokens = [], 0
+        for path in paths:
+            cost = estimate_tokens(contents[path])
+            if pack and (tokens + cost > max_tokens or len(pack) >= max_files):
+                packs.append(pack)
+                pack, tokens = [], 0
+            pack.append(path)
+            tokens += cost
+        packs.append(pack)
+    return [pack for pack in packs if len(pack) > 1]
+
+
+def format_pack(contents: dict[str, str]) -> str:
+    """Join file contents into the body of a packed prompt."""
+    return "\n\n".join(
+        f"<<< FILE: {path} >>>\n{content.rstrip()}\n<<< END FILE: {path} >>>"
+        for path, content in contents.items()
+    )
+
+
+def parse_pack(text: str, paths: list[str]) -> dict[str, str] | None:
+    """
+    Split a packed response into per-file summaries.
+
+    Files the response leaves out are simply absent. A response naming a
+    file that was not in the pack, naming one twice, or with an empty
+    summary cannot be trusted to have split correctly and is rejected.
+
+    Args:
+        text: Response to a packed prompt
+        paths: Paths of the files in the pack
+
+    Returns:
+        Summaries by path, or None if the response does not match the pack
+    """
+    headers = list(_SUMMARY_HEADER.finditer(text))
+    if not headers:
+        return None
+    expected = set(paths)
+    summaries = {}
+    for header, following in zip(headers, headers[1:] + [None]):
+        path = header.group(1).strip().strip("`")
+        summary = text[header.end():following.start() if following else len(text)].strip()
+        if path not in expected or path in summaries or not summary:
+            return None
+        summaries[path] = summary
+    return summaries
+
+
+async def summarize_packed(
+    llm_service: LLMService,
+    contents: dict[str, str],
+    semaphore: asyncio.Semaphore,
+) -> dict[str, str]:
+    """
+    Summarize a pack of small files with one LLM call.
+
+    Args:
+        llm_service: LLM service
+        contents: Contents of the files in the pack by path
+        semaphore: Semaphore bounding concurrent LLM calls
+
+    Returns:
+        Summaries by path; empty if the response could not be split, so
+        the caller summarizes the files one by one
+    """
+    paths = list(contents)
+    async with semaphore:
+        response = await llm_service.generate_summary(
+            format_pack(contents), context=None, item_type="pack"
+        )
+    summaries = parse_pack(response, paths)
+    if summaries is None:
+        logger.warning(f"Could not split packed summary of {len(paths)} files in {parent_path(paths[0]) or 'root'}")
+        return {}
+    if len(summaries) < len(paths):
+        logger.info(f"Packed summary covered {len(summaries)} of {len(paths)} files")
+    return summaries
@@ -0,0 +1,93 @@
+"""Dependency-ordered scheduler for bottom-up folder summarization."""
+import asyncio
+from typing import Awaitable, Callable, Iterable, TypeVar
+
+T = TypeVar("T")
+
+ROOT_PATH = ""
+
+
+def parent_path(path: str) -> str:
+    """Get the parent folder path ("" for top-level items)."""
+    return path.rsplit("/", 1)[0] if "/" in path else ROOT_PATH
+
+
+def build_folder_dag(folder_paths: Iterable[str]) -> dict[str, list[str]]:
+    """
+    Map every folder to the child folders it depends on.
+
+    The root ("") is always part of the graph. If a folder's direct parent is
+    not in the set, it hangs off its nearest ancestor that is.
+
+    Args:
+        folder_paths: Folder paths relative to the repository root
+
+    Returns:
+        Dictionary of folder path -> list of child folder paths
+    """
+    paths = set(folder_paths) | {ROOT_PATH}
+    children: dict[str, list[str]] = {path: [] for path in paths}
+
+    for path in paths:
+        if path == ROOT_PATH:
+            continue
+        parent = parent_path(path)
+        while parent not in paths:
+            parent = parent_path(parent)
+        children[parent].append(path)
+
+    return children
+
+
+async def schedule_folders(
+    folder_paths: Iterable[str],
+    summarize: Callable[[str], Awaitable[T]],
+    concurrency: int,
+) -> dict[str, T]:
+    """
+    Summarize folders as soon as all of their child folders are finished.
+
+    Independent subtrees run concurrently (at most `concurrency` calls at a
+    time), so the critical path is the tree depth rather than the number of
+    folders. The root ("") is always summarized last.
+
+    Args:
+        folder_paths: Folder paths relative to the repository root
+        summarize: Coroutine function called once per folder path
+        concurrency: Maximum number of concurrent `summarize` calls
+
+    Returns:
+        Dictionary of folder path -> result of `summarize`
+
+    Raises:
+        Exception: The first error raised by `summarize`; pending folders are cancelled
+    """
+    children = build_folder_dag(folder_paths)
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+    tasks: dict[str, asyncio.Task] = {}
+
+    async def run(path: str, dependencies: list[asyncio.Task]) -> T:
+        if dependencies:
+            await asyncio.wait(dependencies)
+        async with semaphore:
+            return await summarize(path)
+
+    def create(path: str) -> asyncio.Task:
+        if path not in tasks:
+            dependencies = [create(child) for child in children[path]]
+            tasks[path] = asyncio.create_task(run(path, dependencies))
+        return tasks[path]
+
+    # Deepest folders first, so recursion depth stays shallow
+    for path in sorted(children, key=lambda p: p.count("/") if p else -1, reverse=True):
+        create(path)
+
+    try:
+        results = await asyncio.gather(*tasks.values())
+    except BaseException:
+        for pending in tasks.values():
+            pending.cancel()
+        await asyncio.gather(*tasks.values(), return_exceptions=True)
+        raise
+
+    return dict(zip(tasks.keys(), results))
@@ -1,18 +1,28 @@
 """Git service for cloning and traversing repositories."""
 import os
+import logging
+import subprocess
 import tempfile
 import shutil
+import threading
 from pathlib import Path
 from urllib.parse import urlparse
-from git import Repo
-from git.exc import GitCommandError
+from git import Git, Repo
+from git.exc import GitCommandError, InvalidGitRepositoryError, NoSuchPathError
+from gitdb.exc import BadName, BadObject
+from gitdb.util import hex_to_bin
 from backend.config import settings
 
+logger = logging.getLogger(__name__)
+
 
 def get_repo_cache_path(repo_url: str) -> Path:
     """
     Get the cache path for a repository.
     
+    Spellings of the same repository (see `normalize_repo_url`) share one
+    path.
+    
     Args:
         repo_url: URL of the repository
         
@@ -20,7 +30,7 @@ def get_repo_cache_path(repo_url: str) -> Path:
         Path to the cached repository directory
     """
     # Parse URL to get repo name
-    parsed = urlparse(repo_url)
+    parsed = urlparse(normalize_repo_url(repo_url))
     # Extract owner/repo from path (e.g., github.com/user/repo -> user-repo)
     path_parts = [p for p in parsed.path.strip('/').split('/') if p]
     if len(path_parts) >= 2:
@@ -36,44 +46,59 @@ def get_repo_cache_path(repo_url: str) -> Path:
     return cache_path
 
 
-def clone_repository(repo_url: str) -> str:
+def normalize_repo_url(repo_url: str) -> str:
     """
-    Clone a Git repository to permanent cache directory.
-    Uses existing cache if repository already exists.
+    Reduce a repository URL to a canonical form for comparing requests.
+    
+    The scheme and host are lowercased, credentials, query, fragment, a
+    trailing slash and a `.git` suffix are dropped. GitHub paths are
+    case-insensitive, so they are lowercased too.
     
     Args:
-        repo_url: URL of the repository to clone
+        repo_url: URL of the repository
         
     Returns:
-        Path to the cloned repository
-        
-    Raises:
-        GitCommandError: If cloning fails
+        Normalized URL
     """
-    cache_path = get_repo_cache_path(repo_url)
+    parsed = urlparse(repo_url.strip())
+    if not parsed.netloc:
+        # Local path
+        return repo_url.strip().rstrip("/")
+    host = parsed.hostname or ""
+    if parsed.port:
+        host = f"{host}:{parsed.port}"
+    path = parsed.path.rstrip("/")
+    if path.endswith(".git"):
+        path = path[:-4]
+    if host in ("github.com", "www.github.com"):
+        host = "github.com"
+        path = path.lower()
+    return f"{parsed.scheme.lower()}://{host}{path}"
+
+
+def resolve_remote_commit(repo_url: str, ref: str = "HEAD") -> str | None:
+    """
+    Look up the commit a remote ref points to without cloning.
     
-    # Check if repository already exists in cache
-    if cache_path.exists() and (cache_path / '.git').exists():
-        # Repository already cached, update it
-        try:
-            repo = Repo(cache_path)
-            repo.remotes.origin.fetch()
-            repo.remotes.origin.pull()
-            return str(cache_path)
-        except Exception as e:
-            # If update fails, re-clone
-            shutil.rmtree(cache_path, ignore_errors=True)
-    
-    # Ensure cache directory exists
-    cache_path.parent.mkdir(parents=True, exist_ok=True)
-    
-    # Clone repository
+    Args:
+        repo_url: URL of the repository
+        ref: Ref to resolve
+        
+    Returns:
+        Commit SHA, or None if the remote could not be queried
+    """
     try:
-        repo = Repo.clone_from(repo_url, str(cache_path))
-        return str(cache_path)
-    except GitCommandError as e:
-        shutil.rmtree(cache_path, ignore_errors=True)
-        raise
+        # Never prompt for credentials: unknown private repos just aren't resolved
+        output = Git().ls_remote(
+            repo_url, ref, kill_after_timeout=15, env={"GIT_TERMINAL_PROMPT": "0"}
+        )
+    except GitCommandError:
+        return None
+    for line in output.splitlines():
+        sha, _, name = line.partition("\t")
+        if name == ref or name.endswith(f"/{ref}"):
+            return sha
+    return None
 
 
 def get_folder_structure(repo_path: str, folder_path: str) -> str:
@@ -118,6 +143,46 @@ def get_folder_structure(repo_path: str, folder_path: str) -> str:
     return "\n".join(structure_lines) if structure_lines else ""
 
 
+def _sparse_cone(repo: Repo) -> list[str] | None:
+    """Folders of a cone-mode sparse checkout, or None if everything is checked out."""
+    # Read through git: sparse-checkout keeps the setting in the worktree config
+    try:
+        if repo.git.config("--bool", "core.sparseCheckout") != "true":
+            return None
+    except GitCommandError:
+        return None
+    return [line.strip("/") for line in repo.git.sparse_checkout("list").splitlines() if line.strip()]
+
+
+def _in_cone(path: str, is_folder: bool, cone: list[str]) -> bool:
+    """Whether a sparse checkout includes a path: everything in the cone
+    folders, plus the files directly inside their parents and the root."""
+    def on_cone_path(folder: str) -> bool:
+        return any(
+            folder == top or folder.startswith(top + "/") or top.startswith(folder + "/")
+            for top in cone
+        )
+    if is_folder:
+        return on_cone_path(path)
+    parent = path.rpartition("/")[0]
+    return parent == "" or on_cone_path(parent)
+
+
+def _is_partial_clone(repo: Repo) -> bool:
+    """Whether a repository fetches missing objects from its remote on demand."""
+    try:
+        return repo.git.config("--bool", "remote.origin.promisor") == "true"
+    except GitCommandError:
+        return False
+
+
+def _missing_blobs(repo: Repo) -> set[str]:
+    """Hex SHAs of the objects in the HEAD tree that are not fetched yet."""
+    # --missing=print lists them instead of fetching them one by one
+    output = repo.git.rev_list("--objects", "--missing=print", "--no-walk", "HEAD")
+    return {line[1:] for line in output.splitlines() if line.startswith("?")}
+
+
 def get_file_tree(repo_path: str) -> list[dict]:
     """
     Get file tree structure from repository.
@@ -127,17 +192,26 @@ def get_file_tree(repo_path: str) -> list[dict]:
         
     Returns:
         List of file/folder dictionaries with path and type
+        (files also carry size and blob sha); limited to the checked
+        out paths of a sparse clone. In a partial clone the size of a
+        file whose blob is not fetched yet is None: reading it would
+        fetch it.
     """
     repo = Repo(repo_path)
     tree = []
+    cone = _sparse_cone(repo)
+    missing = _missing_blobs(repo) if _is_partial_clone(repo) else set()
     
     # Get all files tracked by git
     for item in repo.tree().traverse():
+        if cone is not None and not _in_cone(item.path, item.type == "tree", cone):
+            continue
         if item.type == "blob":  # File
             tree.append({
                 "path": item.path,
                 "type": "file",
-                "size": item.size if hasattr(item, "size") else 0,
+                "size": None if item.hexsha in missing else item.size,
+                "sha": item.hexsha,
             })
         elif item.type == "tree":  # Folder
             tree.append({
@@ -148,6 +222,114 @@ def get_file_tree(repo_path: str) -> list[dict]:
     return tree
 
 
+def get_path_type(repo_path: str, path: str) -> str | None:
+    """
+    Type of a path in the HEAD commit, without reading the working directory.
+    
+    Args:
+        repo_path: Path to the cloned repository
+        path: Path relative to repo root (empty for the root)
+        
+    Returns:
+        "file" or "folder", or None if the path does not exist at HEAD or
+        is outside the checked out paths of a sparse clone
+    """
+    if not path:
+        return "folder"
+    repo = Repo(repo_path)
+    try:
+        item = repo.head.commit.tree / path
+    except KeyError:
+        return None
+    if item.type not in ("blob", "tree"):
+        return None
+    is_folder = item.type == "tree"
+    cone = _sparse_cone(repo)
+    if cone is not None and not _in_cone(path, is_folder, cone):
+        return None
+    return "folder" if is_folder else "file"
+
+
+def list_folder(repo_path: str, folder_path: str) -> list[dict]:
+    """
+    List a folder of the HEAD commit without reading the working directory.
+    
+    Worktrees of blobless clones have no files on disk, so browsing goes
+    through the git tree. Hidden entries are left out.
+    
+    Args:
+        repo_path: Path to the cloned repository
+        folder_path: Path to folder relative to repo root
+        
+    Returns:
+        Dictionaries with name, path and type ("file" or "folder"), limited
+        to the checked out paths of a sparse clone
+    """
+    repo = Repo(repo_path)
+    cone = _sparse_cone(repo)
+    folder = repo.head.commit.tree / folder_path if folder_path else repo.head.commit.tree
+    entries = []
+    for item in sorted(folder, key=lambda item: item.name):
+        if item.name.startswith(".") or item.type not in ("blob", "tree"):
+            continue
+        is_folder = item.type == "tree"
+        if cone is not None and not _in_cone(item.path, is_folder, cone):
+            continue
+        entries.append({"name": item.name, "path": item.path, "type": "folder" if is_folder else "file"})
+    return entries
+
+
+def get_head_commit(repo_path: str) -> str:
+    """
+    Get the commit SHA checked out in a repository.
+    
+    Args:
+        repo_path: Path to the cloned repository
+        
+    Returns:
+        Hex SHA of HEAD
+    """
+    return Repo(repo_path).head.commit.hexsha
+
+
+def get_changed_paths(repo_path: str, old_commit: str, new_commit: str) -> dict[str, list[str]] | None:
+    """
+    Diff two commits and classify the changed file paths.
+    
+    Renames are reported as a deletion of the old path and an addition of
+    the new one.
+    
+    Args:
+        repo_path: Path to the cloned repository
+        old_commit: Previously analyzed commit SHA
+        new_commit: Commit SHA to analyze now
+        
+    Returns:
+        Dictionary with "added", "modified" and "deleted" path lists, or None
+        if the old commit is not available (e.g. after a force push)
+    """
+    repo = Repo(repo_path)
+    try:
+        old = repo.commit(old_commit)
+        diffs = old.diff(repo.commit(new_commit))
+    except (ValueError, BadName, BadObject, GitCommandError):
+        return None
+    
+    changes = {"added": [], "modified": [], "deleted": []}
+    for diff in diffs:
+        if diff.change_type == "A":
+            changes["added"].append(diff.b_path)
+        elif diff.change_type == "D":
+            changes["deleted"].append(diff.a_path)
+        elif diff.change_type == "R":
+            changes["deleted"].append(diff.a_path)
+            changes["added"].append(diff.b_path)
+        else:  # "M" (modified) or "T" (type change)
+            changes["modified"].append(diff.b_path)
+    
+    return changes
+
+
 def read_file_content(file_path: str, max_size: int = None) -> str | None:
     """
     Read file content, respecting size limits.
@@ -175,6 +357,123 @@ def read_file_content(file_path: str, max_size: int = None) -> str | None:
         return None
 
 
+def get_blob_sha(repo_path: str, path: str) -> str | None:
+    """Hex SHA of a file's blob at HEAD, or None if it is not tracked."""
+    try:
+        return Repo(repo_path).git.rev_parse(f"HEAD:{path}")
+    except (InvalidGitRepositoryError, NoSuchPathError, GitCommandError):
+        return None
+
+
+class BlobReader:
+    """
+    Reads file contents from a repository's object database.
+    
+    Blobs are fetched by SHA through GitPython's persistent
+    `git cat-file --batch` process, so no checkout is needed and each read
+    is a single round trip. The process is shared, so reads are serialized
+    with a lock. Paths without a known blob SHA are resolved through the
+    HEAD tree; directories that are not git repositories fall back to
+    reading files from disk. In a partial clone, `prefetch` fetches the
+    blobs about to be read in one request.
+    """
+    
+    def __init__(self, repo_path: str):
+        self.repo_path = repo_path
+        self._lock = threading.Lock()
+        try:
+            self._repo = Repo(repo_path)
+        except (InvalidGitRepositoryError, NoSuchPathError):
+            self._repo = None
+    
+    def read(self, path: str, blob_sha: str | None = None, max_size: int = None) -> bytes | None:
+        """
+        Read the raw contents of a file.
+        
+        Args:
+            path: File path relative to the repository root
+            blob_sha: Hex SHA of the file's blob, if known
+            max_size: Maximum file size in bytes (defaults to config)
+            
+        Returns:
+            File bytes, or None if the file is missing or too large
+        """
+        if max_size is None:
+            max_size = settings.max_file_size
+        
+        if self._repo is None:
+            return self._read_from_disk(path, max_size)
+        
+        with self._lock:
+            try:
+                if blob_sha is None:
+                    blob_sha = (self._repo.head.commit.tree / path).hexsha
+                binsha = hex_to_bin(blob_sha)
+                if self._repo.odb.info(binsha).size > max_size:
+                    return None
+                return self._repo.odb.stream(binsha).read()
+            except (KeyError, ValueError, BadName, BadObject, GitCommandError):
+                return None
+    
+    def prefetch(self, blob_shas: list[str | None]) -> int:
+        """
+        Fetch the given blobs that a partial clone does not have yet.
+        
+        Otherwise each missing blob is fetched when it is read, one round
+        trip per file. Failures are logged; reads then fetch as before.
+        
+        Args:
+            blob_shas: Hex SHAs of the blobs about to be read
+            
+        Returns:
+            Number of blobs fetched
+        """
+        if self._repo is None or not _is_partial_clone(self._repo):
+            return 0
+        wanted = sorted(set(blob_shas) & _missing_blobs(self._repo))
+        if not wanted:
+            return 0
+        try:
+            subprocess.run(
+                [
+                    "git", "-c", "fetch.negotiationAlgorithm=noop", "fetch", "--no-tags",
+                    "--no-write-fetch-head", "--filter=blob:none", "--stdin", "origin",
+                ],
+                cwd=self.repo_path, input="\n".join(wanted), text=True,
+                capture_output=True, check=True,
+            )
+        except (OSError, subprocess.CalledProcessError) as e:
+            logger.warning(f"Could not prefetch {len(wanted)} blobs: {getattr(e, 'stderr', None) or str(e)}")
+            return 0
+        return len(wanted)
+    
+    def size(self, blob_sha: str) -> int | None:
+        """Size of a blob in bytes, or None if it cannot be found."""
+        if self._repo is None:
+            return None
+        with self._lock:
+            try:
+                return self._repo.odb.info(hex_to_bin(blob_sha)).size
+            except (KeyError, ValueError, BadName, BadObject, GitCommandError):
+                return None
+    
+    def _read_from_disk(self, path: str, max_size: int) -> bytes | None:
+        """Read a file from the working directory."""
+        file_path = os.path.join(self.repo_path, path)
+        try:
+            if os.stat(file_path).st_size > max_size:
+                return None
+            with open(file_path, "rb") as f:
+                return f.read()
+        except OSError:
+            return None
+    
+    def close(self):
+        """Stop the persistent git processes."""
+        if self._repo is not None:
+            self._repo.close()
+
+
 def cleanup_repository(repo_path: str):
     """
     Clean up cloned repository directory.
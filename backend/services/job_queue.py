@@ -0,0 +1,336 @@
+"""Persistent analysis job queue stored in the application database."""
+import uuid
+import logging
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import and_, exists, or_
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session, aliased
+from backend.config import settings
+from backend.models.analysis_job import AnalysisJob, JobStatus
+from backend.models.repository import Repository, RepositoryStatus
+from backend.models.task import Task, TaskStatus
+from backend.services.git_service import normalize_repo_url
+from backend.services.process_utils import process_alive
+
+logger = logging.getLogger(__name__)
+
+# Candidate jobs fetched per claim attempt; others may be claimed concurrently
+CLAIM_BATCH_SIZE = 5
+
+
+def utcnow() -> datetime:
+    """Current time as naive UTC, the format job timestamps are stored in."""
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def _find_in_flight(db: Session, repo_key: str, active_key: str) -> AnalysisJob | None:
+    """
+    Find an unfinished job a request for `active_key` can attach to.
+
+    A queued job of the same repository and analysis budget qualifies
+    whatever its target, since it analyzes the repository's HEAD when it
+    starts; a running job only if it targets the same commit.
+    """
+    scope = active_key.partition("#")[2]
+    candidates = db.query(AnalysisJob).filter(
+        AnalysisJob.active_key.isnot(None),
+        or_(
+            AnalysisJob.active_key == active_key,
+            and_(AnalysisJob.repo_key == repo_key, AnalysisJob.status == JobStatus.QUEUED.value),
+        ),
+    ).order_by(AnalysisJob.created_at)
+    return next(
+        (job for job in candidates if job.active_key.partition("#")[2] == scope), None
+    )
+
+
+def find_repository(db: Session, repo_url: str) -> Repository | None:
+    """
+    Get the repository a URL refers to, however it is spelled.
+
+    Repositories are stored under their normalized URL; rows created
+    before that are still found by the URL as given.
+    """
+    repo_key = normalize_repo_url(repo_url)
+    repos = db.query(Repository).filter(Repository.url.in_({repo_key, repo_url})).all()
+    # Prefer the normalized row if both exist
+    return next((repo for repo in repos if repo.url == repo_key), repos[0] if repos else None)
+
+
+def _attach(db: Session, job: AnalysisJob, repo_url: str) -> Task:
+    """Return the task of an in-flight job to a duplicate request."""
+    logger.info(f"Analysis of {repo_url} is already in flight as task {job.task_id}, attaching")
+    return db.query(Task).filter(Task.id == job.task_id).first()
+
+
+def enqueue_analysis(
+    db: Session,
+    repo_url: str,
+    depth: int,
+    passphrase: str = None,
+    target_commit: str | None = None,
+    max_files: int | None = None,
+    max_tokens: int | None = None,
+    subtree: str | None = None,
+    lazy: bool | None = None,
+    batch: bool | None = None,
+) -> Task:
+    """
+    Queue a repository analysis, or attach to an identical one in flight.
+
+    The repository and a pending task are created right away, so the task
+    can be polled through the status endpoint while the job waits; it is
+    stored under the normalized URL, so every spelling of a repository
+    shares its nodes. Requests are coalesced on that URL, target commit and
+    analysis budget: a duplicate gets the task of the unfinished job
+    instead of a new one.
+
+    Args:
+        db: Database session
+        repo_url: Repository URL
+        depth: Folder levels to summarize files in (None for all)
+        passphrase: Passphrase to record usage for after a successful run
+        target_commit: Commit the remote HEAD points to, if known
+        max_files: Most files to summarize in this run
+        max_tokens: Most estimated tokens of file contents to summarize
+        subtree: Folder to limit the analysis to
+        lazy: Publish the node tree before summarizing (None for the default)
+        batch: Summarize files through a batch API (None for the default)
+
+    Returns:
+        The pending (or already running) task
+    """
+    repo_key = normalize_repo_url(repo_url)
+    subtree = (subtree or "").strip("/") or None
+    scope = "/".join(str(value) if value is not None else "" for value in (depth, max_files, max_tokens))
+    active_key = f"{repo_key}@{target_commit or 'HEAD'}#{scope}/{subtree or ''}"
+    existing = _find_in_flight(db, repo_key, active_key)
+    if existing:
+        return _attach(db, existing, repo_url)
+
+    repo = find_repository(db, repo_url)
+    if not repo:
+        repo = Repository(id=str(uuid.uuid4()), url=repo_key, status=RepositoryStatus.PENDING)
+        db.add(repo)
+
+    task = Task(
+        id=str(uuid.uuid4()),
+        repo_id=repo.id,
+        status=TaskStatus.PENDING.value,
+        progress=0,
+        status_message="Queued for analysis...",
+    )
+    db.add(task)
+    db.flush()
+    db.add(AnalysisJob(
+        id=str(uuid.uuid4()),
+        task_id=task.id,
+        repo_url=repo_url,
+        repo_key=repo_key,
+        target_commit=target_commit,
+        active_key=active_key,
+        depth=depth,
+        max_files=max_files,
+        max_tokens=max_tokens,
+        subtree=subtree,
+        lazy=lazy,
+        batch=batch,
+        passphrase=passphrase,
+        status=JobStatus.QUEUED.value,
+        attempts=0,
+        available_at=utcnow(),
+    ))
+    try:
+        db.commit()
+    except IntegrityError:
+        # A concurrent request queued the same analysis first
+        db.rollback()
+        existing = _find_in_flight(db, repo_key, active_key)
+        if existing is None:
+            raise
+        return _attach(db, existing, repo_url)
+    logger.info(f"Queued analysis of {repo_url} as task {task.id}")
+    return task
+
+
+def _claimable(now: datetime):
+    """
+    Filter for jobs a worker may take: queued and due, or leased with an
+    expired lease. Jobs of a repository another job is analyzing wait, as
+    both would write to the same checkout and nodes.
+    """
+    other = aliased(AnalysisJob)
+    repository_busy = exists().where(
+        other.repo_key == AnalysisJob.repo_key,
+        other.id != AnalysisJob.id,
+        other.status == JobStatus.RUNNING.value,
+        other.locked_until >= now,
+    )
+    return and_(
+        or_(
+            and_(AnalysisJob.status == JobStatus.QUEUED.value, AnalysisJob.available_at <= now),
+            and_(
+                AnalysisJob.status == JobStatus.RUNNING.value,
+                AnalysisJob.locked_until < now,
+                AnalysisJob.attempts < settings.job_max_attempts,
+            ),
+        ),
+        ~repository_busy,
+    )
+
+
+def _fail_abandoned_jobs(db: Session, now: datetime):
+    """Fail leased jobs whose lease expired on their last allowed attempt."""
+    abandoned = db.query(AnalysisJob).filter(
+        AnalysisJob.status == JobStatus.RUNNING.value,
+        AnalysisJob.locked_until < now,
+        AnalysisJob.attempts >= settings.job_max_attempts,
+    ).all()
+    for job in abandoned:
+        logger.warning(f"Job {job.id} abandoned after {job.attempts} attempts")
+        _mark_failed(db, job, "Worker stopped responding")
+    if abandoned:
+        db.commit()
+
+
+def claim_job(db: Session, worker_id: str) -> AnalysisJob | None:
+    """
+    Lease the next available job to a worker.
+
+    Claims are a conditional UPDATE, so concurrent workers on any database
+    never get the same job: only the worker whose update matched a row
+    owns it.
+
+    Args:
+        db: Database session
+        worker_id: Identifier of the claiming worker
+
+    Returns:
+        The claimed job, or None if no job is available
+    """
+    now = utcnow()
+    _fail_abandoned_jobs(db, now)
+
+    candidates = db.query(AnalysisJob.id).filter(_claimable(now)).order_by(
+        AnalysisJob.available_at
+    ).limit(CLAIM_BATCH_SIZE).all()
+    for (job_id,) in candidates:
+        claimed = db.query(AnalysisJob).filter(
+            AnalysisJob.id == job_id, _claimable(now)
+        ).update({
+            AnalysisJob.status: JobStatus.RUNNING.value,
+            AnalysisJob.worker_id: worker_id,
+            AnalysisJob.locked_until: now + timedelta(seconds=settings.job_visibility_timeout),
+            AnalysisJob.attempts: AnalysisJob.attempts + 1,
+        }, synchronize_session=False)
+        db.commit()
+        if claimed:
+            job = db.query(AnalysisJob).filter(AnalysisJob.id == job_id).first()
+            logger.info(f"Worker {worker_id} claimed job {job_id} (attempt {job.attempts})")
+            return job
+    return None
+
+
+def extend_lease(db: Session, job_id: str, worker_id: str) -> bool:
+    """
+    Push back a running job's lease expiry (worker heartbeat).
+
+    Returns:
+        False if the job is no longer leased to this worker
+    """
+    extended = db.query(AnalysisJob).filter(
+        AnalysisJob.id == job_id,
+        AnalysisJob.worker_id == worker_id,
+        AnalysisJob.status == JobStatus.RUNNING.value,
+    ).update({
+        AnalysisJob.locked_until: utcnow() + timedelta(seconds=settings.job_visibility_timeout),
+    }, synchronize_session=False)
+    db.commit()
+    return bool(extended)
+
+
+def release_orphaned_jobs(db: Session, hostname: str) -> int:
+    """
+    Expire the leases of running jobs whose worker process on this host died.
+
+    Called when workers start after a crash or redeploy, so interrupted jobs
+    are claimed again right away instead of after their lease times out.
+    Worker IDs have the form `<hostname>-<pid>-<index>`.
+
+    Args:
+        db: Database session
+        hostname: Host name of this machine
+
+    Returns:
+        Number of jobs released
+    """
+    prefix = f"{hostname}-"
+    running = db.query(AnalysisJob).filter(
+        AnalysisJob.status == JobStatus.RUNNING.value,
+        AnalysisJob.worker_id.like(f"{prefix}%"),
+    ).all()
+    released = 0
+    for job in running:
+        pid = job.worker_id[len(prefix):].split("-")[0]
+        if pid.isdigit() and not process_alive(int(pid)):
+            job.locked_until = utcnow() - timedelta(seconds=1)
+            released += 1
+    if released:
+        db.commit()
+        logger.info(f"Released {released} jobs orphaned by stopped workers on {hostname}")
+    return released
+
+
+def complete_job(db: Session, job: AnalysisJob):
+    """Mark a job as completed."""
+    job.status = JobStatus.COMPLETED.value
+    job.locked_until = None
+    job.active_key = None
+    job.last_error = None
+    db.commit()
+
+
+def fail_job(db: Session, job: AnalysisJob, error: str | None) -> bool:
+    """
+    Record a failed attempt, re-queueing the job with exponential backoff.
+
+    Args:
+        db: Database session
+        job: The failed job
+        error: Error message
+
+    Returns:
+        True if the job will be retried
+    """
+    job.last_error = error
+    if job.attempts >= settings.job_max_attempts:
+        _mark_failed(db, job, error)
+        db.commit()
+        logger.error(f"Job {job.id} failed after {job.attempts} attempts: {error}")
+        return False
+
+    delay = settings.job_retry_backoff * 2 ** (job.attempts - 1)
+    job.status = JobStatus.QUEUED.value
+    job.available_at = utcnow() + timedelta(seconds=delay)
+    job.locked_until = None
+    job.worker_id = None
+    task = db.query(Task).filter(Task.id == job.task_id).first()
+    if task:
+        task.status = TaskStatus.PENDING.value
+        task.status_message = f"Attempt {job.attempts} failed, retrying in {int(delay)}s..."
+    db.commit()
+    logger.warning(f"Job {job.id} attempt {job.attempts} failed, retrying in {delay}s: {error}")
+    return True
+
+
+def _mark_failed(db: Session, job: AnalysisJob, error: str | None):
+    """Mark a job and its task as failed (without committing)."""
+    job.status = JobStatus.FAILED.value
+    job.locked_until = None
+    job.active_key = None
+    task = db.query(Task).filter(Task.id == job.task_id).first()
+    if task and task.status != TaskStatus.FAILED.value:
+        task.status = TaskStatus.FAILED.value
+        task.error_message = error
+        if task.repository and task.repository.status == RepositoryStatus.PROCESSING:
+            task.repository.status = RepositoryStatus.FAILED
@@ -0,0 +1,91 @@
+"""On-demand summaries for nodes a lazy analysis has not reached yet."""
+import re
+import asyncio
+import logging
+from sqlalchemy.orm import Session
+from backend.models.node import Node
+from backend.models.repository import Repository
+from backend.services.analyzer import summarize_node
+from backend.services.llm_scheduler import INTERACTIVE, scheduling
+
+logger = logging.getLogger(__name__)
+
+# Summarizations in progress in this process, by (repo_id, path)
+_pending: dict[tuple[str, str], asyncio.Future] = {}
+
+
+async def ensure_summary(db: Session, repo_id: str, path: str) -> str | None:
+    """
+    Get a node's summary, summarizing it now if it has none yet.
+
+    The LLM call is made at interactive priority, ahead of background
+    summarization. Concurrent requests for the same node share one
+    summarization. Failures are logged, not raised, so the caller can
+    still respond without the summary.
+
+    Args:
+        db: Database session
+        repo_id: Repository ID
+        path: Node path ("" for the root)
+
+    Returns:
+        The summary, or None if there is no such node or it could not be summarized
+    """
+    node = db.query(Node.type, Node.summary).filter(
+        Node.repo_id == repo_id, Node.path == path
+    ).first()
+    if node is None:
+        return None
+    if node.summary:
+        return node.summary
+
+    key = (repo_id, path)
+    pending = _pending.get(key)
+    if pending is not None:
+        return await asyncio.shield(pending)
+
+    future = asyncio.get_running_loop().create_future()
+    _pending[key] = future
+    summary = None
+    try:
+        repo = db.query(Repository).filter(Repository.id == repo_id).first()
+        logger.info(f"Summarizing {path or 'root'} of {repo.url} on demand")
+        with scheduling(flow=repo_id, priority=INTERACTIVE):
+            summary = await summarize_node(db, repo, path, node.type)
+    except Exception as e:
+        db.rollback()
+        logger.warning(f"On-demand summary of {path or 'root'} failed: {str(e)}")
+    finally:
+        future.set_result(summary)
+        del _pending[key]
+    return summary
+
+
+def unsummarized_mentions(db: Session, repo_id: str, text: str, limit: int = 3) -> list[str]:
+    """
+    Find unsummarized nodes that a question names by path or file name.
+
+    Args:
+        db: Database session
+        repo_id: Repository ID
+        text: Question text
+        limit: Maximum number of paths to return
+
+    Returns:
+        Paths of the mentioned nodes, full path matches first
+    """
+    words = {word.strip(".") for word in re.findall(r"[\w./-]+", text)}
+    words.discard("")
+    if not words:
+        return []
+    by_path = []
+    by_name = []
+    rows = db.query(Node.path, Node.name).filter(
+        Node.repo_id == repo_id, Node.summary.is_(None), Node.path != ""
+    )
+    for path, name in rows:
+        if path in words:
+            by_path.append(path)
+        elif name in words:
+            by_name.append(path)
+    return (sorted(by_path) + sorted(by_name, key=lambda path: (path.count("/"), path)))[:limit]
@@ -0,0 +1,261 @@
+"""Batch submission of LLM requests (JSONL in, asynchronous results out)."""
+import os
+import json
+import uuid
+import shutil
+import asyncio
+import logging
+import time
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Awaitable, Callable
+from backend.config import settings
+from backend.services.llm_http import get_http_client
+
+logger = logging.getLogger(__name__)
+
+BATCH_DIR = ".llm_batches"
+
+# Batch states reported by `BatchBackend.poll`
+BATCH_PENDING = "pending"
+BATCH_COMPLETED = "completed"
+BATCH_FAILED = "failed"
+
+
+def get_batch_dir() -> Path:
+    """Directory for batch input files (and the local backend's results)."""
+    path = Path(settings.cache_dir) / BATCH_DIR
+    path.mkdir(parents=True, exist_ok=True)
+    return path
+
+
+def write_batch_file(path: Path, requests: dict[str, dict]):
+    """
+    Write requests as a batch input file in the OpenAI batch JSONL format.
+
+    Args:
+        path: File to write
+        requests: Request bodies by custom ID
+    """
+    with open(path, "w", encoding="utf-8") as f:
+        for custom_id, body in requests.items():
+            f.write(json.dumps({
+                "custom_id": custom_id,
+                "method": "POST",
+                "url": "/v1/chat/completions",
+                "body": body,
+            }) + "\n")
+
+
+class BatchBackend(ABC):
+    """Submits batch input files and collects their results."""
+
+    name: str = ""
+
+    @abstractmethod
+    async def submit(self, input_path: Path) -> str:
+        """Submit a batch input file and return the batch ID."""
+
+    @abstractmethod
+    async def poll(self, batch_id: str) -> str:
+        """Get a batch's state: BATCH_PENDING, BATCH_COMPLETED or BATCH_FAILED."""
+
+    @abstractmethod
+    async def fetch_results(self, batch_id: str) -> dict[str, str]:
+        """Get the response text of a completed batch by custom ID (failed requests are absent)."""
+
+
+class LocalBatchBackend(BatchBackend):
+    """
+    File-based stand-in for a provider batch API.
+
+    A submitted batch is copied to `<directory>/<batch_id>/input.jsonl`.
+    The first poll answers every request with `responder` and writes
+    `output.jsonl` in the provider's result format, so providers without a
+    batch API (and tests) can use batch mode. The batch's directory is
+    removed once its results are fetched.
+    """
+
+    name = "local"
+
+    def __init__(self, directory: Path, responder: Callable[[dict], Awaitable[str]]):
+        self.directory = Path(directory)
+        self.responder = responder
+
+    async def submit(self, input_path: Path) -> str:
+        batch_id = f"local-{uuid.uuid4().hex[:12]}"
+        batch_dir = self.directory / batch_id
+        batch_dir.mkdir(parents=True)
+        os.replace(input_path, batch_dir / "input.jsonl")
+        return batch_id
+
+    async def poll(self, batch_id: str) -> str:
+        batch_dir = self.directory / batch_id
+        if (batch_dir / "output.jsonl").exists():
+            return BATCH_COMPLETED
+        if not (batch_dir / "input.jsonl").exists():
+            return BATCH_FAILED
+
+        with open(batch_dir / "input.jsonl", encoding="utf-8") as f:
+            lines = [json.loads(line) for line in f if line.strip()]
+
+        async def answer(line: dict) -> dict:
+            try:
+                text = await self.responder(line["body"])
+            except Exception as e:
+                return {"custom_id": line["custom_id"], "response": None, "error": {"message": str(e)}}
+            return {
+                "custom_id": line["custom_id"],
+                "response": {
+                    "status_code": 200,
+                    "body": {"choices": [{"message": {"content": text}}]},
+                },
+                "error": None,
+            }
+
+        results = await asyncio.gather(*(answer(line) for line in lines))
+        temp_path = batch_dir / "output.jsonl.tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            for result in results:
+                f.write(json.dumps(result) + "\n")
+        os.replace(temp_path, batch_dir / "output.jsonl")
+        return BATCH_COMPLETED
+
+    async def fetch_results(self, batch_id: str) -> dict[str, str]:
+        batch_dir = self.directory / batch_id
+        with open(batch_dir / "output.jsonl", encoding="utf-8") as f:
+            results = parse_batch_output(f.read())
+        shutil.rmtree(batch_dir, ignore_errors=True)
+        return results
+
+
+class OpenAIBatchBackend(BatchBackend):
+    """OpenAI Batch API: upload the JSONL file, create a batch, download its output file."""
+
+    name = "openai"
+
+    def __init__(self, api_key: str, base_url: str = "https://api.openai.com/v1"):
+        self.base_url = base_url.rstrip("/")
+        self.headers = {"Authorization": f"Bearer {api_key}"}
+        self._output_files: dict[str, str] = {}
+
+    async def submit(self, input_path: Path) -> str:
+        client = get_http_client(self.name)
+        with open(input_path, "rb") as f:
+            upload = await client.post(
+                f"{self.base_url}/files",
+                headers=self.headers,
+                data={"purpose": "batch"},
+                files={"file": (input_path.name, f.read(), "application/jsonl")},
+            )
+        upload.raise_for_status()
+        response = await client.post(
+            f"{self.base_url}/batches",
+            headers=self.headers,
+            json={
+                "input_file_id": upload.json()["id"],
+                "endpoint": "/v1/chat/completions",
+                "completion_window": "24h",
+            },
+        )
+        response.raise_for_status()
+        input_path.unlink(missing_ok=True)
+        return response.json()["id"]
+
+    async def poll(self, batch_id: str) -> str:
+        response = await get_http_client(self.name).get(
+            f"{self.base_url}/batches/{batch_id}", headers=self.headers
+        )
+        response.raise_for_status()
+        batch = response.json()
+        status = batch.get("status")
+        if status == "completed":
+            self._output_files[batch_id] = batch.get("output_file_id")
+            return BATCH_COMPLETED
+        if status in ("failed", "expired", "cancelled", "cancelling"):
+            return BATCH_FAILED
+        return BATCH_PENDING
+
+    async def fetch_results(self, batch_id: str) -> dict[str, str]:
+        output_file_id = self._output_files.get(batch_id)
+        if not output_file_id:
+            return {}
+        response = await get_http_client(self.name).get(
+            f"{self.base_url}/files/{output_file_id}/content", headers=self.headers
+        )
+        response.raise_for_status()
+        return parse_batch_output(response.text)
+
+
+def parse_batch_output(text: str) -> dict[str, str]:
+    """Response text by custom ID from a batch output file; failed requests are left out."""
+    results = {}
+    for line in text.splitlines():
+        if not line.strip():
+            continue
+        entry = json.loads(line)
+        response = entry.get("response") or {}
+        if entry.get("error") or response.get("status_code") != 200:
+            continue
+        try:
+            content = response["body"]["choices"][0]["message"]["content"]
+        except (KeyError, IndexError, TypeError):
+            continue
+        if content:
+            results[entry["custom_id"]] = content.strip()
+    return results
+
+
+async def run_batch(
+    backend: BatchBackend,
+    requests: dict[str, dict],
+    poll_interval: float | None = None,
+    timeout: float | None = None,
+    batch_id: str | None = None,
+    on_submit: Callable[[str], None] | None = None,
+) -> dict[str, str]:
+    """
+    Submit requests as one batch and wait for the results.
+
+    Args:
+        backend: Batch backend to submit through
+        requests: Request bodies by custom ID
+        poll_interval: Seconds between status checks (default from settings)
+        timeout: Seconds to wait before giving up (default from settings)
+        batch_id: Batch submitted earlier for these requests (e.g. by an
+            interrupted run), waited for instead of submitting again
+        on_submit: Called with the ID of a newly submitted batch, so it
+            can be recorded before the wait
+
+    Returns:
+        Response text by custom ID; empty if the batch failed or timed out
+    """
+    if not requests:
+        return {}
+    poll_interval = poll_interval if poll_interval is not None else settings.llm_batch_poll_interval
+    timeout = timeout if timeout is not None else settings.llm_batch_timeout
+
+    if batch_id:
+        logger.info(f"Resuming batch {batch_id} on {backend.name}")
+    else:
+        input_path = get_batch_dir() / f"batch-{uuid.uuid4().hex[:12]}.jsonl"
+        write_batch_file(input_path, requests)
+        batch_id = await backend.submit(input_path)
+        logger.info(f"Submitted batch {batch_id} with {len(requests)} requests to {backend.name}")
+        if on_submit:
+            on_submit(batch_id)
+
+    deadline = time.monotonic() + timeout
+    while True:
+        state = await backend.poll(batch_id)
+        if state == BATCH_COMPLETED:
+            results = await backend.fetch_results(batch_id)
+            logger.info(f"Batch {batch_id} completed: {len(results)}/{len(requests)} responses")
+            return results
+        if state == BATCH_FAILED:
+            logger.warning(f"Batch {batch_id} failed")
+            return {}
+        if time.monotonic() >= deadline:
+            logger.warning(f"Batch {batch_id} did not complete within {timeout:.0f}s")
+            return {}
+        await asyncio.sleep(poll_interval)
@@ -0,0 +1,183 @@
+"""Cache of LLM responses for byte-identical prompts."""
+import os
+import uuid
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from backend.config import settings
+
+logger = logging.getLogger(__name__)
+
+CACHE_DIR = ".llm_cache"
+
+
+class ResponseCache:
+    """
+    Two-tier LRU cache of LLM responses.
+
+    Responses are keyed on provider, model, temperature and a hash of the
+    prompt. A bounded in-memory tier sits in front of an on-disk tier
+    shared by all processes using the same directory; when the disk tier
+    grows past `max_disk_bytes`, the least recently used entries (by file
+    modification time, refreshed on every hit) are removed.
+    """
+
+    def __init__(self, directory: str, max_memory_entries: int, max_disk_bytes: int):
+        self.directory = Path(directory)
+        self.max_memory_entries = max_memory_entries
+        self.max_disk_bytes = max_disk_bytes
+        self._memory: OrderedDict[str, str] = OrderedDict()
+        self._lock = threading.Lock()
+        self._disk_bytes: int | None = None  # Scanned on first write
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.writes = 0
+        self.evictions = 0
+
+    @staticmethod
+    def key(provider: str, model: str, temperature: float | None, prompt: str) -> str:
+        """Cache key for a request."""
+        digest = hashlib.sha256(prompt.encode("utf-8")).hexdigest()
+        header = f"{provider}\0{model}\0{temperature}\0{digest}"
+        return hashlib.sha256(header.encode("utf-8")).hexdigest()
+
+    def _path(self, key: str) -> Path:
+        return self.directory / key[:2] / f"{key}.txt"
+
+    def get(self, key: str) -> str | None:
+        """Look up a response, memory tier first."""
+        with self._lock:
+            value = self._memory.get(key)
+            if value is not None:
+                self._memory.move_to_end(key)
+                self.memory_hits += 1
+                return value
+
+        value = None
+        if self.max_disk_bytes > 0:
+            path = self._path(key)
+            try:
+                value = path.read_text(encoding="utf-8")
+                os.utime(path)
+            except OSError:
+                value = None
+
+        with self._lock:
+            if value is None:
+                self.misses += 1
+                return None
+            self.disk_hits += 1
+            self._remember(key, value)
+        return value
+
+    def put(self, key: str, value: str):
+        """Store a response in both tiers."""
+        with self._lock:
+            self._remember(key, value)
+            self.writes += 1
+        if self.max_disk_bytes <= 0:
+            return
+
+        path = self._path(key)
+        data = value.encode("utf-8")
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            # Write under a unique name first so readers never see partial files
+            temp_path = path.with_suffix(f".{uuid.uuid4().hex}.tmp")
+            temp_path.write_bytes(data)
+            os.replace(temp_path, path)
+        except OSError as e:
+            logger.warning(f"Could not write LLM cache entry {key[:12]}: {str(e)}")
+            return
+
+        with self._lock:
+            if self._disk_bytes is None:
+                self._disk_bytes = self._scan()[1]
+            else:
+                self._disk_bytes += len(data)
+            over_limit = self._disk_bytes > self.max_disk_bytes
+        if over_limit:
+            self._evict()
+
+    def _remember(self, key: str, value: str):
+        """Add to the memory tier, dropping the least recently used (lock held)."""
+        if self.max_memory_entries <= 0:
+            return
+        self._memory[key] = value
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_entries:
+            self._memory.popitem(last=False)
+
+    def _scan(self) -> tuple[list[tuple[float, int, Path]], int]:
+        """List disk entries as (mtime, size, path) and their total size."""
+        entries = []
+        for path in self.directory.glob("*/*.txt"):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        return entries, sum(size for _, size, _ in entries)
+
+    def _evict(self):
+        """Remove least recently used disk entries down to 90% of the limit."""
+        entries, total = self._scan()
+        target = int(self.max_disk_bytes * 0.9)
+        removed = 0
+        for _, size, path in sorted(entries):
+            if total <= target:
+                break
+            try:
+                path.unlink()
+            except OSError:
+                continue
+            total -= size
+            removed += 1
+        with self._lock:
+            self._disk_bytes = total
+            self.evictions += removed
+        if removed:
+            logger.info(f"Evicted {removed} LLM cache entries, {total} bytes left on disk")
+
+    def stats(self) -> dict:
+        """Hit/miss counters for this process."""
+        with self._lock:
+            hits = self.memory_hits + self.disk_hits
+            lookups = hits + self.misses
+            return {
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "writes": self.writes,
+                "evictions": self.evictions,
+                "memory_entries": len(self._memory),
+                "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+            }
+
+
+_cache: ResponseCache | None = None
+_cache_lock = threading.Lock()
+
+
+def get_response_cache() -> ResponseCache | None:
+    """The process-wide response cache, or None if caching is disabled."""
+    global _cache
+    if not settings.llm_cache_enabled:
+        return None
+    with _cache_lock:
+        if _cache is None:
+            _cache = ResponseCache(
+                str(Path(settings.cache_dir) / CACHE_DIR),
+                settings.llm_cache_memory_entries,
+                settings.llm_cache_disk_mb * 1024 * 1024,
+            )
+        return _cache
+
+
+def cache_stats() -> dict:
+    """Response cache counters for the metrics endpoint."""
+    cache = get_response_cache()
+    return cache.stats() if cache else {"enabled": False}
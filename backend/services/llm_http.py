@@ -0,0 +1,60 @@
+"""Shared HTTP connection pools for LLM providers."""
+import asyncio
+import importlib.util
+import logging
+import httpx
+from backend.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Pools by event loop and provider. httpx connections belong to the loop
+# that opened them, so each loop (the API's, or a worker thread's) has its own.
+_clients: dict[asyncio.AbstractEventLoop, dict[str, httpx.AsyncClient]] = {}
+
+
+def http2_available() -> bool:
+    """Whether `h2` (from the `httpx[http2]` requirement) is installed, enabling HTTP/2."""
+    return importlib.util.find_spec("h2") is not None
+
+
+def get_http_client(provider: str) -> httpx.AsyncClient:
+    """
+    Get the pooled HTTP client for a provider on the running event loop.
+
+    Connections are kept alive and reused across requests, up to
+    `llm_max_connections` per provider. HTTPS endpoints use HTTP/2,
+    multiplexing concurrent requests over one connection; installs
+    without `h2` fall back to HTTP/1.1.
+
+    Args:
+        provider: LLM provider name
+
+    Returns:
+        Shared client; callers must not close it
+    """
+    loop = asyncio.get_running_loop()
+    for stale_loop in [other for other in _clients if other.is_closed()]:
+        # Their connections died with the loop
+        del _clients[stale_loop]
+
+    clients = _clients.setdefault(loop, {})
+    client = clients.get(provider)
+    if client is None or client.is_closed:
+        client = httpx.AsyncClient(
+            http2=http2_available(),
+            limits=httpx.Limits(
+                max_connections=settings.llm_max_connections,
+                max_keepalive_connections=settings.llm_max_connections,
+            ),
+            timeout=httpx.Timeout(settings.llm_timeout, connect=10.0),
+        )
+        clients[provider] = client
+        logger.info(f"Opened connection pool for {provider} (HTTP/2: {http2_available()})")
+    return client
+
+
+async def close_http_clients():
+    """Close the pools of the running event loop."""
+    clients = _clients.pop(asyncio.get_running_loop(), {})
+    for client in clients.values():
+        await client.aclose()
@@ -0,0 +1,184 @@
+"""Dividing the LLM provider limits between processes by their demand."""
+import logging
+import threading
+from datetime import datetime, timedelta, timezone
+from sqlalchemy.orm import Session
+from backend.config import settings
+from backend.db.base import SessionLocal
+from backend.db.upsert import bulk_upsert
+from backend.models.llm_demand import LLMDemand
+from backend.services.llm_scheduler import PRIORITIES, get_schedulers, share_limits
+
+logger = logging.getLogger(__name__)
+
+# Demand of processes silent for this many intervals is dropped
+STALE_INTERVALS = 3
+
+# Processes that were not held back get this much more than they used
+HEADROOM = 1.5
+
+
+def _waterfill(capacity: float, claims: dict[str, tuple[float, float | None]]) -> dict[str, float]:
+    """
+    Weighted max-min fair division of `capacity`.
+
+    Args:
+        capacity: Amount to divide
+        claims: Key -> (weight, demand); a demand of None takes all it can get
+
+    Returns:
+        Amount per key; claims below their weighted share get their demand,
+        and what they leave is divided between the others by weight
+    """
+    allocation: dict[str, float] = {}
+    active = dict(claims)
+    while active and capacity > 1e-9:
+        total_weight = sum(weight for weight, _ in active.values())
+        satisfied = {
+            key: demand for key, (weight, demand) in active.items()
+            if demand is not None and demand <= capacity * weight / total_weight
+        }
+        if not satisfied:
+            for key, (weight, _) in active.items():
+                allocation[key] = allocation.get(key, 0.0) + capacity * weight / total_weight
+            break
+        for key, demand in satisfied.items():
+            allocation[key] = allocation.get(key, 0.0) + demand
+            capacity -= demand
+            del active[key]
+    return allocation
+
+
+def _load(usage: dict) -> float | None:
+    """Fraction of the configured limits a priority needs (None = as much as it can get)."""
+    if usage.get("blocked"):
+        return None
+    fractions = [
+        usage.get(resource, 0.0) / limit
+        for resource, limit in (
+            ("requests", settings.llm_requests_per_minute),
+            ("tokens", settings.llm_tokens_per_minute),
+        )
+        if limit > 0
+    ]
+    return HEADROOM * max(fractions, default=0.0)
+
+
+def allocate_shares(reports: dict[str, dict]) -> dict[str, float]:
+    """
+    Divide one provider's limits between processes.
+
+    Interactive demand is served first, then batch demand, each divided
+    like the scheduler's own queues: tenants get equal shares, split
+    between their repositories, wherever their requests run. What no
+    process needs is divided equally between all of them.
+
+    Args:
+        reports: Process ID -> `LLMScheduler.demand()` of its scheduler
+
+    Returns:
+        Fraction of the limits per process, adding up to 1
+    """
+    shares = {process_id: 0.0 for process_id in reports}
+    remaining = 1.0
+    for priority in PRIORITIES:
+        usages = {
+            process_id: report[priority]
+            for process_id, report in reports.items() if priority in report
+        }
+        tenant_flows: dict[str, set] = {}
+        for usage in usages.values():
+            for tenant, repository in usage["flows"]:
+                tenant_flows.setdefault(tenant, set()).add(repository)
+        claims = {
+            process_id: (
+                sum(1.0 / len(tenant_flows[tenant]) for tenant, _ in usage["flows"]) or 1.0,
+                _load(usage),
+            )
+            for process_id, usage in usages.items()
+        }
+        for process_id, share in _waterfill(remaining, claims).items():
+            shares[process_id] += share
+            remaining -= share
+    if remaining > 0 and shares:
+        for process_id in shares:
+            shares[process_id] += remaining / len(shares)
+    return shares
+
+
+def exchange_demand(db: Session, process_id: str):
+    """
+    Publish this process's LLM demand and apply its share of the limits. Commits.
+
+    Args:
+        db: Database session
+        process_id: Identifier unique to this process
+    """
+    schedulers = {provider: scheduler for provider, scheduler in get_schedulers().items() if scheduler.limited}
+    now = datetime.now(timezone.utc)
+    demand = {provider: scheduler.demand() for provider, scheduler in schedulers.items()}
+    bulk_upsert(
+        db,
+        LLMDemand.__table__,
+        [{"process_id": process_id, "demand": demand, "updated_at": now}],
+        ["process_id"],
+        ["demand", "updated_at"],
+    )
+    stale = now - timedelta(seconds=STALE_INTERVALS * settings.llm_quota_interval)
+    db.query(LLMDemand).filter(LLMDemand.updated_at < stale).delete()
+    db.commit()
+
+    published = dict(db.query(LLMDemand.process_id, LLMDemand.demand))
+    for provider, scheduler in schedulers.items():
+        reports = {
+            other: (other_demand or {})[provider]
+            for other, other_demand in published.items() if provider in (other_demand or {})
+        }
+        scheduler.set_limits(*share_limits(allocate_shares(reports)[process_id]))
+
+
+def withdraw_demand(db: Session, process_id: str):
+    """Remove this process's demand so the others take over its share. Commits."""
+    db.query(LLMDemand).filter(LLMDemand.process_id == process_id).delete()
+    db.commit()
+
+
+class DemandExchange(threading.Thread):
+    """Exchanges this process's LLM demand every `llm_quota_interval` seconds until stopped."""
+
+    def __init__(self, process_id: str):
+        super().__init__(name=f"llm-demand-{process_id}", daemon=True)
+        self.process_id = process_id
+        self._stopped = threading.Event()
+
+    def run(self):
+        while not self._stopped.wait(settings.llm_quota_interval):
+            # Sessions are not thread-safe, so the exchange uses its own
+            db = SessionLocal()
+            try:
+                exchange_demand(db, self.process_id)
+            except Exception as e:
+                logger.warning(f"Could not exchange LLM demand of {self.process_id}: {str(e)}")
+                db.rollback()
+            finally:
+                db.close()
+        db = SessionLocal()
+        try:
+            withdraw_demand(db, self.process_id)
+        except Exception as e:
+            logger.warning(f"Could not withdraw LLM demand of {self.process_id}: {str(e)}")
+            db.rollback()
+        finally:
+            db.close()
+
+    def stop(self):
+        self._stopped.set()
+
+
+def start_demand_exchange(process_id: str) -> DemandExchange | None:
+    """Start exchanging demand unless it is disabled (`llm_quota_interval` = 0)."""
+    if settings.llm_quota_interval <= 0:
+        return None
+    exchange = DemandExchange(process_id)
+    exchange.start()
+    return exchange
@@ -0,0 +1,525 @@
+"""Process-wide scheduling of LLM requests: rate limits, fairness and priorities."""
+import asyncio
+import contextvars
+import heapq
+import itertools
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from backend.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Priorities, served strictly in this order
+INTERACTIVE = "interactive"
+BATCH = "batch"
+PRIORITIES = (INTERACTIVE, BATCH)
+
+# Outcomes of admitted requests (see `LLMScheduler.release`)
+OK = "ok"
+THROTTLED = "throttled"  # 429 from the provider
+FAILED = "failed"  # Other retryable errors (5xx, timeouts, connection errors)
+REJECTED = "rejected"  # Errors retrying cannot fix (e.g. 400); no adaptation
+CANCELLED = "cancelled"
+
+# Who the LLM requests made in the current context are for (see `scheduling`)
+_flow = contextvars.ContextVar("llm_flow", default=None)
+_tenant = contextvars.ContextVar("llm_tenant", default=None)
+_priority = contextvars.ContextVar("llm_priority", default=None)
+
+
+@contextmanager
+def scheduling(flow: str | None = None, tenant: str | None = None, priority: str | None = None):
+    """
+    Attribute the LLM requests made inside the block (including tasks it starts).
+
+    Args:
+        flow: Repository the requests work on
+        tenant: Caller the requests are made for (e.g. its passphrase)
+        priority: INTERACTIVE or BATCH; by default Q&A answers are
+            interactive and summaries are batch
+    """
+    tokens = [
+        var.set(value)
+        for var, value in ((_flow, flow), (_tenant, tenant), (_priority, priority))
+        if value is not None
+    ]
+    try:
+        yield
+    finally:
+        for token in reversed(tokens):
+            token.var.reset(token)
+
+
+class TokenBucket:
+    """Refills at `per_minute` units a minute, holding at most a minute's worth."""
+
+    def __init__(self, per_minute: float):
+        self.rate = per_minute / 60.0
+        self.capacity = float(per_minute)
+        self.level = float(per_minute)
+        self._updated = time.monotonic()
+
+    def set_rate(self, per_minute: float, now: float):
+        """Change the rate (and with it the capacity), keeping what is left in the bucket."""
+        self._refill(now)
+        self.rate = per_minute / 60.0
+        self.capacity = float(per_minute)
+        self.level = min(self.level, self.capacity)
+
+    def _refill(self, now: float):
+        self.level = min(self.capacity, self.level + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def wait_time(self, amount: float, now: float) -> float:
+        """Seconds until `amount` can be taken (requests larger than the bucket wait for a full one)."""
+        self._refill(now)
+        amount = min(amount, self.capacity)
+        if self.level >= amount:
+            return 0.0
+        return (amount - self.level) / self.rate
+
+    def take(self, amount: float, now: float):
+        """Take `amount`; the level may go negative to charge usage after the fact."""
+        self._refill(now)
+        self.level -= amount
+
+
+@dataclass(order=True)
+class _Waiter:
+    finish: float
+    seq: int
+    start: float = field(compare=False)
+    tokens: int = field(compare=False)
+    flow: tuple = field(compare=False)
+    priority: str = field(compare=False)
+    enqueued: float = field(compare=False)
+    loop: asyncio.AbstractEventLoop = field(compare=False)
+    future: asyncio.Future = field(compare=False)
+    cancelled: bool = field(default=False, compare=False)
+    admitted: bool = field(default=False, compare=False)
+
+
+class LLMScheduler:
+    """
+    Admits LLM requests within a provider's request and token rate limits.
+
+    Interactive requests always go before batch ones. Within a priority,
+    requests are ordered by start-time fair queuing over (tenant,
+    repository) flows: every tenant gets an equal share of tokens, split
+    evenly between its repositories with requests waiting, so one large
+    analysis cannot starve the others. Token costs are estimated from the
+    prompt when admitted; completion tokens are charged afterwards with
+    `record_usage`.
+
+    With `max_concurrency`, requests in flight are capped by an AIMD
+    limit: it grows by about one per round of successful requests and is
+    halved (at most once a second) when the provider throttles, so it
+    settles just below the provider's actual limit. A Retry-After pauses
+    the whole queue, and `breaker_threshold` failures in a row trip a
+    circuit breaker that pauses it for `breaker_cooldown` seconds and lets
+    a single probe request through afterwards. Requests wait while the
+    queue is paused instead of failing.
+
+    State is guarded by a thread lock and waiters are woken on their own
+    event loop, so one scheduler serves every loop in the process. Its
+    limits are this process's share of the provider's: `demand` reports
+    what the process used and which flows were waiting, and `set_limits`
+    applies the share `llm_quota` computes from the demand of every
+    process, so priorities and fairness also hold between processes.
+    """
+
+    def __init__(
+        self,
+        requests_per_minute: int = 0,
+        tokens_per_minute: int = 0,
+        max_concurrency: int = 0,
+        breaker_threshold: int = 5,
+        breaker_cooldown: float = 30.0,
+    ):
+        self._requests = TokenBucket(requests_per_minute) if requests_per_minute > 0 else None
+        self._tokens = TokenBucket(tokens_per_minute) if tokens_per_minute > 0 else None
+        self._max_concurrency = max(0, max_concurrency)
+        self._concurrency = float(self._max_concurrency)
+        self._in_flight = 0
+        self._last_decrease = 0.0
+        self._paused_until = 0.0
+        self._failures = 0  # Consecutive throttled or failed requests
+        self._breaker_threshold = breaker_threshold
+        self._breaker_cooldown = breaker_cooldown
+        self._outcomes = {
+            OK: 0, THROTTLED: 0, FAILED: 0, REJECTED: 0, CANCELLED: 0, "breaker_trips": 0,
+        }
+        self._lock = threading.Lock()
+        self._queues: dict[str, list[_Waiter]] = {priority: [] for priority in PRIORITIES}
+        self._virtual_time = {priority: 0.0 for priority in PRIORITIES}
+        self._last_finish: dict[tuple, float] = {}
+        self._waiting: dict[tuple, int] = {}  # (priority, flow) -> queued requests
+        self._seq = itertools.count()
+        self._timer: threading.Timer | None = None
+        self._timer_due = 0.0
+        self._stats = {
+            priority: {"queued": 0, "admitted": 0, "tokens": 0, "wait_seconds": 0.0, "max_wait_seconds": 0.0}
+            for priority in PRIORITIES
+        }
+        self._window = self._new_window()
+        self._window_start = time.monotonic()
+
+    @staticmethod
+    def _new_window() -> dict:
+        return {
+            priority: {"requests": 0, "tokens": 0, "blocked": False, "flows": set()}
+            for priority in PRIORITIES
+        }
+
+    @property
+    def limited(self) -> bool:
+        return self._requests is not None or self._tokens is not None or self._max_concurrency > 0
+
+    def _flow_weight(self, priority: str, flow: tuple) -> float:
+        """Share of a flow: its tenant's share split between the tenant's waiting flows."""
+        tenant_flows = {
+            other for (other_priority, other), count in self._waiting.items()
+            if count and other_priority == priority and other[0] == flow[0]
+        }
+        tenant_flows.add(flow)
+        return 1.0 / len(tenant_flows)
+
+    async def acquire(self, tokens: int, priority: str | None = None):
+        """
+        Wait until a request of about `tokens` prompt tokens may be sent.
+
+        Every admitted request must be followed by a `release`. If the
+        wait is cancelled, no slot is held, even when the request was
+        admitted just before the cancellation arrived.
+
+        Args:
+            tokens: Estimated prompt tokens
+            priority: INTERACTIVE or BATCH (defaults to the context's, else BATCH)
+        """
+        priority = priority or _priority.get() or BATCH
+        flow = (_tenant.get() or "", _flow.get() or "")
+        loop = asyncio.get_running_loop()
+        now = time.monotonic()
+        with self._lock:
+            stats = self._stats[priority]
+            window = self._window[priority]
+            window["flows"].add(flow)
+            if not self.limited and now >= self._paused_until:
+                stats["admitted"] += 1
+                stats["tokens"] += tokens
+                window["requests"] += 1
+                window["tokens"] += tokens
+                self._in_flight += 1
+                return
+            key = (priority, flow)
+            start = max(self._virtual_time[priority], self._last_finish.get(key, 0.0))
+            finish = start + max(tokens, 1) / self._flow_weight(priority, flow)
+            self._last_finish[key] = finish
+            self._waiting[key] = self._waiting.get(key, 0) + 1
+            waiter = _Waiter(
+                finish, next(self._seq), start, tokens, flow, priority, now, loop, loop.create_future()
+            )
+            heapq.heappush(self._queues[priority], waiter)
+            stats["queued"] += 1
+            self._dispatch()
+
+        try:
+            await waiter.future
+        except asyncio.CancelledError:
+            with self._lock:
+                admitted = waiter.admitted
+                if not admitted:
+                    waiter.cancelled = True
+                    self._dequeued(waiter)
+                    self._dispatch()
+            if admitted:
+                # Admitted before the cancellation reached us; nobody else will release it
+                self.release(CANCELLED)
+            raise
+
+    def release(self, outcome: str = OK, retry_after: float | None = None):
+        """
+        Report how an admitted request ended and adapt admission to it.
+
+        Args:
+            outcome: OK, THROTTLED, FAILED, REJECTED or CANCELLED
+            retry_after: Seconds the provider asked to wait before retrying
+        """
+        now = time.monotonic()
+        with self._lock:
+            self._in_flight = max(0, self._in_flight - 1)
+            self._outcomes[outcome] += 1
+            if outcome == OK:
+                self._failures = 0
+                if self._max_concurrency:
+                    # Additive increase: about +1 per `limit` successful requests
+                    self._concurrency = min(
+                        float(self._max_concurrency), self._concurrency + 1.0 / self._concurrency
+                    )
+            elif outcome in (THROTTLED, FAILED):
+                self._failures += 1
+                if outcome == THROTTLED and self._max_concurrency and now - self._last_decrease >= 1.0:
+                    # Multiplicative decrease, once per burst of 429s
+                    self._concurrency = max(1.0, self._concurrency / 2)
+                    self._last_decrease = now
+                if retry_after:
+                    self._paused_until = max(self._paused_until, now + retry_after)
+                if self._failures >= self._breaker_threshold > 0:
+                    self._failures = 0
+                    self._outcomes["breaker_trips"] += 1
+                    self._paused_until = max(self._paused_until, now + self._breaker_cooldown)
+                    if self._max_concurrency:
+                        # Half-open: one probe request when the pause ends
+                        self._concurrency = 1.0
+                    logger.warning(
+                        f"LLM circuit breaker open: pausing requests for {self._breaker_cooldown:.0f}s"
+                    )
+            self._dispatch()
+
+    def record_usage(self, tokens: int, priority: str | None = None):
+        """Charge tokens used beyond the admitted estimate (e.g. the completion)."""
+        if tokens <= 0:
+            return
+        with self._lock:
+            self._window[priority or _priority.get() or BATCH]["tokens"] += tokens
+            if self._tokens is not None:
+                self._tokens.take(tokens, time.monotonic())
+
+    def demand(self) -> dict:
+        """
+        What this scheduler was asked for since the previous call.
+
+        Returns:
+            Per priority with requests: the request and token rates (per
+            minute) admitted, whether requests waited for this process's
+            limits ("blocked", i.e. a larger share would have been used),
+            and the [tenant, repository] flows that made requests
+        """
+        now = time.monotonic()
+        with self._lock:
+            window, self._window = self._window, self._new_window()
+            minutes = max(now - self._window_start, 1.0) / 60.0
+            self._window_start = now
+            for priority, queue in self._queues.items():
+                waiting = {waiter.flow for waiter in queue if not waiter.cancelled}
+                if waiting:
+                    # Still waiting: part of this window's demand and the next one's
+                    self._window[priority]["flows"].update(waiting)
+                    window[priority]["flows"].update(waiting)
+                    window[priority]["blocked"] |= now >= self._paused_until
+            return {
+                priority: {
+                    "requests": usage["requests"] / minutes,
+                    "tokens": usage["tokens"] / minutes,
+                    "blocked": usage["blocked"],
+                    "flows": sorted(list(flow) for flow in usage["flows"]),
+                }
+                for priority, usage in window.items()
+                if usage["flows"]
+            }
+
+    def set_limits(self, requests_per_minute: int, tokens_per_minute: int, max_concurrency: int):
+        """
+        Change the limits of a limited scheduler (0 leaves a limit that was unlimited alone).
+
+        The adaptive concurrency limit keeps its position relative to the
+        new ceiling.
+        """
+        now = time.monotonic()
+        with self._lock:
+            if self._requests is not None and requests_per_minute > 0:
+                self._requests.set_rate(requests_per_minute, now)
+            if self._tokens is not None and tokens_per_minute > 0:
+                self._tokens.set_rate(tokens_per_minute, now)
+            if self._max_concurrency and max_concurrency > 0:
+                self._concurrency = min(
+                    float(max_concurrency),
+                    max(1.0, self._concurrency * max_concurrency / self._max_concurrency),
+                )
+                self._max_concurrency = max_concurrency
+            self._dispatch()
+
+    def _dequeued(self, waiter: _Waiter):
+        key = (waiter.priority, waiter.flow)
+        self._waiting[key] -= 1
+        self._stats[waiter.priority]["queued"] -= 1
+        if not self._waiting[key]:
+            del self._waiting[key]
+            if self._last_finish.get(key, 0.0) <= self._virtual_time[waiter.priority]:
+                self._last_finish.pop(key, None)
+
+    def _dispatch(self):
+        """Admit waiters in order while the buckets allow (lock held)."""
+        while True:
+            waiter = None
+            for priority in PRIORITIES:
+                queue = self._queues[priority]
+                while queue and queue[0].cancelled:
+                    heapq.heappop(queue)
+                if queue:
+                    waiter = queue[0]
+                    break
+            if waiter is None:
+                return
+
+            now = time.monotonic()
+            if now < self._paused_until:
+                self._schedule(self._paused_until)
+                return
+            if self._max_concurrency and self._in_flight >= int(self._concurrency):
+                # `release` dispatches again
+                self._blocked()
+                return
+            wait = 0.0
+            if self._requests is not None:
+                wait = max(wait, self._requests.wait_time(1, now))
+            if self._tokens is not None:
+                wait = max(wait, self._tokens.wait_time(waiter.tokens, now))
+            if wait > 0:
+                self._blocked()
+                self._schedule(now + wait)
+                return
+
+            heapq.heappop(self._queues[waiter.priority])
+            waiter.admitted = True
+            self._in_flight += 1
+            if self._requests is not None:
+                self._requests.take(1, now)
+            if self._tokens is not None:
+                self._tokens.take(waiter.tokens, now)
+            self._virtual_time[waiter.priority] = max(self._virtual_time[waiter.priority], waiter.start)
+            self._dequeued(waiter)
+
+            waited = now - waiter.enqueued
+            stats = self._stats[waiter.priority]
+            stats["admitted"] += 1
+            stats["tokens"] += waiter.tokens
+            window = self._window[waiter.priority]
+            window["requests"] += 1
+            window["tokens"] += waiter.tokens
+            stats["wait_seconds"] += waited
+            stats["max_wait_seconds"] = max(stats["max_wait_seconds"], waited)
+            try:
+                waiter.loop.call_soon_threadsafe(_wake, waiter.future)
+            except RuntimeError:
+                # The waiter's loop is closed; nobody is waiting any more
+                pass
+
+    def _blocked(self):
+        """Note that waiting requests are held back by this process's limits (lock held)."""
+        for priority, queue in self._queues.items():
+            if any(not waiter.cancelled for waiter in queue):
+                self._window[priority]["blocked"] = True
+
+    def _schedule(self, due: float):
+        """Run `_dispatch` again at `due` (lock held)."""
+        if self._timer is not None and self._timer.is_alive() and self._timer_due <= due:
+            return
+        if self._timer is not None:
+            self._timer.cancel()
+        self._timer_due = due
+        self._timer = threading.Timer(max(0.0, due - time.monotonic()), self._on_timer)
+        self._timer.daemon = True
+        self._timer.start()
+
+    def _on_timer(self):
+        with self._lock:
+            self._timer = None
+            self._dispatch()
+
+    def stats(self) -> dict:
+        """Queue depth and wait times per priority, and the adaptive controls."""
+        with self._lock:
+            result = {
+                "control": {
+                    "concurrency_limit": int(self._concurrency) if self._max_concurrency else None,
+                    "requests_per_minute": int(self._requests.capacity) if self._requests is not None else None,
+                    "tokens_per_minute": int(self._tokens.capacity) if self._tokens is not None else None,
+                    "in_flight": self._in_flight,
+                    "paused_ms": round(max(0.0, self._paused_until - time.monotonic()) * 1000, 1),
+                    **self._outcomes,
+                },
+            }
+            for priority, stats in self._stats.items():
+                admitted = stats["admitted"]
+                result[priority] = {
+                    "queue_depth": stats["queued"],
+                    "admitted": admitted,
+                    "tokens": stats["tokens"],
+                    "avg_wait_ms": round(stats["wait_seconds"] * 1000 / admitted, 1) if admitted else 0.0,
+                    "max_wait_ms": round(stats["max_wait_seconds"] * 1000, 1),
+                }
+            return result
+
+
+def _wake(future: asyncio.Future):
+    if not future.done():
+        future.set_result(None)
+
+
+_schedulers: dict[str, LLMScheduler] = {}
+_schedulers_lock = threading.Lock()
+
+
+def limit_processes() -> int:
+    """Number of processes the configured provider limits are divided between until demand is known."""
+    return max(1, settings.llm_limit_processes or 1 + settings.embedded_workers)
+
+
+def _share(limit: int, fraction: float) -> int:
+    """A fraction of a limit, at least 1 so every process can make progress (0 stays unlimited)."""
+    return max(1, int(limit * fraction + 1e-9)) if limit > 0 else 0
+
+
+def share_limits(fraction: float) -> tuple[int, int, int]:
+    """Requests per minute, tokens per minute and concurrency of a fraction of the configured limits."""
+    return (
+        _share(settings.llm_requests_per_minute, fraction),
+        _share(settings.llm_tokens_per_minute, fraction),
+        _share(settings.llm_max_concurrency, fraction),
+    )
+
+
+def get_scheduler(provider: str) -> LLMScheduler:
+    """
+    Get the process-wide scheduler for an LLM provider.
+
+    It starts with an equal share (see `limit_processes`) of the
+    configured request, token and concurrency limits; once processes
+    exchange their demand (see `llm_quota`), the share follows it. All
+    processes together stay within the provider's quota.
+    """
+    with _schedulers_lock:
+        scheduler = _schedulers.get(provider)
+        if scheduler is None:
+            processes = limit_processes()
+            requests_per_minute, tokens_per_minute, max_concurrency = share_limits(1 / processes)
+            scheduler = LLMScheduler(
+                requests_per_minute,
+                tokens_per_minute,
+                max_concurrency,
+                settings.llm_breaker_threshold,
+                settings.llm_breaker_cooldown,
+            )
+            _schedulers[provider] = scheduler
+            if scheduler.limited:
+                logger.info(
+                    f"LLM limits for {provider} (1/{processes} of the configured ones): "
+                    f"{requests_per_minute} requests/min, {tokens_per_minute} tokens/min, "
+                    f"{max_concurrency} concurrent requests (0 = unlimited)"
+                )
+        return scheduler
+
+
+def get_schedulers() -> dict[str, LLMScheduler]:
+    """Every scheduler created in this process, by provider."""
+    with _schedulers_lock:
+        return dict(_schedulers)
+
+
+def scheduler_stats() -> dict:
+    """Stats of every scheduler in this process, by provider."""
+    return {provider: scheduler.stats() for provider, scheduler in get_schedulers().items()}
@@ -1,108 +1,304 @@
 """LLM service abstraction supporting multiple providers."""
 from abc import ABC, abstractmethod
-from typing import Optional
+import asyncio
+import json
+import random
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import AsyncIterator, Callable, Optional
 from backend.config import settings
+from backend.services.llm_cache import get_response_cache
+from backend.services.llm_batch import BatchBackend, LocalBatchBackend, OpenAIBatchBackend, get_batch_dir, run_batch
+from backend.services.llm_http import get_http_client
 from backend.services.llm_logger import log_llm_call
+from backend.services.llm_scheduler import (
+    CANCELLED, FAILED, INTERACTIVE, OK, REJECTED, THROTTLED, get_scheduler,
+)
+from backend.services.context_builder import estimate_tokens
 import openai
 import httpx
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Bump whenever the summary prompts change so stored summaries are regenerated
+PROMPT_VERSION = "1"
+
+
+def parse_retry_after(value: str | None) -> float | None:
+    """Seconds to wait from a Retry-After header (delay seconds or HTTP date)."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+
+def classify_error(error: Exception) -> tuple[str | None, float | None]:
+    """
+    Decide whether a failed provider call is worth retrying.
+    
+    Returns:
+        Tuple of (THROTTLED for 429s, FAILED for other transient errors,
+        or None if retrying cannot help; Retry-After seconds, if given)
+    """
+    response = getattr(error, "response", None)
+    status = getattr(response, "status_code", None)
+    if status is None:
+        if isinstance(error, (httpx.TransportError, openai.APIConnectionError)):
+            return FAILED, None
+        return None, None
+    retry_after = parse_retry_after(response.headers.get("retry-after"))
+    if status == 429:
+        return THROTTLED, retry_after
+    if status >= 500 or status in (408, 409):
+        return FAILED, retry_after
+    return None, None
+
 
 class LLMService(ABC):
-    """Abstract LLM service interface."""
+    """
+    Abstract LLM service interface.
+    
+    Providers implement `_complete`; every request goes through the
+    provider's process-wide scheduler, which enforces rate limits and
+    orders requests by priority and fairness. Responses to byte-identical
+    prompts are served from the response cache without a request.
+    """
+    
+    provider: str = ""
+    model: str = ""
+    temperature: float | None = None  # None = provider default
+    
+    @property
+    def summary_version(self) -> str:
+        """Version key for stored summaries: provider, model and prompt version."""
+        return f"{self.provider}:{self.model}:v{PROMPT_VERSION}"
     
     @abstractmethod
-    async def generate_summary(self, content: str, context: Optional[str] = None, item_type: str = "file") -> str:
-        """Generate a summary of the given content."""
+    async def _complete(self, prompt: str) -> str:
+        """Send a prompt to the provider and return the response text."""
         pass
     
-    async def answer_question(self, question: str, context: str) -> str:
-        """Answer a question based on provided context. Default implementation uses generate_summary."""
-        # Default implementation - can be overridden by subclasses
-        prompt = f"""You are a code assistant helping a developer understand and modify a codebase. Answer the following question with specific, actionable information.
-
-Question: {question}
-
-Repository Context:
-{context}
-
-Instructions:
-1. Provide a specific, direct answer to the question
-2. If the question asks about where something is defined or how to change it, specify the exact file path(s) and relevant code sections
-3. If code changes are needed, provide specific examples showing what to change
-4. Reference the file paths from the context above
-5. Be concise but complete - focus on answering the question directly
-
-Answer:"""
-        return await self.generate_summary(prompt, item_type="file")
-
-
-class OpenAIService(LLMService):
-    """OpenAI LLM service."""
+    async def _stream(self, prompt: str) -> AsyncIterator[str]:
+        """Send a prompt and yield the response text as it is generated."""
+        yield await self._complete(prompt)
     
-    def __init__(self):
-        if not settings.openai_api_key:
-            raise ValueError("OpenAI API key not configured")
-        self.client = openai.OpenAI(api_key=settings.openai_api_key)
-        self.model = settings.openai_model
+    async def _request(
+        self, prompt: str, item_type: str, context: Optional[str] = None, use_cache: bool = True
+    ) -> str:
+        """Answer a prompt from the cache, or send it once the scheduler admits it and log the call."""
+        cache = get_response_cache() if use_cache else None
+        if cache:
+            key = cache.key(self.provider, self.model, self.temperature, prompt)
+            cached = await asyncio.to_thread(cache.get, key)
+            if cached is not None:
+                return cached
+        
+        result = await self._complete_with_retries(prompt, item_type)
+        log_llm_call(self.provider, self.model, prompt, result, item_type, context)
+        if cache:
+            await asyncio.to_thread(cache.put, key, result)
+        return result
     
-    async def answer_question(self, question: str, context: str) -> str:
-        """Answer a question using OpenAI."""
-        prompt = f"""You are a code assistant helping a developer understand and modify a codebase. Answer the following question with specific, actionable information.
-
-Question: {question}
-
-Repository Context:
-{context}
-
-Instructions:
-1. Provide a specific, direct answer to the question
-2. If the question asks about where something is defined or how to change it, specify the exact file path(s) and relevant code sections
-3. If code changes are needed, provide specific examples showing what to change
-4. Reference the file paths from the context above
-5. Be concise but complete - focus on answering the question directly
-
-Answer:"""
+    async def _complete_with_retries(self, prompt: str, item_type: str) -> str:
+        """
+        Complete a prompt through the scheduler, retrying transient failures.
         
-        response = self.client.chat.completions.create(
-            model=self.model,
-            messages=[{"role": "user", "content": prompt}],
-            temperature=0.3,
-            max_tokens=4000,
+        Throttling and server errors are reported to the scheduler, which
+        adapts concurrency and pauses the queue (for a Retry-After, or when
+        its circuit breaker trips). Retries wait with full-jitter
+        exponential backoff, or just for the pause when the provider said
+        how long to wait.
+        """
+        scheduler = get_scheduler(self.provider)
+        priority = INTERACTIVE if item_type == "qa" else None
+        tokens = estimate_tokens(prompt)
+        attempt = 0
+        while True:
+            admitted = False
+            try:
+                # `acquire` holds no slot if it is cancelled
+                await scheduler.acquire(tokens, priority)
+                admitted = True
+                result = await self._complete(prompt)
+            except asyncio.CancelledError:
+                if admitted:
+                    scheduler.release(CANCELLED)
+                raise
+            except Exception as e:
+                outcome, retry_after = classify_error(e)
+                scheduler.release(outcome or REJECTED, retry_after)
+                if outcome is None or attempt >= settings.llm_max_retries:
+                    raise
+                attempt += 1
+                await self._retry_wait(attempt, outcome, retry_after, e)
+                continue
+            scheduler.release(OK)
+            scheduler.record_usage(estimate_tokens(result), priority)
+            return result
+    
+    async def _retry_wait(self, attempt: int, outcome: str, retry_after: float | None, error: Exception):
+        """Back off before a retry; a Retry-After is waited out by the paused scheduler instead."""
+        delay = 0.0 if retry_after is not None else random.uniform(
+            0, min(settings.llm_retry_max_delay, settings.llm_retry_base_delay * 2 ** (attempt - 1))
+        )
+        logger.warning(
+            f"{self.provider} request {outcome} ({str(error)}), retry {attempt}/"
+            f"{settings.llm_max_retries} in {retry_after if retry_after is not None else delay:.1f}s"
         )
+        await asyncio.sleep(delay)
+    
+    async def _stream_request(
+        self, prompt: str, item_type: str, context: Optional[str] = None, use_cache: bool = True
+    ) -> AsyncIterator[str]:
+        """
+        Like `_request`, but yield the response as the provider generates it.
         
-        result = response.choices[0].message.content.strip()
+        Failures before the first text are retried like `_request`; once
+        text has been yielded, errors are raised. The complete response is
+        logged and cached. A cached response is yielded in one piece.
+        """
+        cache = get_response_cache() if use_cache else None
+        if cache:
+            key = cache.key(self.provider, self.model, self.temperature, prompt)
+            cached = await asyncio.to_thread(cache.get, key)
+            if cached is not None:
+                yield cached
+                return
         
-        # Log the LLM call
-        log_llm_call("openai", self.model, prompt, result, "qa", context)
+        scheduler = get_scheduler(self.provider)
+        priority = INTERACTIVE if item_type == "qa" else None
+        attempt = 0
+        while True:
+            parts = []
+            outcome, retry_after = CANCELLED, None
+            admitted = False
+            try:
+                await scheduler.acquire(estimate_tokens(prompt), priority)
+                admitted = True
+                async for part in self._stream(prompt):
+                    if part:
+                        parts.append(part)
+                        yield part
+                outcome = OK
+            except Exception as e:
+                outcome, retry_after = classify_error(e)
+                outcome = outcome or REJECTED
+                if parts or outcome == REJECTED or attempt >= settings.llm_max_retries:
+                    raise
+                error = e
+            finally:
+                if admitted:
+                    scheduler.release(outcome, retry_after)
+            if outcome == OK:
+                break
+            attempt += 1
+            await self._retry_wait(attempt, outcome, retry_after, error)
         
-        return result
+        result = "".join(parts).strip()
+        scheduler.record_usage(estimate_tokens(result), priority)
+        log_llm_call(self.provider, self.model, prompt, result, item_type, context)
+        if cache:
+            await asyncio.to_thread(cache.put, key, result)
     
     async def generate_summary(self, content: str, context: Optional[str] = None, item_type: str = "file") -> str:
-        """Generate summary using OpenAI."""
-        logger.info(f"OpenAI: Generating {item_type} summary, content length: {len(content)}")
+        """Generate a summary of the given content."""
         prompt = self._build_prompt(content, context, item_type)
+        return await self._request(prompt, item_type, context)
+    
+    def _batch_body(self, prompt: str) -> dict:
+        """Request body of a prompt in a batch input file."""
+        return {"model": self.model, "prompt": prompt}
+    
+    def _batch_prompt(self, body: dict) -> str:
+        """Prompt of a batch request body."""
+        return body["prompt"]
+    
+    def batch_backend(self) -> BatchBackend:
+        """
+        Backend for batch mode: the provider's batch API if it has one,
+        else the local stand-in, which sends the requests one by one.
+        """
+        async def respond(body: dict) -> str:
+            return await self._complete_with_retries(self._batch_prompt(body), "file")
         
-        logger.info(f"OpenAI: Calling API with model {self.model}")
-        response = self.client.chat.completions.create(
-            model=self.model,
-            messages=[{"role": "user", "content": prompt}],
-            temperature=0.3,
-            max_tokens=4000,  # Increased for comprehensive summaries
-        )
+        return LocalBatchBackend(get_batch_dir(), respond)
+    
+    async def generate_summaries_batch(
+        self,
+        contents: dict[str, str],
+        item_type: str = "file",
+        batch_id: str | None = None,
+        on_submit: Callable[[str], None] | None = None,
+    ) -> dict[str, str]:
+        """
+        Summarize many contents through one batch submission.
         
-        result = response.choices[0].message.content.strip()
-        logger.info(f"OpenAI: Received response, length: {len(result)}")
+        Cached responses are used without submitting them. The call
+        returns once the batch completes (or fails or times out), which
+        may take hours with provider batch APIs.
+        
+        Args:
+            contents: Contents to summarize by caller-chosen ID
+            item_type: Prompt type, as for `generate_summary`
+            batch_id: Batch an interrupted run submitted, waited for
+                instead of submitting a new one
+            on_submit: Called with the ID of a newly submitted batch
         
-        # Log the LLM call
-        log_llm_call("openai", self.model, prompt, result, item_type, context)
+        Returns:
+            Summaries by ID; contents the batch did not answer are absent
+        """
+        cache = get_response_cache()
+        summaries = {}
+        prompts = {}
+        for custom_id, content in contents.items():
+            prompt = self._build_prompt(content, None, item_type)
+            cached = await asyncio.to_thread(
+                cache.get, cache.key(self.provider, self.model, self.temperature, prompt)
+            ) if cache else None
+            if cached is not None:
+                summaries[custom_id] = cached
+            else:
+                prompts[custom_id] = prompt
         
-        return result
+        results = await run_batch(
+            self.batch_backend(),
+            {custom_id: self._batch_body(prompt) for custom_id, prompt in prompts.items()},
+            batch_id=batch_id,
+            on_submit=on_submit,
+        )
+        for custom_id, result in results.items():
+            prompt = prompts.get(custom_id)
+            if prompt is None:
+                # A resumed batch may answer contents this run no longer needs
+                continue
+            log_llm_call(self.provider, self.model, prompt, result, item_type, "batch")
+            if cache:
+                key = cache.key(self.provider, self.model, self.temperature, prompt)
+                await asyncio.to_thread(cache.put, key, result)
+            summaries[custom_id] = result
+        return summaries
     
     def _build_prompt(self, content: str, context: Optional[str] = None, item_type: str = "file") -> str:
-        """Build prompt for summarization optimized for AI agents."""
+        """
+        Build prompt for summarization optimized for AI agents.
+        
+        Args:
+            content: The content to summarize
+            context: Optional context (for chunks and merges, the file path and part)
+            item_type: "file", "folder", "chunk" (part of a large file),
+                "merge" (partial summaries of a large file) or "pack"
+                (several small files, delimited by `file_packing.format_pack`)
+        """
         if item_type == "file":
             prompt = f"""Analyze this code file and provide a comprehensive summary that would help an AI agent understand how to modify it:
 
@@ -118,95 +314,20 @@ File Content:
 {content}
 
 Provide a detailed summary that enables an AI agent to programmatically modify this file:"""
-        else:  # folder
-            prompt = f"""Analyze this folder/directory structure and provide a comprehensive summary:
+        elif item_type == "chunk":
+            prompt = f"""This is one part of a larger code file ({context}). Summarize this part so it can later be combined with the summaries of the other parts:
 
-The folder structure and contents are provided below. Use this information to generate a detailed summary.
+1. **Contents**: What functions, classes, methods or sections does this part define, and what does each do?
+2. **Dependencies**: What imports, modules or external names does it use?
+3. **Configuration**: What configuration options, environment variables, or parameters does it use?
+4. **Notes**: Any patterns, side effects or cross-references worth knowing when modifying this part
 
+File Part:
 {content}
 
-1. **Purpose**: What is the purpose of this folder? What role does it play in the project?
-2. **Structure**: What files and subdirectories does it contain? (Use the structure provided above)
-3. **Relationships**: How do the files in this folder relate to each other?
-4. **Dependencies**: What dependencies does this folder have on other parts of the project?
-5. **Modification Guide**: How would an AI agent add new files or modify existing ones in this folder?
-
-Provide a detailed summary that enables an AI agent to understand and modify this folder structure:"""
-        
-        return prompt
-
-
-class OllamaService(LLMService):
-    """Ollama LLM service."""
-    
-    def __init__(self):
-        self.base_url = settings.ollama_base_url
-        self.model = settings.ollama_model
-    
-    async def answer_question(self, question: str, context: str) -> str:
-        """Answer a question using Ollama."""
-        prompt = f"""You are a code assistant helping a developer understand and modify a codebase. Answer the following question with specific, actionable information.
-
-Question: {question}
-
-Repository Context:
-{context}
-
-Instructions:
-1. Provide a specific, direct answer to the question
-2. If the question asks about where something is defined or how to change it, specify the exact file path(s) and relevant code sections
-3. If code changes are needed, provide specific examples showing what to change
-4. Reference the file paths from the context above
-5. Be concise but complete - focus on answering the question directly
-
-Answer:"""
-        
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                f"{self.base_url}/api/generate",
-                json={
-                    "model": self.model,
-                    "prompt": prompt,
-                    "stream": False,
-                },
-                timeout=60.0,
-            )
-            response.raise_for_status()
-            result = response.json()
-            answer = result.get("response", "").strip()
-            
-            # Log the LLM call
-            log_llm_call("ollama", self.model, prompt, answer, "qa", context)
-            
-            return answer
-    
-    async def generate_summary(self, content: str, context: Optional[str] = None, item_type: str = "file") -> str:
-        """Generate summary using Ollama."""
-        prompt = self._build_prompt(content, context, item_type)
-        
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                f"{self.base_url}/api/generate",
-                json={
-                    "model": self.model,
-                    "prompt": prompt,
-                    "stream": False,
-                },
-                timeout=60.0,
-            )
-            response.raise_for_status()
-            result = response.json()
-            summary = result.get("response", "").strip()
-            
-            # Log the LLM call
-            log_llm_call("ollama", self.model, prompt, summary, item_type, context)
-            
-            return summary
-    
-    def _build_prompt(self, content: str, context: Optional[str] = None, item_type: str = "file") -> str:
-        """Build prompt for summarization optimized for AI agents."""
-        if item_type == "file":
-            prompt = f"""Analyze this code file and provide a comprehensive summary that would help an AI agent understand how to modify it:
+Provide a concise but complete summary of this part:"""
+        elif item_type == "merge":
+            prompt = f"""The following are summaries of consecutive parts of a large code file ({context}). Combine them into a single comprehensive summary of the whole file that would help an AI agent understand how to modify it:
 
 1. **Purpose**: What does this file do? What is its main responsibility?
 2. **Key Functions/Classes**: List all important functions, classes, methods, and their purposes
@@ -216,10 +337,23 @@ Answer:"""
 6. **Modification Guide**: How would an AI agent modify this file to add new features or change behavior?
 7. **Important Patterns**: What coding patterns, conventions, or architectural decisions are used?
 
-File Content:
+Part Summaries:
 {content}
 
 Provide a detailed summary that enables an AI agent to programmatically modify this file:"""
+        elif item_type == "pack":
+            prompt = f"""Below are several small code files from the same folder, each between <<< FILE: path >>> and <<< END FILE: path >>> markers. Summarize each file separately so an AI agent would understand how to modify it:
+
+1. **Purpose**: What does this file do? What is its main responsibility?
+2. **Key Functions/Classes**: List all important functions, classes, methods, and their purposes
+3. **Dependencies**: What other files/modules does this depend on?
+4. **Configuration**: What configuration options, environment variables, or parameters does it use?
+5. **Modification Guide**: How would an AI agent modify this file to add new features or change behavior?
+
+Files:
+{content}
+
+Start each file's summary with a line of the form "=== SUMMARY: <path> ===" using the exact path from its marker, cover every file in the order given, and write nothing else outside the summaries:"""
         else:  # folder
             prompt = f"""Analyze this folder/directory structure and provide a comprehensive summary:
 
@@ -236,45 +370,10 @@ The folder structure and contents are provided below. Use this information to ge
 Provide a detailed summary that enables an AI agent to understand and modify this folder structure:"""
         
         return prompt
-
-
-class DeepSeekService(LLMService):
-    """DeepSeek Coding LLM service."""
-    
-    def __init__(self):
-        if not settings.deepseek_api_key:
-            raise ValueError("DeepSeek API key not configured")
-        self.client = openai.OpenAI(
-            api_key=settings.deepseek_api_key,
-            base_url=settings.deepseek_api_base,
-        )
-        # Ensure we're using the coder model, not chat
-        self.model = settings.deepseek_model
-        if self.model == "deepseek-chat":
-            # Auto-upgrade to coder if chat is configured
-            self.model = "deepseek-coder"
     
-    async def generate_summary(self, content: str, context: Optional[str] = None, item_type: str = "file") -> str:
-        """Generate summary using DeepSeek."""
-        prompt = self._build_prompt(content, context, item_type)
-        
-        response = self.client.chat.completions.create(
-            model=self.model,
-            messages=[{"role": "user", "content": prompt}],
-            temperature=0.3,
-            max_tokens=4000,  # Increased for comprehensive summaries
-        )
-        
-        result = response.choices[0].message.content.strip()
-        
-        # Log the LLM call
-        log_llm_call("deepseek", self.model, prompt, result, item_type, context)
-        
-        return result
-    
-    async def answer_question(self, question: str, context: str) -> str:
-        """Answer a question using DeepSeek Coder with Q&A-specific prompt."""
-        prompt = f"""You are a code assistant helping a developer understand and modify a codebase. Answer the following question with specific, actionable information.
+    def _build_qa_prompt(self, question: str, context: str) -> str:
+        """Build the prompt for answering a question from repository context."""
+        return f"""You are a code assistant helping a developer understand and modify a codebase. Answer the following question with specific, actionable information.
 
 Question: {question}
 
@@ -289,62 +388,164 @@ Instructions:
 5. Be concise but complete - focus on answering the question directly
 
 Answer:"""
-        
-        response = self.client.chat.completions.create(
+    
+    async def answer_question(self, question: str, context: str, use_cache: bool = True) -> str:
+        """Answer a question based on provided context (cached unless disabled)."""
+        use_cache = use_cache and settings.llm_cache_qa
+        return await self._request(self._build_qa_prompt(question, context), "qa", context, use_cache)
+    
+    async def stream_answer(self, question: str, context: str, use_cache: bool = True) -> AsyncIterator[str]:
+        """Answer a question based on provided context, yielding the answer as it is generated."""
+        use_cache = use_cache and settings.llm_cache_qa
+        async for part in self._stream_request(
+            self._build_qa_prompt(question, context), "qa", context, use_cache
+        ):
+            yield part
+
+
+class OpenAICompatibleService(LLMService):
+    """
+    Base for providers with an OpenAI-compatible chat completions API.
+    
+    Requests go through `openai.AsyncOpenAI` on the provider's shared
+    connection pool, so they never block the event loop.
+    """
+    
+    api_key: str = ""
+    base_url: str | None = None
+    temperature = 0.3
+    
+    def _client(self) -> openai.AsyncOpenAI:
+        """Async client on the provider's pool for the running event loop."""
+        return openai.AsyncOpenAI(
+            api_key=self.api_key,
+            base_url=self.base_url,
+            http_client=get_http_client(self.provider),
+            max_retries=0,  # Retried by `_complete_with_retries`
+        )
+    
+    async def _complete(self, prompt: str) -> str:
+        """Call the chat completions API."""
+        response = await self._client().chat.completions.create(
             model=self.model,
             messages=[{"role": "user", "content": prompt}],
-            temperature=0.3,
-            max_tokens=4000,
+            temperature=self.temperature,
+            max_tokens=4000,  # Increased for comprehensive summaries
         )
-        
-        result = response.choices[0].message.content.strip()
-        
-        # Log the LLM call with "qa" as item_type
-        log_llm_call("deepseek", self.model, prompt, result, "qa", context)
-        
-        return result
+        return response.choices[0].message.content.strip()
     
-    def _build_prompt(self, content: str, context: Optional[str] = None, item_type: str = "file") -> str:
-        """
-        Build prompt for summarization optimized for AI agents.
-        
-        Args:
-            content: The content to summarize
-            context: Optional context (for folders, this is child summaries)
-            item_type: "file" or "folder"
-        """
-        if item_type == "file":
-            prompt = f"""Analyze this code file and provide a comprehensive summary that would help an AI agent understand how to modify it:
-
-1. **Purpose**: What does this file do? What is its main responsibility?
-2. **Key Functions/Classes**: List all important functions, classes, methods, and their purposes
-3. **Dependencies**: What other files/modules does this depend on?
-4. **Configuration**: What configuration options, environment variables, or parameters does it use?
-5. **Data Flow**: How does data flow through this file? What are the inputs and outputs?
-6. **Modification Guide**: How would an AI agent modify this file to add new features or change behavior?
-7. **Important Patterns**: What coding patterns, conventions, or architectural decisions are used?
-
-File Content:
-{content}
-
-Provide a detailed summary that enables an AI agent to programmatically modify this file:"""
-        else:  # folder
-            prompt = f"""Analyze this folder/directory structure and provide a comprehensive summary:
-
-The folder structure and contents are provided below. Use this information to generate a detailed summary.
+    def _batch_body(self, prompt: str) -> dict:
+        """Chat completions request body for a batch input file."""
+        return {
+            "model": self.model,
+            "messages": [{"role": "user", "content": prompt}],
+            "temperature": self.temperature,
+            "max_tokens": 4000,
+        }
+    
+    def _batch_prompt(self, body: dict) -> str:
+        return body["messages"][0]["content"]
+    
+    async def _stream(self, prompt: str) -> AsyncIterator[str]:
+        """Stream a chat completion."""
+        stream = await self._client().chat.completions.create(
+            model=self.model,
+            messages=[{"role": "user", "content": prompt}],
+            temperature=self.temperature,
+            max_tokens=4000,
+            stream=True,
+        )
+        async for chunk in stream:
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
 
-{content}
 
-1. **Purpose**: What is the purpose of this folder? What role does it play in the project?
-2. **Structure**: What files and subdirectories does it contain? (Use the structure provided above)
-3. **Relationships**: How do the files in this folder relate to each other?
-4. **Dependencies**: What dependencies does this folder have on other parts of the project?
-5. **Modification Guide**: How would an AI agent add new files or modify existing ones in this folder?
+class OpenAIService(OpenAICompatibleService):
+    """OpenAI LLM service."""
+    
+    provider = "openai"
+    
+    def __init__(self):
+        if not settings.openai_api_key:
+            raise ValueError("OpenAI API key not configured")
+        self.api_key = settings.openai_api_key
+        self.model = settings.openai_model
+    
+    def batch_backend(self) -> BatchBackend:
+        """The OpenAI Batch API, unless the local stand-in is configured."""
+        if settings.llm_batch_backend == "local":
+            return super().batch_backend()
+        return OpenAIBatchBackend(self.api_key)
+    
+    async def _complete(self, prompt: str) -> str:
+        """Call the OpenAI chat completions API."""
+        logger.info(f"OpenAI: Calling API with model {self.model}, prompt length: {len(prompt)}")
+        result = await super()._complete(prompt)
+        logger.info(f"OpenAI: Received response, length: {len(result)}")
+        return result
+    
 
-Provide a detailed summary that enables an AI agent to understand and modify this folder structure:"""
-        
-        return prompt
+class OllamaService(LLMService):
+    """Ollama LLM service."""
+    
+    provider = "ollama"
+    
+    def __init__(self):
+        self.base_url = settings.ollama_base_url
+        self.model = settings.ollama_model
+    
+    async def _complete(self, prompt: str) -> str:
+        """Call the Ollama generate API."""
+        response = await get_http_client(self.provider).post(
+            f"{self.base_url}/api/generate",
+            json={
+                "model": self.model,
+                "prompt": prompt,
+                "stream": False,
+            },
+        )
+        response.raise_for_status()
+        result = response.json()
+        return result.get("response", "").strip()
+    
+    async def _stream(self, prompt: str) -> AsyncIterator[str]:
+        """Stream from the Ollama generate API (one JSON object per line)."""
+        async with get_http_client(self.provider).stream(
+            "POST",
+            f"{self.base_url}/api/generate",
+            json={
+                "model": self.model,
+                "prompt": prompt,
+                "stream": True,
+            },
+        ) as response:
+            response.raise_for_status()
+            async for line in response.aiter_lines():
+                if not line.strip():
+                    continue
+                chunk = json.loads(line)
+                if chunk.get("response"):
+                    yield chunk["response"]
+                if chunk.get("done"):
+                    break
+    
 
+class DeepSeekService(OpenAICompatibleService):
+    """DeepSeek Coding LLM service."""
+    
+    provider = "deepseek"
+    
+    def __init__(self):
+        if not settings.deepseek_api_key:
+            raise ValueError("DeepSeek API key not configured")
+        self.api_key = settings.deepseek_api_key
+        self.base_url = settings.deepseek_api_base
+        # Ensure we're using the coder model, not chat
+        self.model = settings.deepseek_model
+        if self.model == "deepseek-chat":
+            # Auto-upgrade to coder if chat is configured
+            self.model = "deepseek-coder"
+    
 
 def get_llm_service() -> LLMService:
     """Get the configured LLM service."""
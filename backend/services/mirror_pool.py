@@ -0,0 +1,279 @@
+"""Bare mirror repositories with a worktree per analysis.
+
+Every repository is fetched into one bare mirror under
+`<cache_dir>/.mirrors`. An analysis checks out the commit it works on
+into its own worktree under `<cache_dir>/.worktrees`, sharing the
+mirror's objects; when the analysis succeeds, its worktree replaces the
+browsable checkout at `get_repo_cache_path`. A failed fetch or analysis
+leaves the mirror and the published checkout untouched.
+"""
+import os
+import uuid
+import shutil
+import socket
+import logging
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from git import Repo
+from git.exc import GitCommandError, InvalidGitRepositoryError, NoSuchPathError
+from gitdb.exc import BadName, BadObject
+from backend.config import settings
+from backend.services.git_service import get_repo_cache_path
+from backend.services.process_utils import process_alive
+
+try:
+    import fcntl
+except ImportError:  # Windows: mirrors are only locked within a process
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+MIRROR_DIR = ".mirrors"
+WORKTREE_DIR = ".worktrees"
+
+
+@dataclass
+class CloneStats:
+    """Cost of getting a repository up to date."""
+    mode: str
+    seconds: float = 0.0
+    bytes_received: int = 0  # Growth of the object database
+    object_bytes: int = 0  # Size of the object database afterwards
+
+    def as_metrics(self) -> dict:
+        """Task metrics for these stats."""
+        return {
+            "clone_mode": self.mode,
+            "clone_seconds": round(self.seconds, 2),
+            "clone_bytes_received": self.bytes_received,
+            "repo_object_bytes": self.object_bytes,
+        }
+
+
+@dataclass
+class Checkout:
+    """A worktree of a repository at the commit being analyzed."""
+    repo_url: str
+    path: str
+    commit: str
+    stats: CloneStats
+    published: bool = False
+
+
+def get_mirror_path(repo_url: str) -> Path:
+    """Path of a repository's bare mirror."""
+    return Path(settings.cache_dir) / MIRROR_DIR / f"{get_repo_cache_path(repo_url).name}.git"
+
+
+def _clone_mode() -> str:
+    """Configured clone mode; sparse without paths is plain blobless."""
+    if settings.clone_mode == "sparse" and not _sparse_paths():
+        return "blobless"
+    return settings.clone_mode
+
+
+def _sparse_paths() -> list[str]:
+    """Folders to check out in sparse mode."""
+    return [path.strip().strip("/") for path in settings.clone_sparse_paths.split(",") if path.strip()]
+
+
+def _object_store_size(repo: Repo) -> int:
+    """Bytes used by a repository's loose and packed objects."""
+    counts = {}
+    for line in repo.git.count_objects("-v").splitlines():
+        key, _, value = line.partition(":")
+        counts[key.strip()] = value.strip()
+    return (int(counts.get("size", 0)) + int(counts.get("size-pack", 0))) * 1024
+
+
+@contextmanager
+def _mirror_lock(mirror_path: Path):
+    """Serialize fetches and worktree changes of a mirror across processes."""
+    mirror_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(f"{mirror_path}.lock", "w") as lock_file:
+        if fcntl:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def _open_mirror(repo_url: str, mirror_path: Path, mode: str) -> Repo:
+    """Open a repository's mirror, creating it on first use (lock held)."""
+    try:
+        return Repo(mirror_path)
+    except (InvalidGitRepositoryError, NoSuchPathError):
+        shutil.rmtree(mirror_path, ignore_errors=True)
+
+    # Checkouts from before the mirror pool already hold the objects
+    legacy_path = get_repo_cache_path(repo_url)
+    if (legacy_path / ".git").is_dir():
+        try:
+            mirror = Repo.clone_from(str(legacy_path), str(mirror_path), bare=True)
+            mirror.git.remote("set-url", "origin", repo_url)
+            logger.info(f"Seeded mirror {mirror_path.name} from {legacy_path}")
+            return mirror
+        except GitCommandError as e:
+            logger.warning(f"Could not seed mirror from {legacy_path}: {str(e)}")
+            shutil.rmtree(mirror_path, ignore_errors=True)
+
+    options = {"bare": True}
+    if mode == "shallow":
+        options.update(depth=1, single_branch=True)
+    elif mode in ("blobless", "sparse"):
+        # Commits and trees only; blobs are fetched when checked out
+        options["filter"] = "blob:none"
+    try:
+        return Repo.clone_from(repo_url, str(mirror_path), **options)
+    except GitCommandError:
+        shutil.rmtree(mirror_path, ignore_errors=True)
+        raise
+
+
+def _fetch(mirror: Repo, ref: str, mode: str, base_commit: str | None) -> str:
+    """Fetch only `ref` into the mirror and return its commit (lock held)."""
+    depth = ["--depth", "1"] if mode == "shallow" else []
+    mirror.git.fetch(*depth, "origin", ref)
+    commit = mirror.git.rev_parse("FETCH_HEAD^{commit}")
+
+    if mode == "shallow" and base_commit:
+        # The previously analyzed commit lets the analyzer diff instead of
+        # re-reading every file; servers may refuse to serve it by SHA
+        try:
+            mirror.commit(base_commit)
+        except (ValueError, BadName, BadObject):
+            try:
+                mirror.git.fetch("--depth", "1", "origin", base_commit)
+            except GitCommandError:
+                pass
+    return commit
+
+
+def _remove_worktree(mirror: Repo, path: Path):
+    """Remove a worktree directory and its registration (lock held)."""
+    try:
+        mirror.git.worktree("remove", "--force", str(path))
+    except GitCommandError:
+        shutil.rmtree(path, ignore_errors=True)
+        mirror.git.worktree("prune")
+
+
+def _remove_abandoned_worktrees(mirror: Repo, prefix: str):
+    """Remove worktrees left behind by processes on this host that died (lock held)."""
+    worktree_root = Path(settings.cache_dir) / WORKTREE_DIR
+    if not worktree_root.exists():
+        return
+    host_prefix = f"{prefix}-{socket.gethostname()}-"
+    for path in worktree_root.iterdir():
+        if not path.name.startswith(host_prefix):
+            continue
+        pid = path.name[len(host_prefix):].split("-")[0]
+        if pid.isdigit() and not process_alive(int(pid)):
+            logger.info(f"Removing abandoned worktree {path.name}")
+            _remove_worktree(mirror, path)
+
+
+def acquire_checkout(repo_url: str, ref: str = "HEAD", base_commit: str | None = None) -> Checkout:
+    """
+    Update a repository's mirror and check out `ref` into a new worktree.
+
+    `settings.clone_mode` selects how much a new mirror downloads: "full"
+    history, a "shallow" single-commit clone, a "blobless" partial clone
+    (history without file contents, fetched as files are read), or
+    "sparse", which is blobless and checks out only
+    `settings.clone_sparse_paths`. Updates fetch only `ref`. Blobless
+    worktrees are left unpopulated: files are read from the object
+    database and browsed through the git tree.
+
+    Args:
+        repo_url: URL of the repository
+        ref: Remote ref to check out
+        base_commit: Previously analyzed commit, fetched in shallow mode
+            so changes can still be diffed
+
+    Returns:
+        Checkout to pass to `publish_checkout` or `release_checkout`
+
+    Raises:
+        GitCommandError: If the repository cannot be fetched
+    """
+    mode = _clone_mode()
+    stats = CloneStats(mode=mode)
+    started = time.monotonic()
+    mirror_path = get_mirror_path(repo_url)
+    name = get_repo_cache_path(repo_url).name
+    worktree_path = (
+        Path(settings.cache_dir) / WORKTREE_DIR
+        / f"{name}-{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:8]}"
+    )
+
+    with _mirror_lock(mirror_path):
+        existed = mirror_path.exists()
+        mirror = _open_mirror(repo_url, mirror_path, mode)
+        size_before = _object_store_size(mirror) if existed else 0
+        commit = _fetch(mirror, ref, mode, base_commit)
+        _remove_abandoned_worktrees(mirror, name)
+
+        worktree_path.parent.mkdir(parents=True, exist_ok=True)
+        mirror.git.worktree("add", "--no-checkout", "--detach", str(worktree_path), commit)
+        try:
+            worktree = Repo(worktree_path)
+            if mode == "sparse":
+                worktree.git.sparse_checkout("set", *_sparse_paths())
+            if mode != "blobless":
+                # Checking out a blobless worktree would fetch every blob;
+                # the analysis reads through `BlobReader` instead
+                worktree.git.reset("--hard")
+        except GitCommandError:
+            _remove_worktree(mirror, worktree_path)
+            raise
+        stats.object_bytes = _object_store_size(mirror)
+
+    stats.bytes_received = max(0, stats.object_bytes - size_before)
+    stats.seconds = time.monotonic() - started
+    return Checkout(repo_url=repo_url, path=str(worktree_path), commit=commit, stats=stats)
+
+
+def publish_checkout(checkout: Checkout):
+    """
+    Make an analyzed checkout the repository's browsable checkout.
+
+    The worktree is moved to `get_repo_cache_path`, replacing the
+    previously published one. Failures are logged, not raised: the
+    analysis itself is complete. Publishing a published checkout does
+    nothing.
+    """
+    if checkout.published:
+        return
+    mirror_path = get_mirror_path(checkout.repo_url)
+    cache_path = get_repo_cache_path(checkout.repo_url)
+    try:
+        with _mirror_lock(mirror_path):
+            mirror = Repo(mirror_path)
+            if (cache_path / ".git").is_file():
+                _remove_worktree(mirror, cache_path)
+            elif cache_path.exists():
+                # Standalone clone from before the mirror pool
+                shutil.rmtree(cache_path, ignore_errors=True)
+            mirror.git.worktree("move", checkout.path, str(cache_path))
+    except Exception as e:
+        logger.warning(f"Could not publish checkout of {checkout.repo_url}: {str(e)}")
+        return
+    checkout.path = str(cache_path)
+    checkout.published = True
+
+
+def release_checkout(checkout: Checkout | None):
+    """Remove an analysis worktree unless it was published."""
+    if checkout is None or checkout.published:
+        return
+    mirror_path = get_mirror_path(checkout.repo_url)
+    try:
+        with _mirror_lock(mirror_path):
+            _remove_worktree(Repo(mirror_path), Path(checkout.path))
+    except Exception as e:
+        logger.warning(f"Could not remove worktree {checkout.path}: {str(e)}")
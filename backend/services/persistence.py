@@ -0,0 +1,176 @@
+"""Batched database writes for repository analysis."""
+import os
+import time
+import uuid
+import logging
+from sqlalchemy.orm import Session
+from backend.config import settings
+from backend.db.upsert import bulk_upsert
+from backend.models.analysis_checkpoint import AnalysisCheckpoint
+from backend.models.blob_summary import BlobSummary
+from backend.models.node import Node
+from backend.models.task import Task
+from backend.services.checkpoint import record_completed
+from backend.services.summary_store import stats as summary_store_stats
+
+logger = logging.getLogger(__name__)
+
+
+class NodeWriter:
+    """
+    Buffers node and blob summary writes and flushes them in bulk.
+
+    Nodes are upserted on (repo_id, path) with a single INSERT ... ON CONFLICT
+    statement per chunk. The buffer is flushed (and committed) every
+    `node_flush_size` nodes or `node_flush_interval` seconds, whichever
+    comes first. With a checkpoint, the flushed nodes are recorded as
+    completed in the same transaction.
+    """
+
+    def __init__(
+        self,
+        db: Session,
+        repo_id: str,
+        flush_size: int | None = None,
+        flush_interval: float | None = None,
+        checkpoint: AnalysisCheckpoint | None = None,
+    ):
+        self.db = db
+        self.repo_id = repo_id
+        self.checkpoint = checkpoint
+        self.flush_size = flush_size or settings.node_flush_size
+        self.flush_interval = (
+            flush_interval if flush_interval is not None else settings.node_flush_interval
+        )
+        self._nodes: dict[str, dict] = {}
+        self._blobs: dict[tuple[str, str], dict] = {}
+        self._completed: dict[str, str | None] = {}
+        self._last_flush = time.monotonic()
+        self.flushed = 0
+
+    @property
+    def pending(self) -> int:
+        """Number of buffered node writes."""
+        return len(self._nodes)
+
+    def add_node(
+        self,
+        path: str,
+        node_type: str,
+        summary: str | None,
+        embedding: list[float] | None = None,
+        name: str | None = None,
+        blob_sha: str | None = None,
+    ):
+        """Buffer an insert-or-update of the node at `path` (files with their blob SHA)."""
+        self._nodes[path] = {
+            "id": str(uuid.uuid4()),
+            "repo_id": self.repo_id,
+            "path": path,
+            "name": name or os.path.basename(path) or "root",
+            "type": node_type,
+            "summary": summary,
+            "embedding": embedding,
+        }
+        self._completed[path] = (blob_sha or "") if node_type == "file" else None
+        self.maybe_flush()
+
+    def add_blob_summary(self, blob_sha: str | None, summary_version: str, summary: str):
+        """Buffer a content-addressed summary; existing entries are kept."""
+        if not blob_sha or not summary:
+            return
+        self._blobs[(blob_sha, summary_version)] = {
+            "blob_sha": blob_sha,
+            "summary_version": summary_version,
+            "summary": summary,
+        }
+
+    def maybe_flush(self):
+        """Flush if the buffer is full or the flush interval has elapsed."""
+        if len(self._nodes) >= self.flush_size or (
+            self._nodes and time.monotonic() - self._last_flush >= self.flush_interval
+        ):
+            self.flush()
+
+    def flush(self) -> int:
+        """
+        Write all buffered rows and commit.
+
+        Returns:
+            Number of nodes written
+        """
+        nodes = list(self._nodes.values())
+        blobs = list(self._blobs.values())
+        completed = dict(self._completed)
+        self._nodes.clear()
+        self._blobs.clear()
+        self._completed.clear()
+        self._last_flush = time.monotonic()
+        if not nodes and not blobs:
+            return 0
+
+        try:
+            bulk_upsert(
+                self.db, Node.__table__, nodes,
+                conflict_columns=["repo_id", "path"],
+                update_columns=["name", "type", "summary", "embedding"],
+            )
+            bulk_upsert(
+                self.db, BlobSummary.__table__, blobs,
+                conflict_columns=["blob_sha", "summary_version"],
+                update_columns=[],
+            )
+            if self.checkpoint is not None:
+                record_completed(self.checkpoint, completed)
+            self.db.commit()
+        except Exception:
+            self.db.rollback()
+            raise
+
+        summary_store_stats.record_write(len(blobs))
+        self.flushed += len(nodes)
+        logger.debug(f"Flushed {len(nodes)} nodes and {len(blobs)} blob summaries")
+        return len(nodes)
+
+
+class ProgressReporter:
+    """Writes task progress at most once every `progress_interval` seconds."""
+
+    def __init__(self, db: Session, task: Task, interval: float | None = None):
+        self.db = db
+        self.task = task
+        self.interval = interval if interval is not None else settings.progress_interval
+        self._last_write = 0.0
+        self._metrics: dict = dict(self.task.metrics or {})
+
+    def increment(self, key: str, amount: int = 1):
+        """Add to a task metric; written with the next progress commit."""
+        if not amount:
+            return
+        self._metrics[key] = self._metrics.get(key, 0) + amount
+        # Assign a new dict so the JSON column is marked as changed
+        self.task.metrics = dict(self._metrics)
+
+    def set_metric(self, key: str, value):
+        """Set a task metric; written with the next progress commit."""
+        self._metrics[key] = value
+        self.task.metrics = dict(self._metrics)
+
+    def update(self, progress: int | None = None, message: str | None = None, force: bool = False):
+        """
+        Record progress; commit only if forced or the interval has elapsed.
+
+        Args:
+            progress: Progress percentage (0-100)
+            message: Status message
+            force: Commit immediately regardless of the interval
+        """
+        if progress is not None:
+            self.task.progress = progress
+        if message is not None:
+            self.task.status_message = message
+
+        now = time.monotonic()
+        if force or now - self._last_write >= self.interval:
+            self.db.commit()
+            self._last_write = now
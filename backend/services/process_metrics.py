@@ -0,0 +1,99 @@
+"""Publishing and summing the in-memory counters of every process."""
+import logging
+from datetime import datetime, timedelta, timezone
+from sqlalchemy.orm import Session
+from backend.db.upsert import bulk_upsert
+from backend.models.process_metrics import ProcessMetrics
+from backend.services.llm_cache import cache_stats
+from backend.services.llm_scheduler import scheduler_stats
+from backend.services.summary_store import stats as summary_store_stats
+
+logger = logging.getLogger(__name__)
+
+# Snapshots of processes silent for longer than this drop out of the totals
+RETENTION = timedelta(days=7)
+
+# Gauges that are combined by taking the largest value instead of the sum
+_MAXIMA = {"paused_ms"}
+
+
+def collect_counters() -> dict:
+    """Snapshot of this process's counters."""
+    return {
+        "summary_store": summary_store_stats.snapshot(),
+        "llm_scheduler": scheduler_stats(),
+        "llm_cache": cache_stats(),
+    }
+
+
+def publish_counters(db: Session, process_id: str, role: str):
+    """
+    Store this process's counters, replacing its previous snapshot. Commits.
+
+    Args:
+        db: Database session
+        process_id: Identifier unique to this process
+        role: "api" or "worker"
+    """
+    now = datetime.now(timezone.utc)
+    bulk_upsert(
+        db,
+        ProcessMetrics.__table__,
+        [{"process_id": process_id, "role": role, "counters": collect_counters(), "updated_at": now}],
+        ["process_id"],
+        ["role", "counters", "updated_at"],
+    )
+    db.query(ProcessMetrics).filter(ProcessMetrics.updated_at < now - RETENTION).delete()
+    db.commit()
+
+
+def _add(total: dict, counters: dict):
+    """Add one process's counters to running totals."""
+    for key, value in counters.items():
+        if isinstance(value, dict):
+            _add(total.setdefault(key, {}), value)
+        elif key == "avg_wait_ms":
+            # Weighted by requests, averaged again in `_finish`
+            total["_wait_ms"] = total.get("_wait_ms", 0.0) + value * counters.get("admitted", 0)
+            total.setdefault(key, 0.0)
+        elif key == "hit_rate" or isinstance(value, bool) or not isinstance(value, (int, float)):
+            total.setdefault(key, value)
+        elif key.startswith("max_") or key in _MAXIMA:
+            total[key] = max(total.get(key) or 0, value)
+        else:
+            total[key] = (total.get(key) or 0) + value
+
+
+def _finish(total: dict):
+    """Recompute rates and averages from the summed counters."""
+    for value in total.values():
+        if isinstance(value, dict):
+            _finish(value)
+    if "hit_rate" in total:
+        hits = total.get("hits", total.get("memory_hits", 0) + total.get("disk_hits", 0))
+        lookups = hits + total.get("misses", 0)
+        total["hit_rate"] = round(hits / lookups, 4) if lookups else 0.0
+    if "_wait_ms" in total:
+        admitted = total.get("admitted", 0)
+        total["avg_wait_ms"] = round(total.pop("_wait_ms") / admitted, 1) if admitted else 0.0
+
+
+def aggregate_counters(db: Session) -> dict:
+    """
+    Sum the published counters of all processes.
+
+    Counters add up; maxima and gauges such as a pause take the largest
+    value; hit rates and average waits are recomputed from the sums.
+
+    Returns:
+        Totals shaped like `collect_counters`, plus the number of processes
+        by role under "processes"
+    """
+    total: dict = {}
+    processes: dict[str, int] = {}
+    for role, counters in db.query(ProcessMetrics.role, ProcessMetrics.counters):
+        processes[role] = processes.get(role, 0) + 1
+        _add(total, counters or {})
+    _finish(total)
+    total["processes"] = processes
+    return total
@@ -0,0 +1,13 @@
+"""Helpers for processes running on this host."""
+import os
+
+
+def process_alive(pid: int) -> bool:
+    """Check whether a process with this PID exists on this host."""
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
@@ -0,0 +1,170 @@
+"""Compression of file contents before they are sent to the LLM."""
+import os
+import re
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Comment syntax by file extension: (line comment prefix, block start, block end)
+_HASH = ("#", None, None)
+_SLASH = ("//", "/*", "*/")
+_DASH = ("--", None, None)
+_MARKUP = (None, "<!--", "-->")
+_COMMENT_STYLES = {
+    **dict.fromkeys((
+        ".py", ".pyi", ".pyx", ".sh", ".bash", ".zsh", ".rb", ".pl", ".pm", ".r", ".yaml",
+        ".yml", ".toml", ".cfg", ".conf", ".cmake", ".tf", ".ex", ".exs", ".jl", ".nim", ".ps1",
+    ), _HASH),
+    **dict.fromkeys((
+        ".c", ".h", ".cc", ".cpp", ".cxx", ".hpp", ".hh", ".m", ".mm", ".java", ".js", ".jsx",
+        ".mjs", ".cjs", ".ts", ".tsx", ".go", ".rs", ".swift", ".kt", ".kts", ".scala", ".cs",
+        ".dart", ".php", ".groovy", ".gradle", ".css", ".scss", ".less", ".proto", ".sol", ".zig",
+    ), _SLASH),
+    **dict.fromkeys((".sql", ".lua", ".hs", ".elm", ".ada"), _DASH),
+    **dict.fromkeys((".html", ".htm", ".xml", ".xsd", ".vue", ".svelte"), _MARKUP),
+}
+_HASH_NAMES = {"makefile", "dockerfile", "gemfile", "rakefile", "vagrantfile", "build", "workspace"}
+
+_LICENSE = re.compile(
+    r"copyright|\blicen[cs]e|spdx-license-identifier|all rights reserved|"
+    r"permission is hereby granted|without warranty",
+    re.IGNORECASE,
+)
+# Comment lines that are only a separator, e.g. "# =========" or "/* ******** */"
+_BANNER = re.compile(r"^\s*(?:#+|//+|/\*+|\*+|--+|<!--)?\s*([=\-*#/~+_])\1{9,}\s*(?:\*+/|-->)?\s*$")
+# Long unbroken base64/hex runs (embedded images, keys, fonts, ...)
+_ENCODED = re.compile(r"[A-Za-z0-9+/_-]{200,}={0,2}")
+# What a line of a literal table consists of: strings, numbers, constants, punctuation
+_LITERAL_TOKENS = re.compile(
+    r'"(?:[^"\\]|\\.)*"|\'(?:[^\'\\]|\\.)*\'|'
+    r"-?(?:0[xX][0-9a-fA-F]+|\d+(?:\.\d*)?(?:[eE][+-]?\d+)?)[uUlLfF]*|"
+    r"\b(?:true|false|null|nil|None|True|False)\b|[\s,;:\[\](){}]"
+)
+# Lines of an elided literal table that are kept to show its shape
+_LITERAL_KEEP_LINES = 5
+
+LICENSE_PLACEHOLDER = "[license header removed]"
+
+
+def _comment_style(path: str) -> tuple[str | None, str | None, str | None] | None:
+    """Comment syntax of a file, or None for data and prose files."""
+    name = os.path.basename(path).lower()
+    if name in _HASH_NAMES:
+        return _HASH
+    return _COMMENT_STYLES.get(os.path.splitext(name)[1])
+
+
+def _strip_license_header(lines: list[str], style: tuple) -> list[str]:
+    """
+    Replace a leading comment block that holds a license.
+
+    Only comments are considered: a module docstring documents the code,
+    even when it mentions a license or copyright.
+    """
+    line_prefix, block_start, block_end = style
+    start = 0
+    # Shebang, encoding and document prolog lines stay
+    while start < len(lines) and (
+        not lines[start].strip() or lines[start].startswith(("#!", "<?", "<!DOCTYPE", "<!doctype"))
+        or "-*- coding" in lines[start]
+    ):
+        start += 1
+    if start >= len(lines):
+        return lines
+
+    first = lines[start].lstrip()
+    end = None
+    if block_start and first.startswith(block_start):
+        for index in range(start, len(lines)):
+            text = lines[index].lstrip()
+            if block_end in (text[len(block_start):] if index == start else text):
+                end = index + 1
+                break
+    elif line_prefix and first.startswith(line_prefix):
+        end = start
+        while end < len(lines) and lines[end].lstrip().startswith(line_prefix):
+            end += 1
+    if end is None or not _LICENSE.search("\n".join(lines[start:end])):
+        return lines
+
+    prefix = f"{line_prefix} " if line_prefix else f"{style[1]} "
+    suffix = "" if line_prefix else f" {style[2]}"
+    return lines[:start] + [f"{prefix}{LICENSE_PLACEHOLDER}{suffix}"] + lines[end:]
+
+
+def _elide_encoded(match: re.Match) -> str:
+    """Placeholder for an encoded run; runs without both letters and digits (rulers, ...) stay."""
+    text = match.group()
+    if not (any(char.isdigit() for char in text) and any(char.isalpha() for char in text)):
+        return text
+    return f"[{len(text)} chars of encoded data elided]"
+
+
+def _is_literal_line(line: str) -> bool:
+    """Check whether a line holds nothing but literals and punctuation."""
+    stripped = line.strip()
+    return bool(stripped) and not _LITERAL_TOKENS.sub("", stripped)
+
+
+def _elide_literal_runs(lines: list[str], min_lines: int) -> list[str]:
+    """Shorten runs of at least `min_lines` literal-only lines to their first few."""
+    result, run = [], []
+
+    def end_run():
+        if len(run) >= min_lines:
+            indent = run[0][:len(run[0]) - len(run[0].lstrip())]
+            result.extend(run[:_LITERAL_KEEP_LINES])
+            result.append(f"{indent}... [{len(run) - _LITERAL_KEEP_LINES} more lines of data elided]")
+        else:
+            result.extend(run)
+        run.clear()
+
+    for line in lines:
+        if _is_literal_line(line):
+            run.append(line)
+            continue
+        end_run()
+        result.append(line)
+    end_run()
+    return result
+
+
+def _collapse_blank_lines(lines: list[str]) -> list[str]:
+    """Strip trailing whitespace and collapse runs of blank lines into one."""
+    result = []
+    for line in lines:
+        line = line.rstrip()
+        if line or (result and result[-1]):
+            result.append(line)
+    while result and not result[-1]:
+        result.pop()
+    return result
+
+
+def compress_source(path: str, content: str, min_literal_lines: int = 30) -> str:
+    """
+    Shrink file content for a summary prompt without losing what it means.
+
+    All files get trailing whitespace stripped, blank line runs collapsed
+    and long base64/hex runs replaced with a placeholder. Source files
+    (recognized by extension) also lose a leading license header, comment
+    separator lines and all but the first few lines of literal tables.
+    Indentation is kept, so the structure of the code stays visible.
+
+    Args:
+        path: File path, used to pick the comment syntax
+        content: File content
+        min_literal_lines: Shortest run of literal-only lines that is elided
+
+    Returns:
+        The compressed content
+    """
+    content = _ENCODED.sub(_elide_encoded, content)
+    lines = content.splitlines()
+    style = _comment_style(path)
+    if style:
+        lines = _strip_license_header(lines, style)
+        lines = [line for line in lines if not _BANNER.match(line)]
+        if min_literal_lines > 0:
+            lines = _elide_literal_runs(lines, min_literal_lines)
+    return "\n".join(_collapse_blank_lines(lines))
@@ -3,12 +3,13 @@ from sqlalchemy.orm import Session
 from backend.models.node import Node
 from backend.services.llm_service import get_llm_service
 from backend.services.embedding_service import search_summaries
-from typing import Dict, List
+from backend.services.lazy_summary import ensure_summary, unsummarized_mentions
+from typing import AsyncIterator, Dict, List
 
 
-async def answer_question(db: Session, repo_id: str, question: str) -> Dict[str, List[str] | str]:
+async def build_context(db: Session, repo_id: str, question: str) -> tuple[str, List[str]]:
     """
-    Answer a question about a repository using context from summaries.
+    Collect the summaries relevant to a question.
     
     Args:
         db: Database session
@@ -16,8 +17,13 @@ async def answer_question(db: Session, repo_id: str, question: str) -> Dict[str,
         question: User's question
         
     Returns:
-        Dictionary with 'answer' and 'sources' (list of file paths)
+        Tuple of (context for the Q&A prompt, source paths)
     """
+    # A lazily analyzed repository may not have summarized the files the
+    # question names yet; summarize them first so the search can find them
+    for path in unsummarized_mentions(db, repo_id, question):
+        await ensure_summary(db, repo_id, path)
+    
     # Search for relevant summaries within this repository
     search_results = search_summaries(db, question, limit=10, repo_id=repo_id)
     
@@ -42,21 +48,58 @@ async def answer_question(db: Session, repo_id: str, question: str) -> Dict[str,
             Node.path == "",
             Node.parent_id.is_(None)
         ).first()
+        if root_node and not root_node.summary:
+            await ensure_summary(db, repo_id, "")
+            db.refresh(root_node)
         if root_node and root_node.summary:
             relevant_summaries.append(f"## Repository Overview\n{root_node.summary}")
             sources.append(root_node.path or "root")
     
     # Build context from relevant summaries
-    context = "\n\n".join(relevant_summaries)
+    return "\n\n".join(relevant_summaries), sources
+
+
+async def answer_question(
+    db: Session, repo_id: str, question: str, use_cache: bool = True
+) -> Dict[str, List[str] | str]:
+    """
+    Answer a question about a repository using context from summaries.
+    
+    Args:
+        db: Database session
+        repo_id: Repository ID
+        question: User's question
+        use_cache: Whether an identical earlier answer may be reused
+        
+    Returns:
+        Dictionary with 'answer' and 'sources' (list of file paths)
+    """
+    context, sources = await build_context(db, repo_id, question)
     
     # Generate answer using LLM's Q&A method (not summary method)
     llm_service = get_llm_service()
     
     # Use the answer_question method which has proper Q&A prompt
-    answer = await llm_service.answer_question(question, context)
+    answer = await llm_service.answer_question(question, context, use_cache)
     
     return {
         "answer": answer,
         "sources": sources,
     }
 
+
+async def stream_answer(
+    db: Session, repo_id: str, question: str, use_cache: bool = True
+) -> AsyncIterator[tuple[str, dict]]:
+    """
+    Answer a question, yielding events as the answer is generated.
+    
+    Yields:
+        ("sources", {"sources": [...]}) first, then ("token", {"text": ...})
+        for each piece of the answer
+    """
+    context, sources = await build_context(db, repo_id, question)
+    yield "sources", {"sources": sources}
+    
+    async for text in get_llm_service().stream_answer(question, context, use_cache):
+        yield "token", {"text": text}
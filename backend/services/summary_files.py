@@ -1,14 +1,32 @@
 """Helper functions for managing summary files in repository cache."""
 import os
 from pathlib import Path
+from backend.config import settings
 
+# Summary files live under <cache_dir>/.summaries/<repo name>, outside the
+# repository worktree, mirroring the repository layout
+SUMMARY_DIR = ".summaries"
 
-def get_summary_file_path(repo_path: str, item_path: str, item_type: str, repo_name: str = None) -> Path:
+
+def get_summary_root(repo_name: str) -> Path:
+    """
+    Get the directory holding a repository's summary files.
+    
+    Args:
+        repo_name: Repository name (the cache directory name)
+        
+    Returns:
+        Path to the summary root
+    """
+    return Path(settings.cache_dir) / SUMMARY_DIR / repo_name
+
+
+def get_summary_file_path(summary_root: str, item_path: str, item_type: str, repo_name: str = None) -> Path:
     """
     Get the path to the summary file for an item.
     
     Args:
-        repo_path: Path to the repository root
+        summary_root: Directory holding the repository's summary files
         item_path: Path to the file/folder relative to repo root
         item_type: "file" or "folder"
         repo_name: Repository name (for root summary naming)
@@ -16,14 +34,14 @@ def get_summary_file_path(repo_path: str, item_path: str, item_type: str, repo_n
     Returns:
         Path to the summary .md file
     """
-    repo_root = Path(repo_path)
+    repo_root = Path(summary_root)
     
     if item_type == "file":
-        # For files: <file>.md alongside the original file
+        # For files: <file>.md at the file's path
         file_path = repo_root / item_path
         return file_path.parent / f"{file_path.name}.md"
     else:
-        # For folders: <folder>.md in parent directory (or <repo>.md for root)
+        # For folders: <folder>.md next to the folder (or <repo>.md for root)
         if not item_path:
             # Root folder: <repository>.md at repo root
             if repo_name:
@@ -39,15 +57,15 @@ def get_summary_file_path(repo_path: str, item_path: str, item_type: str, repo_n
             return parent_dir / f"{folder_name}.md"
 
 
-def summary_exists(repo_path: str, item_path: str, item_type: str, repo_name: str = None) -> bool:
+def summary_exists(summary_root: str, item_path: str, item_type: str, repo_name: str = None) -> bool:
     """Check if a summary file already exists."""
-    summary_path = get_summary_file_path(repo_path, item_path, item_type, repo_name)
+    summary_path = get_summary_file_path(summary_root, item_path, item_type, repo_name)
     return summary_path.exists()
 
 
-def read_summary(repo_path: str, item_path: str, item_type: str, repo_name: str = None) -> str | None:
+def read_summary(summary_root: str, item_path: str, item_type: str, repo_name: str = None) -> str | None:
     """Read an existing summary from file."""
-    summary_path = get_summary_file_path(repo_path, item_path, item_type, repo_name)
+    summary_path = get_summary_file_path(summary_root, item_path, item_type, repo_name)
     if summary_path.exists():
         try:
             return summary_path.read_text(encoding="utf-8")
@@ -56,10 +74,15 @@ def read_summary(repo_path: str, item_path: str, item_type: str, repo_name: str
     return None
 
 
-def write_summary(repo_path: str, item_path: str, item_type: str, summary: str, repo_name: str = None):
+def write_summary(summary_root: str, item_path: str, item_type: str, summary: str, repo_name: str = None):
     """Write a summary to file."""
-    summary_path = get_summary_file_path(repo_path, item_path, item_type, repo_name)
+    summary_path = get_summary_file_path(summary_root, item_path, item_type, repo_name)
     # Ensure parent directory exists
     summary_path.parent.mkdir(parents=True, exist_ok=True)
     summary_path.write_text(summary, encoding="utf-8")
 
+
+def remove_summary(summary_root: str, item_path: str, item_type: str, repo_name: str = None):
+    """Remove a summary file if it exists."""
+    summary_path = get_summary_file_path(summary_root, item_path, item_type, repo_name)
+    summary_path.unlink(missing_ok=True)
@@ -0,0 +1,66 @@
+"""Global content-addressed store for file summaries."""
+import threading
+from sqlalchemy.orm import Session
+from backend.models.blob_summary import BlobSummary
+
+
+class SummaryStoreStats:
+    """Process-wide hit/miss counters for the summary store."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+
+    def record(self, hits: int, misses: int):
+        with self._lock:
+            self.hits += hits
+            self.misses += misses
+
+    def record_write(self, count: int = 1):
+        with self._lock:
+            self.writes += count
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "writes": self.writes,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+
+stats = SummaryStoreStats()
+
+# Keep IN (...) lists well below database parameter limits
+LOOKUP_BATCH_SIZE = 500
+
+
+def get_blob_summaries(db: Session, blob_shas: list[str], summary_version: str) -> dict[str, str]:
+    """
+    Look up stored summaries for many blobs at once.
+
+    Args:
+        db: Database session
+        blob_shas: Git blob SHAs of the file contents
+        summary_version: Provider/model/prompt version key
+
+    Returns:
+        Dictionary of blob SHA -> stored summary (misses are absent)
+    """
+    unique_shas = sorted({sha for sha in blob_shas if sha})
+    found: dict[str, str] = {}
+
+    for start in range(0, len(unique_shas), LOOKUP_BATCH_SIZE):
+        batch = unique_shas[start:start + LOOKUP_BATCH_SIZE]
+        rows = db.query(BlobSummary.blob_sha, BlobSummary.summary).filter(
+            BlobSummary.summary_version == summary_version,
+            BlobSummary.blob_sha.in_(batch)
+        ).all()
+        found.update({sha: summary for sha, summary in rows})
+
+    stats.record(hits=len(found), misses=len(unique_shas) - len(found))
+    return found
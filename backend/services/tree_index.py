@@ -0,0 +1,148 @@
+"""In-memory index of a repository tree for building folder contexts."""
+from collections import deque
+from sqlalchemy.orm import Session
+from backend.models.node import Node
+from backend.services.folder_scheduler import ROOT_PATH, parent_path
+
+
+class TreeIndex:
+    """
+    Repository tree with O(1) access to each folder's direct children.
+
+    Built once per analysis from the git tree, it replaces per-folder
+    database queries and directory listings. Summaries are attached as
+    nodes are summarized (or loaded once from the database for nodes
+    that are not re-summarized).
+    """
+
+    def __init__(self):
+        self._types: dict[str, str] = {ROOT_PATH: "folder"}
+        self._children: dict[str, list[str]] = {ROOT_PATH: []}
+        self._summaries: dict[str, str] = {}
+
+    @classmethod
+    def from_file_tree(cls, file_tree: list[dict]) -> "TreeIndex":
+        """
+        Build an index from `git_service.get_file_tree` output.
+
+        Args:
+            file_tree: List of file/folder dictionaries with path and type
+
+        Returns:
+            Populated TreeIndex
+        """
+        index = cls()
+        for item in file_tree:
+            index.add(item["path"], item["type"])
+        return index
+
+    def add(self, path: str, item_type: str):
+        """Add a file or folder (and any missing parent folders)."""
+        if path in self._types:
+            return
+        self._types[path] = item_type
+        if item_type == "folder":
+            self._children.setdefault(path, [])
+        parent = parent_path(path)
+        if parent not in self._types:
+            self.add(parent, "folder")
+        self._children[parent].append(path)
+
+    def __contains__(self, path: str) -> bool:
+        return path in self._types
+
+    def node_type(self, path: str) -> str | None:
+        """Get "file" or "folder" for a path, or None if unknown."""
+        return self._types.get(path)
+
+    def children(self, path: str) -> list[str]:
+        """Get the direct children of a folder, folders first, then by name."""
+        children = self._children.get(path, [])
+        return sorted(
+            children,
+            key=lambda child: (self._types[child] == "file", _name(child).lower()),
+        )
+
+    def set_summary(self, path: str, summary: str | None):
+        """Attach a summary to a node."""
+        if summary:
+            self._summaries[path] = summary
+
+    def drop_summary(self, path: str):
+        """Detach a node's summary."""
+        self._summaries.pop(path, None)
+
+    def get_summary(self, path: str) -> str | None:
+        """Get the summary attached to a node."""
+        return self._summaries.get(path)
+
+    def load_summaries(self, db: Session, repo_id: str):
+        """Attach existing summaries for all nodes of a repository in one query."""
+        rows = db.query(Node.path, Node.summary).filter(
+            Node.repo_id == repo_id,
+            Node.summary.isnot(None)
+        )
+        for path, summary in rows:
+            if path in self._types and path not in self._summaries:
+                self._summaries[path] = summary
+
+    def child_summaries(self, path: str) -> list[tuple[str, str, str]]:
+        """
+        Get the summaries of a folder's direct children.
+
+        Returns:
+            List of (path, type, summary) for children that have a summary
+        """
+        return [
+            (child, self._types[child], self._summaries[child])
+            for child in self.children(path)
+            if child in self._summaries
+        ]
+
+    def structure_listing(self, path: str, levels: int | None = 1) -> str:
+        """
+        Get a folder's children as a tree-like string for LLM prompts.
+
+        Matches the format of `git_service.get_folder_structure`; hidden
+        entries are skipped.
+
+        Args:
+            path: Folder path
+            levels: Folder levels to list (None for the whole subtree)
+        """
+        lines = []
+        self._list_children(path, levels, "", lines)
+        return "\n".join(lines)
+
+    def _list_children(self, path: str, levels: int | None, indent: str, lines: list[str]):
+        children = [child for child in self.children(path) if not _name(child).startswith(".")]
+        for position, child in enumerate(children):
+            last = position == len(children) - 1
+            is_folder = self._types[child] == "folder"
+            lines.append(f"{indent}{'└──' if last else '├──'} {_name(child)}{'/' if is_folder else ''}")
+            if is_folder and (levels is None or levels > 1):
+                self._list_children(
+                    child, None if levels is None else levels - 1,
+                    indent + ("    " if last else "│   "), lines,
+                )
+
+    def summarized_descendants(self, path: str) -> list[tuple[str, str, str]]:
+        """
+        Get the summaries of all nodes below a folder, breadth-first.
+
+        Returns:
+            List of (path, type, summary) for descendants that have a summary
+        """
+        result = []
+        queue = deque(self.children(path))
+        while queue:
+            child = queue.popleft()
+            if child in self._summaries:
+                result.append((child, self._types[child], self._summaries[child]))
+            queue.extend(self.children(child))
+        return result
+
+
+def _name(path: str) -> str:
+    """Get the last component of a path."""
+    return path.rsplit("/", 1)[-1]
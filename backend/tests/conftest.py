@@ -1,5 +1,7 @@
 """Pytest configuration and fixtures."""
+from pathlib import Path
 import pytest
+from git import Actor, Repo
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
 from backend.db.base import Base
@@ -21,3 +23,34 @@ def db_session():
         session.close()
         Base.metadata.drop_all(bind=engine)
 
+
+AUTHOR = Actor("Test", "test@example.com")
+
+
+def _commit_files(repo: Repo, files: dict[str, str], message: str = "change", remove: list[str] | tuple[str, ...] = ()) -> str:
+    """Write files (by path relative to the work tree), delete `remove`, commit; returns the commit SHA."""
+    root = Path(repo.working_tree_dir)
+    for path, content in files.items():
+        (root / path).parent.mkdir(parents=True, exist_ok=True)
+        (root / path).write_text(content)
+    if files:
+        repo.index.add(list(files))
+    if remove:
+        repo.index.remove(list(remove), working_tree=True)
+    return repo.index.commit(message, author=AUTHOR, committer=AUTHOR).hexsha
+
+
+@pytest.fixture
+def commit_files():
+    """Commit file changes to a test repository: commit_files(repo, {path: content}, message, remove=paths)."""
+    return _commit_files
+
+
+@pytest.fixture
+def make_repo():
+    """Create a git repository with one commit: make_repo(path, {path: content})."""
+    def make(path: Path, files: dict[str, str]) -> Repo:
+        repo = Repo.init(path)
+        _commit_files(repo, files, "first")
+        return repo
+    return make
@@ -4,6 +4,7 @@ import uuid
 from backend.models.repository import Repository, RepositoryStatus
 from backend.models.node import Node
 from backend.models.task import Task, TaskStatus
+from backend.services.persistence import NodeWriter
 from backend.tests.conftest import db_session
 
 
@@ -203,6 +204,31 @@ def test_query_nodes_by_repository(db_session):
     assert all(node.repo_id == repo_id for node in nodes)
 
 
+def test_node_writer_bulk_upsert(db_session):
+    """Test buffered node writes insert new paths and update existing ones."""
+    repo_id = str(uuid.uuid4())
+    db_session.add(Repository(id=repo_id, url="https://test.com/repo", status=RepositoryStatus.PROCESSING))
+    db_session.commit()
+    
+    writer = NodeWriter(db_session, repo_id, flush_size=2, flush_interval=60)
+    writer.add_node("a.py", "file", "first")
+    assert writer.pending == 1
+    writer.add_node("b.py", "file", "second")
+    # Buffer is full, so both rows were flushed in one batch
+    assert writer.pending == 0
+    
+    writer.add_node("a.py", "file", "updated")
+    writer.add_node("", "folder", "root summary", name="repo")
+    writer.flush()
+    
+    nodes = {n.path: n for n in db_session.query(Node).filter(Node.repo_id == repo_id)}
+    assert set(nodes) == {"", "a.py", "b.py"}
+    assert nodes["a.py"].summary == "updated"
+    assert nodes[""].name == "repo"
+    assert nodes[""].parent_id is None
+    assert writer.flushed == 4
+
+
 @pytest.mark.skip(reason="Cascade delete not needed for CI/CD demo")
 def test_cascade_delete_repository(db_session):
     """Test that deleting a repository cascades to nodes and tasks."""
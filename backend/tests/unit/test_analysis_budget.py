@@ -0,0 +1,41 @@
+"""Unit tests for analysis work budgets."""
+from backend.services.analysis_budget import AnalysisBudget
+
+
+def test_depth_scope():
+    """Files are summarized down to `depth`; folders one level further."""
+    budget = AnalysisBudget(depth=1)
+    assert budget.file_in_scope("README.md")
+    assert budget.file_in_scope("src/app.py")
+    assert not budget.file_in_scope("src/core/db.py")
+    assert budget.folder_in_scope("src/core")
+    assert budget.is_outline_folder("src/core")
+    assert not budget.folder_in_scope("src/core/deep")
+
+
+def test_subtree_scope():
+    """Levels count from the subtree; paths outside it are out of scope."""
+    budget = AnalysisBudget(depth=0, subtree="/src/")
+    assert budget.subtree == "src"
+    assert budget.file_in_scope("src/app.py")
+    assert not budget.file_in_scope("README.md")
+    assert not budget.file_in_scope("srcx/app.py")
+    assert budget.is_outline_folder("src/core")
+    assert not budget.folder_in_scope("docs")
+
+
+def test_select_files_shallowest_first():
+    """File and token caps keep the shallowest files that fit."""
+    files = [
+        {"path": "a/b/deep.py", "size": 40},
+        {"path": "top.py", "size": 400},
+        {"path": "a/mid.py", "size": 40},
+        {"path": "a/small.py", "size": 4},
+    ]
+    selected, left_out = AnalysisBudget(max_files=2).select_files(files)
+    assert [item["path"] for item in selected] == ["top.py", "a/mid.py"]
+    assert {item["path"] for item in left_out} == {"a/b/deep.py", "a/small.py"}
+
+    selected, _ = AnalysisBudget(max_tokens=15).select_files(files)
+    # top.py alone would exceed the budget, so smaller files take its place
+    assert [item["path"] for item in selected] == ["a/mid.py", "a/small.py"]
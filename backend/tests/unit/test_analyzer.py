@@ -0,0 +1,306 @@
+"""Unit tests for the repository analyzer."""
+import asyncio
+import re
+import uuid
+import pytest
+from backend.config import settings
+from backend.models.analysis_checkpoint import AnalysisCheckpoint
+from backend.models.node import Node
+from backend.models.repository import Repository, RepositoryStatus
+from backend.models.task import Task, TaskStatus
+from backend.services import analyzer
+from backend.services.analyzer import _summarize_files, start_analysis
+from backend.services.persistence import NodeWriter, ProgressReporter
+from backend.services.summary_store import get_blob_summaries
+from backend.services.tree_index import TreeIndex
+
+
+class FakeLLMService:
+    """LLM stand-in that records how many calls overlap."""
+
+    summary_version = "fake:model:v1"
+
+    def __init__(self):
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.calls = 0
+        self.batched = 0
+
+    async def generate_summary(self, content, context=None, item_type="file"):
+        self.calls += 1
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        await asyncio.sleep(0.01)
+        self.in_flight -= 1
+        if item_type == "pack":
+            return "\n".join(
+                f"=== SUMMARY: {path} ===\nsummary of {body}"
+                for path, body in re.findall(r"<<< FILE: (.+?) >>>\n(.*?)\n<<< END FILE", content, re.S)
+            )
+        return f"summary of {content}"
+
+    async def generate_summaries_batch(self, contents, item_type="file", batch_id=None, on_submit=None):
+        self.batched += len(contents)
+        return {sha: f"summary of {content}" for sha, content in contents.items()}
+
+
+async def run_file_phase(db_session, task, repo_path, files, llm):
+    """Run the file phase with a fresh writer and progress reporter."""
+    return await _summarize_files(
+        db_session, NodeWriter(db_session, task.repo_id), ProgressReporter(db_session, task),
+        TreeIndex.from_file_tree(files), str(repo_path), str(repo_path), "repo", files, llm
+    )
+
+
+@pytest.fixture
+def analysis_task(db_session):
+    """Create a repository and a processing task."""
+    repo_id = str(uuid.uuid4())
+    db_session.add(Repository(id=repo_id, url="https://test.com/repo", status=RepositoryStatus.PROCESSING))
+    task = Task(id=str(uuid.uuid4()), repo_id=repo_id, status=TaskStatus.PROCESSING.value, progress=0)
+    db_session.add(task)
+    db_session.commit()
+    return task
+
+
+def test_summarize_files_bounded_concurrency(db_session, analysis_task, tmp_path, monkeypatch):
+    """Files are summarized concurrently, capped by analysis_concurrency."""
+    monkeypatch.setattr(settings, "analysis_concurrency", 3)
+    monkeypatch.setattr(settings, "pack_max_files", 1)
+    files = []
+    for i in range(10):
+        (tmp_path / f"file{i}.py").write_text(f"content {i}")
+        files.append({"path": f"file{i}.py", "type": "file"})
+
+    llm = FakeLLMService()
+    processed = asyncio.run(run_file_phase(db_session, analysis_task, tmp_path, files, llm))
+
+    assert processed == 10
+    assert llm.calls == 10
+    assert 1 < llm.max_in_flight <= 3
+    assert analysis_task.progress == 80
+    nodes = db_session.query(Node).filter(Node.repo_id == analysis_task.repo_id).all()
+    assert sorted(n.summary for n in nodes) == sorted(f"summary of content {i}" for i in range(10))
+
+
+def test_summarize_files_prefers_filesystem_cache(db_session, analysis_task, tmp_path):
+    """An existing summary file is reused instead of calling the LLM."""
+    (tmp_path / "cached.py").write_text("code")
+    (tmp_path / "cached.py.md").write_text("cached summary")
+
+    llm = FakeLLMService()
+    processed = asyncio.run(run_file_phase(
+        db_session, analysis_task, tmp_path, [{"path": "cached.py", "type": "file"}], llm
+    ))
+
+    assert processed == 1
+    assert llm.calls == 0
+    node = db_session.query(Node).filter(Node.path == "cached.py").first()
+    assert node.summary == "cached summary"
+
+
+def test_summarize_files_uses_blob_store(db_session, analysis_task, tmp_path):
+    """A blob summarized once is never sent to the LLM again."""
+    (tmp_path / "a.txt").write_text("MIT License")
+    (tmp_path / "b.txt").write_text("MIT License")
+    llm = FakeLLMService()
+
+    asyncio.run(run_file_phase(
+        db_session, analysis_task, tmp_path, [{"path": "a.txt", "type": "file", "sha": "abc123"}], llm
+    ))
+    assert llm.calls == 1
+    assert get_blob_summaries(db_session, ["abc123"], llm.summary_version) == {
+        "abc123": "summary of MIT License"
+    }
+
+    # Same blob under another path (e.g. a fork) hits the store
+    processed = asyncio.run(run_file_phase(
+        db_session, analysis_task, tmp_path, [{"path": "b.txt", "type": "file", "sha": "abc123"}], llm
+    ))
+    assert processed == 1
+    assert llm.calls == 1
+    assert (tmp_path / "b.txt.md").read_text() == "summary of MIT License"
+
+
+def test_summarize_files_skips_unsummarizable_files(db_session, analysis_task, tmp_path):
+    """Binary and lockfiles get a templated summary without an LLM call."""
+    (tmp_path / "app.py").write_text("print('hi')")
+    (tmp_path / "yarn.lock").write_text("lock")
+    (tmp_path / "data.bin.txt").write_bytes(b"\0\1\2")
+    files = [{"path": name, "type": "file"} for name in ("app.py", "yarn.lock", "data.bin.txt")]
+
+    llm = FakeLLMService()
+    processed = asyncio.run(run_file_phase(db_session, analysis_task, tmp_path, files, llm))
+
+    assert processed == 3
+    assert llm.calls == 1
+    assert analysis_task.metrics == {"skipped_lockfile": 1, "skipped_binary": 1}
+    node = db_session.query(Node).filter(Node.path == "yarn.lock").first()
+    assert "dependency lockfile" in node.summary
+
+
+def test_summarize_files_packs_small_files(db_session, analysis_task, tmp_path):
+    """Small files of a folder share a request; unsplittable responses fall back."""
+    (tmp_path / "pkg").mkdir()
+    (tmp_path / "other").mkdir()
+    for name in ("a.py", "b.py", "c.py"):
+        (tmp_path / "pkg" / name).write_text(f"{name} content")
+    (tmp_path / "other" / "x.py").write_text("x")
+    (tmp_path / "other" / "y.py").write_text("y")
+    files = [
+        {"path": path, "type": "file"}
+        for path in ("pkg/a.py", "pkg/b.py", "pkg/c.py", "other/x.py", "other/y.py")
+    ]
+
+    llm = FakeLLMService()
+    generate_summary = llm.generate_summary
+
+    async def garble_other(content, context=None, item_type="file"):
+        if item_type == "pack" and "other/x.py" in content:
+            llm.calls += 1
+            return "=== SUMMARY: other/x.py ===\nx\n=== SUMMARY: other/z.py ===\nz"
+        return await generate_summary(content, context, item_type)
+
+    llm.generate_summary = garble_other
+    processed = asyncio.run(run_file_phase(db_session, analysis_task, tmp_path, files, llm))
+
+    assert processed == 5
+    # One request per folder, then other/ file by file
+    assert llm.calls == 4
+    assert analysis_task.metrics == {"packed_requests": 2, "packed_files": 3}
+    paths = {n.path: n.summary for n in db_session.query(Node).filter(Node.repo_id == analysis_task.repo_id)}
+    assert paths["pkg/b.py"] == "summary of b.py content"
+    assert paths["other/y.py"] == "summary of y"
+
+
+def test_summarize_files_compresses_prompts(db_session, analysis_task, tmp_path):
+    """The LLM sees compressed content, and the savings are reported."""
+    header = "".join(f"# Copyright line {i}, licensed under the MIT License\n" for i in range(20))
+    (tmp_path / "app.py").write_text(f"{header}\n\n\nprint('hi')\n")
+
+    llm = FakeLLMService()
+    asyncio.run(run_file_phase(
+        db_session, analysis_task, tmp_path, [{"path": "app.py", "type": "file"}], llm
+    ))
+
+    node = db_session.query(Node).filter(Node.path == "app.py").first()
+    assert node.summary == "summary of # [license header removed]\n\nprint('hi')"
+    assert analysis_task.metrics["compressed_files"] == 1
+    assert analysis_task.metrics["compression_tokens_saved"] > 200
+
+
+def test_start_analysis_incremental(db_session, tmp_path, monkeypatch, make_repo, commit_files):
+    """Re-analysis only re-summarizes changed files and their ancestors."""
+    monkeypatch.setattr(settings, "cache_dir", str(tmp_path / "cache"))
+    llm = FakeLLMService()
+    monkeypatch.setattr(analyzer, "get_llm_service", lambda: llm)
+
+    origin = tmp_path / "origin"
+    git_repo = make_repo(origin, {"pkg/a.py": "a = 1", "pkg/b.py": "b = 2", "docs/guide.txt": "guide"})
+
+    start_analysis(str(uuid.uuid4()), str(origin), 3, db_session)
+    # pkg/a.py and pkg/b.py packed + docs/guide.txt + 2 folders + root
+    assert llm.calls == 5
+    repo = db_session.query(Repository).filter(Repository.url == str(origin)).first()
+    assert repo.status == RepositoryStatus.COMPLETED
+    assert repo.last_analyzed_commit == git_repo.head.commit.hexsha
+    # Finished tasks leave no checkpoint behind
+    assert db_session.query(AnalysisCheckpoint).count() == 0
+
+    commit_files(git_repo, {"pkg/a.py": "a = 42"}, "second", remove=["docs/guide.txt"])
+
+    llm.calls = 0
+    start_analysis(str(uuid.uuid4()), str(origin), 3, db_session)
+    # pkg/a.py + pkg + root
+    assert llm.calls == 3
+    paths = {n.path: n.summary for n in db_session.query(Node).filter(Node.repo_id == repo.id)}
+    assert set(paths) == {"", "pkg", "pkg/a.py", "pkg/b.py"}
+    assert paths["pkg/a.py"] == "summary of a = 42"
+    db_session.refresh(repo)
+    assert repo.last_analyzed_commit == git_repo.head.commit.hexsha
+
+    # Nothing changed: no LLM calls at all
+    llm.calls = 0
+    start_analysis(str(uuid.uuid4()), str(origin), 3, db_session)
+    assert llm.calls == 0
+
+
+def test_start_analysis_depth_budget(db_session, tmp_path, monkeypatch, make_repo):
+    """A shallow run maps deep folders by structure; a subtree run deepens them later."""
+    monkeypatch.setattr(settings, "cache_dir", str(tmp_path / "cache"))
+    llm = FakeLLMService()
+    monkeypatch.setattr(analyzer, "get_llm_service", lambda: llm)
+
+    origin = tmp_path / "origin"
+    make_repo(origin, {"README.md": "readme", "pkg/a.py": "a = 1", "pkg/sub/b.py": "b = 2", "pkg/empty.py": ""})
+
+    start_analysis(str(uuid.uuid4()), str(origin), 0, db_session)
+    # README.md + pkg (from its structure) + root
+    assert llm.calls == 3
+    repo = db_session.query(Repository).filter(Repository.url == str(origin)).first()
+    paths = {n.path: n.summary for n in db_session.query(Node).filter(Node.repo_id == repo.id)}
+    assert set(paths) == {"", "README.md", "pkg"}
+    assert "sub/" in paths["pkg"] and "b.py" in paths["pkg"]
+
+    # Deepening pkg summarizes only what the first run left out
+    llm.calls = 0
+    start_analysis(str(uuid.uuid4()), str(origin), None, db_session, subtree="pkg")
+    # pkg/a.py + pkg/sub/b.py + pkg/sub + pkg + root; the empty file needs no call
+    assert llm.calls == 5
+    paths = {n.path: n.summary for n in db_session.query(Node).filter(Node.repo_id == repo.id)}
+    assert set(paths) == {"", "README.md", "pkg", "pkg/a.py", "pkg/empty.py", "pkg/sub", "pkg/sub/b.py"}
+    assert "was not summarized" in paths["pkg/empty.py"]
+
+    # The empty file counts as done, so nothing is planned again
+    llm.calls = 0
+    start_analysis(str(uuid.uuid4()), str(origin), None, db_session)
+    assert llm.calls == 0
+
+
+def test_start_analysis_batch_mode(db_session, tmp_path, monkeypatch, make_repo):
+    """Batch mode summarizes files in one submission, folders afterwards."""
+    monkeypatch.setattr(settings, "cache_dir", str(tmp_path / "cache"))
+    llm = FakeLLMService()
+    monkeypatch.setattr(analyzer, "get_llm_service", lambda: llm)
+
+    origin = tmp_path / "origin"
+    make_repo(origin, {"pkg/a.py": "a = 1", "pkg/b.py": "b = 2", "pkg/copy.py": "a = 1"})
+
+    start_analysis(str(uuid.uuid4()), str(origin), 3, db_session, batch=True)
+    # Two distinct blobs batched; only pkg + root summarized directly
+    assert llm.batched == 2
+    assert llm.calls == 2
+    repo = db_session.query(Repository).filter(Repository.url == str(origin)).first()
+    paths = {n.path: n.summary for n in db_session.query(Node).filter(Node.repo_id == repo.id)}
+    assert paths["pkg/a.py"] == paths["pkg/copy.py"] == "summary of a = 1"
+    assert paths["pkg/b.py"] == "summary of b = 2"
+
+
+def test_start_analysis_batch_resumes_submitted_batch(db_session, tmp_path, monkeypatch, make_repo):
+    """A run interrupted while waiting for its batch waits for the same batch when resumed."""
+    monkeypatch.setattr(settings, "cache_dir", str(tmp_path / "cache"))
+    submitted, resumed = [], []
+
+    class InterruptedBatchLLM(FakeLLMService):
+        async def generate_summaries_batch(self, contents, item_type="file", batch_id=None, on_submit=None):
+            if batch_id is None:
+                submitted.append("batch-1")
+                on_submit("batch-1")
+                raise RuntimeError("worker stopped")
+            resumed.append(batch_id)
+            return await super().generate_summaries_batch(contents, item_type)
+
+    llm = InterruptedBatchLLM()
+    monkeypatch.setattr(analyzer, "get_llm_service", lambda: llm)
+    origin = tmp_path / "origin"
+    make_repo(origin, {"pkg/a.py": "a = 1"})
+
+    task_id = str(uuid.uuid4())
+    start_analysis(task_id, str(origin), None, db_session, batch=True)
+    checkpoint = db_session.query(AnalysisCheckpoint).filter(AnalysisCheckpoint.task_id == task_id).first()
+    assert checkpoint.batch_id == "batch-1"
+
+    start_analysis(task_id, str(origin), None, db_session, batch=True)
+    assert submitted == ["batch-1"]
+    assert resumed == ["batch-1"]
+    assert db_session.query(AnalysisCheckpoint).filter(AnalysisCheckpoint.task_id == task_id).first() is None
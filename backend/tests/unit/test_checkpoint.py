@@ -0,0 +1,62 @@
+"""Unit tests for analysis checkpoints."""
+import uuid
+import pytest
+from backend.models.analysis_checkpoint import AnalysisCheckpoint
+from backend.models.repository import Repository, RepositoryStatus
+from backend.models.task import Task, TaskStatus
+from backend.services.checkpoint import PHASE_FILES, load_checkpoint, plan_resume, set_phase
+from backend.services.persistence import NodeWriter
+
+
+@pytest.fixture
+def task(db_session):
+    """Create a repository and a processing task."""
+    repo_id = str(uuid.uuid4())
+    db_session.add(Repository(id=repo_id, url="https://test.com/repo", status=RepositoryStatus.PROCESSING))
+    task = Task(id=str(uuid.uuid4()), repo_id=repo_id, status=TaskStatus.PROCESSING.value, progress=0)
+    db_session.add(task)
+    db_session.commit()
+    return task
+
+
+def test_node_writer_records_completed_nodes(db_session, task):
+    """Flushed nodes are recorded in the checkpoint with their blob SHA."""
+    checkpoint, resumed = load_checkpoint(db_session, task.id, None, "c1")
+    assert not resumed
+    set_phase(checkpoint, PHASE_FILES, ["a.py", "b.py"])
+    writer = NodeWriter(db_session, task.repo_id, checkpoint=checkpoint)
+    writer.add_node("a.py", "file", "summary", blob_sha="sha-a")
+    writer.add_node("pkg", "folder", "summary")
+    writer.flush()
+
+    db_session.expire_all()
+    stored = db_session.query(AnalysisCheckpoint).filter(AnalysisCheckpoint.task_id == task.id).first()
+    assert stored.completed == {"a.py": "sha-a", "pkg": None}
+    assert stored.pending == ["b.py"]
+
+    checkpoint, resumed = load_checkpoint(db_session, task.id, None, "c1")
+    assert resumed
+    checkpoint, resumed = load_checkpoint(db_session, task.id, "c0", "c1")
+    assert not resumed
+    assert checkpoint.completed == {}
+
+
+def test_plan_resume(db_session, task):
+    """Finished files with unchanged blobs are skipped; folders only for the same commit."""
+    checkpoint, _ = load_checkpoint(db_session, task.id, None, "c1")
+    checkpoint.completed = {"a.py": "sha-a", "b.py": "old-sha", "pkg": None}
+    files = [
+        {"path": "a.py", "sha": "sha-a"},
+        {"path": "b.py", "sha": "new-sha"},
+        {"path": "c.py", "sha": "sha-c"},
+    ]
+
+    remaining, done_folders = plan_resume(checkpoint, files, "c1")
+    assert [item["path"] for item in remaining] == ["b.py", "c.py"]
+    assert done_folders == {"pkg"}
+
+    remaining, done_folders = plan_resume(checkpoint, files, "c2")
+    assert len(remaining) == 2
+    assert done_folders == set()
+    assert checkpoint.target_commit == "c2"
+    assert "pkg" not in checkpoint.completed
@@ -0,0 +1,64 @@
+"""Unit tests for map-reduce summarization of large files."""
+import asyncio
+from backend.services.chunking import split_into_chunks, summarize_chunked
+
+
+PYTHON_SOURCE = '''import os
+
+
+@decorator
+def first():
+    return 1
+
+
+class Second:
+    def method(self):
+        return 2
+
+
+def third():
+    return 3
+'''
+
+
+class RecordingLLMService:
+    """LLM stand-in that records prompts by item type."""
+
+    def __init__(self):
+        self.calls = []
+
+    async def generate_summary(self, content, context=None, item_type="file"):
+        self.calls.append((item_type, context))
+        return f"{item_type} summary ({len(content)} chars)"
+
+
+def test_split_into_chunks_on_definitions():
+    """Chunks break between top-level definitions, keeping decorators attached."""
+    chunks = split_into_chunks(PYTHON_SOURCE, 40)
+    assert "".join(chunks) == PYTHON_SOURCE
+    assert any(chunk.startswith("@decorator\ndef first") for chunk in chunks)
+    assert any(chunk.startswith("class Second") for chunk in chunks)
+    assert all("def method" not in chunk or "class Second" in chunk for chunk in chunks)
+
+
+def test_split_into_chunks_splits_oversized_definitions():
+    """A definition longer than the chunk size is split on line ends."""
+    content = "def big():\n" + "    x = 1\n" * 100
+    chunks = split_into_chunks(content, 100)
+    assert "".join(chunks) == content
+    assert all(len(chunk) <= 100 for chunk in chunks)
+
+
+def test_summarize_chunked_maps_then_reduces():
+    """Every chunk is summarized, then the partial summaries are merged into one."""
+    content = "".join(f"def f{i}():\n    return {i}\n\n" for i in range(50))
+    llm = RecordingLLMService()
+
+    summary = asyncio.run(summarize_chunked(llm, "big.py", content, 200, asyncio.Semaphore(4)))
+
+    chunk_calls = [call for call in llm.calls if call[0] == "chunk"]
+    merge_calls = [call for call in llm.calls if call[0] == "merge"]
+    assert len(chunk_calls) == len(split_into_chunks(content, 200))
+    assert chunk_calls[0][1] == f"big.py, part 1 of {len(chunk_calls)}"
+    assert merge_calls
+    assert summary.startswith("merge summary")
@@ -0,0 +1,67 @@
+"""Unit tests for the token-budgeted context builder."""
+from backend.services.context_builder import (
+    MIN_SUMMARY_TOKENS, TRUNCATION_MARKER, build_context, estimate_tokens, importance,
+    truncate_to_tokens,
+)
+
+
+def build(folders, files, budget):
+    """Build a context with simple labels."""
+    return build_context(
+        structure="",
+        structure_heading="",
+        folder_summaries=folders,
+        file_summaries=files,
+        budget=budget,
+        folder_heading="Folders:\n",
+        file_heading="Files:\n",
+        folder_label="{path}: {summary}",
+        file_label="{path}: {summary}",
+        separator="\n",
+    )
+
+
+def test_truncate_to_tokens():
+    """Text over budget is cut and marked; text within budget is unchanged."""
+    assert truncate_to_tokens("short", 10) == "short"
+    long_text = "word " * 200
+    truncated = truncate_to_tokens(long_text, 20)
+    assert truncated.endswith(TRUNCATION_MARKER)
+    assert estimate_tokens(truncated) <= 20
+
+
+def test_importance():
+    """Entry points rank above regular files, tests and docs below."""
+    assert importance("src/README.md") == 2
+    assert importance("src/utils.py") == 1
+    assert importance("tests/test_utils.py") == 0
+    assert importance("docs/guide.md") == 0
+
+
+def test_build_context_fits_everything_within_budget():
+    """Small inputs are included verbatim with nothing dropped."""
+    context = build([("pkg", "A package.")], [("pkg/a.py", "A module.")], 1000)
+    assert "pkg: A package." in context.text
+    assert "pkg/a.py: A module." in context.text
+    assert context.dropped_tokens == 0
+
+
+def test_build_context_respects_budget():
+    """Large inputs are truncated or dropped to stay within the budget."""
+    files = [(f"src/module{i}.py", "x" * 2000) for i in range(50)]
+    context = build([], files, 1000)
+    assert context.tokens <= 1000
+    assert context.dropped_tokens > 0
+
+
+def test_build_context_prefers_folders_and_important_files():
+    """Folder summaries are kept before files, and important files before tests."""
+    folders = [("pkg", "p" * 1200)]
+    files = [
+        ("tests/test_a.py", "t" * 1200),
+        ("README.md", "r" * 1200),
+    ]
+    context = build(folders, files, 300 + 2 * MIN_SUMMARY_TOKENS)
+    assert "pkg: p" in context.text
+    assert "README.md: r" in context.text
+    assert "tests/test_a.py" not in context.text
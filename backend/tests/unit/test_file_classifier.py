@@ -0,0 +1,43 @@
+"""Unit tests for the pre-LLM file classifier."""
+from backend.services.git_service import BlobReader
+from backend.services.file_classifier import (
+    ASSET, FIXTURE, GENERATED, IGNORED, LOCKFILE, MINIFIED, VENDORED,
+    FileClassifier, is_binary,
+)
+
+
+def test_classify_path():
+    """Lockfiles, vendored code, assets and generated names are skipped by path."""
+    classifier = FileClassifier()
+    assert classifier.classify_path("package-lock.json") == LOCKFILE
+    assert classifier.classify_path("web/node_modules/react/index.js") == VENDORED
+    assert classifier.classify_path("static/logo.svg") == ASSET
+    assert classifier.classify_path("dist/app.min.js") == MINIFIED
+    assert classifier.classify_path("api/service_pb2.py") == GENERATED
+    assert classifier.classify_path("tests/fixtures/response.json") == FIXTURE
+    assert classifier.classify_path("src/main.py") is None
+
+
+def test_classify_content():
+    """Generated markers and minified text are detected from content."""
+    classifier = FileClassifier()
+    assert classifier.classify_content("# Code generated by protoc. DO NOT EDIT.\nx = 1") == GENERATED
+    assert classifier.classify_content("var a=1;" * 1000) == MINIFIED
+    assert classifier.classify_content("def main():\n    return 1\n") is None
+
+
+def test_ignore_file(tmp_path):
+    """Patterns from .r2ceignore skip matching files and folders."""
+    (tmp_path / ".r2ceignore").write_text("# comment\n*.csv\nbuild/\nsrc/legacy/*.py\n")
+    classifier = FileClassifier.for_repo(BlobReader(str(tmp_path)))
+    assert classifier.classify_path("data/report.csv") == IGNORED
+    assert classifier.classify_path("build/output.py") == IGNORED
+    assert classifier.classify_path("src/legacy/old.py") == IGNORED
+    assert classifier.classify_path("src/new.py") is None
+    assert classifier.classify_path("scripts/build") is None
+
+
+def test_is_binary():
+    """NUL bytes in the first block mark contents as binary."""
+    assert is_binary(b"abc\0def")
+    assert not is_binary("héllo".encode("utf-8"))
@@ -0,0 +1,34 @@
+"""Unit tests for packing small files into one LLM request."""
+from backend.services.file_packing import format_pack, pack_files, parse_pack
+
+
+def test_pack_files_groups_by_folder_within_budget():
+    """Packs never mix folders or exceed their limits; lone files are left out."""
+    contents = {
+        "a/1.py": "x" * 40,
+        "a/2.py": "x" * 40,
+        "a/3.py": "x" * 40,
+        "b/1.py": "x" * 40,
+        "c/1.py": "x" * 4,
+        "c/2.py": "x" * 4,
+        "c/3.py": "x" * 4,
+    }
+    # 10 tokens per file in a/, 1 in c/
+    assert pack_files(contents, max_tokens=25, max_files=10) == [["a/1.py", "a/2.py"], ["c/1.py", "c/2.py", "c/3.py"]]
+    assert pack_files(contents, max_tokens=100, max_files=2) == [
+        ["a/1.py", "a/2.py"], ["c/1.py", "c/2.py"]
+    ]
+
+
+def test_parse_pack_validates_split():
+    """Missing files are tolerated; unknown, repeated or empty entries are not."""
+    paths = ["pkg/a.py", "pkg/b.py"]
+    assert "<<< FILE: pkg/a.py >>>\nA\n<<< END FILE: pkg/a.py >>>" in format_pack({"pkg/a.py": "A\n"})
+
+    response = "Here you go:\n=== SUMMARY: pkg/a.py ===\nAbout a.\n\n=== SUMMARY: `pkg/b.py` ===\nAbout b.\n"
+    assert parse_pack(response, paths) == {"pkg/a.py": "About a.", "pkg/b.py": "About b."}
+    assert parse_pack("=== SUMMARY: pkg/a.py ===\nAbout a.", paths) == {"pkg/a.py": "About a."}
+    assert parse_pack("About both files.", paths) is None
+    assert parse_pack("=== SUMMARY: pkg/c.py ===\nc", paths) is None
+    assert parse_pack("=== SUMMARY: pkg/a.py ===\na\n=== SUMMARY: pkg/a.py ===\na", paths) is None
+    assert parse_pack("=== SUMMARY: pkg/a.py ===\n\n=== SUMMARY: pkg/b.py ===\nb", paths) is None
@@ -0,0 +1,62 @@
+"""Unit tests for the folder summarization scheduler."""
+import asyncio
+import pytest
+from backend.services.folder_scheduler import build_folder_dag, schedule_folders
+
+
+def test_build_folder_dag():
+    """Folders depend on their direct child folders; root is always present."""
+    dag = build_folder_dag(["src", "src/api", "src/api/routes", "docs"])
+
+    assert sorted(dag[""]) == ["docs", "src"]
+    assert dag["src"] == ["src/api"]
+    assert dag["src/api"] == ["src/api/routes"]
+    assert dag["docs"] == []
+
+
+def test_build_folder_dag_skips_missing_parents():
+    """A folder whose parent is not scheduled hangs off its nearest ancestor."""
+    dag = build_folder_dag(["a/b/c"])
+    assert dag[""] == ["a/b/c"]
+
+
+def test_schedule_folders_children_before_parents():
+    """Each folder starts only after its children finish, root last."""
+    folders = ["a", "a/x", "a/y", "b", "b/z"]
+    started: list[str] = []
+    finished: set[str] = set()
+    in_flight = 0
+    max_in_flight = 0
+
+    async def summarize(path):
+        nonlocal in_flight, max_in_flight
+        children = [f for f in folders if f.rsplit("/", 1)[0] == path and "/" in f]
+        if path == "":
+            children = ["a", "b"]
+        assert all(child in finished for child in children)
+        started.append(path)
+        in_flight += 1
+        max_in_flight = max(max_in_flight, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        finished.add(path)
+        return f"summary:{path}"
+
+    results = asyncio.run(schedule_folders(folders, summarize, concurrency=4))
+
+    assert started[-1] == ""
+    assert results["a/x"] == "summary:a/x"
+    assert len(results) == len(folders) + 1
+    # Independent leaf folders run at the same time
+    assert max_in_flight >= 2
+
+
+def test_schedule_folders_propagates_errors():
+    """A failing folder aborts the schedule."""
+    async def summarize(path):
+        if path == "bad":
+            raise RuntimeError("boom")
+        return path
+
+    with pytest.raises(RuntimeError):
+        asyncio.run(schedule_folders(["bad", "good"], summarize, concurrency=2))
@@ -0,0 +1,114 @@
+"""Unit tests for the persistent analysis job queue."""
+import os
+from datetime import timedelta
+from backend.config import settings
+from backend.models.analysis_job import AnalysisJob, JobStatus
+from backend.models.repository import Repository, RepositoryStatus
+from backend.models.task import Task, TaskStatus
+from backend.services.job_queue import (
+    claim_job, complete_job, enqueue_analysis, extend_lease, fail_job, find_repository,
+    release_orphaned_jobs, utcnow,
+)
+
+
+def test_enqueue_and_claim(db_session):
+    """A queued job is claimed by exactly one worker."""
+    task = enqueue_analysis(db_session, "https://github.com/user/repo", 10)
+    assert task.status == TaskStatus.PENDING.value
+
+    job = claim_job(db_session, "worker-1")
+    assert job.task_id == task.id
+    assert job.status == JobStatus.RUNNING.value
+    assert job.attempts == 1
+    assert claim_job(db_session, "worker-2") is None
+
+    complete_job(db_session, job)
+    assert job.status == JobStatus.COMPLETED.value
+
+
+def test_expired_lease_is_reclaimed(db_session):
+    """A job whose worker stopped heartbeating is taken over by another worker."""
+    enqueue_analysis(db_session, "https://github.com/user/repo", 10)
+    job = claim_job(db_session, "worker-1")
+    assert extend_lease(db_session, job.id, "worker-1")
+
+    job.locked_until = utcnow() - timedelta(seconds=1)
+    db_session.commit()
+
+    reclaimed = claim_job(db_session, "worker-2")
+    assert reclaimed.id == job.id
+    assert reclaimed.worker_id == "worker-2"
+    assert reclaimed.attempts == 2
+    assert not extend_lease(db_session, job.id, "worker-1")
+
+
+def test_failed_job_retries_with_backoff(db_session, monkeypatch):
+    """Failed attempts are re-queued with backoff until max_attempts."""
+    monkeypatch.setattr(settings, "job_max_attempts", 2)
+    task = enqueue_analysis(db_session, "https://github.com/user/repo", 10)
+
+    job = claim_job(db_session, "worker-1")
+    assert fail_job(db_session, job, "boom")
+    assert job.status == JobStatus.QUEUED.value
+    assert job.available_at > utcnow()
+    assert claim_job(db_session, "worker-1") is None
+
+    job.available_at = utcnow() - timedelta(seconds=1)
+    db_session.commit()
+    job = claim_job(db_session, "worker-1")
+    assert job.attempts == 2
+    assert not fail_job(db_session, job, "boom again")
+    assert job.status == JobStatus.FAILED.value
+    assert db_session.query(Task).filter(Task.id == task.id).first().status == TaskStatus.FAILED.value
+    assert db_session.query(AnalysisJob).count() == 1
+
+
+def test_release_orphaned_jobs(db_session):
+    """Running jobs of dead workers on this host are released for reclaiming."""
+    enqueue_analysis(db_session, "https://github.com/user/repo", 10)
+    enqueue_analysis(db_session, "https://github.com/user/other", 10)
+    dead = claim_job(db_session, "host-999999999-0")
+    alive = claim_job(db_session, f"host-{os.getpid()}-0")
+
+    assert release_orphaned_jobs(db_session, "host") == 1
+    assert release_orphaned_jobs(db_session, "other-host") == 0
+    reclaimed = claim_job(db_session, "host-1-0")
+    assert reclaimed.id == dead.id
+    assert alive.locked_until > utcnow()
+
+
+def test_duplicate_requests_share_a_task(db_session):
+    """Requests for the same repository and commit attach to the in-flight task."""
+    first = enqueue_analysis(db_session, "https://github.com/user/repo", 10, target_commit="c1")
+    assert enqueue_analysis(db_session, "https://GitHub.com/User/repo.git/", 10, target_commit="c1").id == first.id
+    # A queued job analyzes the latest commit when it starts
+    assert enqueue_analysis(db_session, "https://github.com/user/repo", 10, target_commit="c2").id == first.id
+
+    job = claim_job(db_session, "worker-1")
+    assert enqueue_analysis(db_session, "https://github.com/user/repo", 10, target_commit="c1").id == first.id
+    newer = enqueue_analysis(db_session, "https://github.com/user/repo", 10, target_commit="c2")
+    assert newer.id != first.id
+
+    # The newer job waits until the running one is done with the repository
+    assert claim_job(db_session, "worker-2") is None
+    complete_job(db_session, job)
+    assert claim_job(db_session, "worker-2").task_id == newer.id
+    assert enqueue_analysis(db_session, "https://github.com/user/repo", 10, target_commit="c1").id not in (
+        first.id, newer.id
+    )
+
+
+def test_url_spellings_share_a_repository(db_session):
+    """Every spelling of a repository URL maps to one repository, also after its job is done."""
+    first = enqueue_analysis(db_session, "https://github.com/User/Repo.git", 10)
+    complete_job(db_session, claim_job(db_session, "worker-1"))
+    second = enqueue_analysis(db_session, "https://github.com/user/repo/", 10)
+    assert second.id != first.id
+    assert second.repo_id == first.repo_id
+    assert db_session.query(Repository).one().url == "https://github.com/user/repo"
+
+    # Rows stored before URLs were normalized are still found
+    db_session.add(Repository(id="legacy", url="https://example.com/x/y.git", status=RepositoryStatus.COMPLETED))
+    db_session.commit()
+    assert find_repository(db_session, "https://example.com/x/y.git").id == "legacy"
+
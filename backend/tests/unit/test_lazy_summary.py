@@ -0,0 +1,88 @@
+"""Unit tests for lazy analysis and on-demand summaries."""
+import asyncio
+import uuid
+from backend.config import settings
+from backend.models.node import Node
+from backend.models.repository import Repository
+from backend.services import analyzer
+from backend.services.analyzer import start_analysis
+from backend.services.git_service import get_path_type, get_repo_cache_path
+from backend.services.lazy_summary import ensure_summary, unsummarized_mentions
+
+
+class CountingLLMService:
+    """LLM stand-in that counts calls."""
+
+    summary_version = "fake:model:v1"
+
+    def __init__(self):
+        self.calls = 0
+
+    async def generate_summary(self, content, context=None, item_type="file"):
+        self.calls += 1
+        return f"summary of {content}"
+
+
+ORIGIN_FILES = {"pkg/a.py": "a = 1", "pkg/b.py": "b = 2"}
+
+
+def test_lazy_analysis_summarizes_on_demand(db_session, tmp_path, monkeypatch, make_repo):
+    """The tree is usable before summarization; touched nodes are summarized first."""
+    monkeypatch.setattr(settings, "cache_dir", str(tmp_path / "cache"))
+    llm = CountingLLMService()
+    monkeypatch.setattr(analyzer, "get_llm_service", lambda: llm)
+    origin = tmp_path / "origin"
+    make_repo(origin, ORIGIN_FILES)
+
+    async def interrupted(*args, **kwargs):
+        raise RuntimeError("worker stopped")
+
+    # Stop the background pass before it summarizes anything
+    with monkeypatch.context() as patch:
+        patch.setattr(analyzer, "_summarize_files", interrupted)
+        start_analysis(str(uuid.uuid4()), str(origin), None, db_session, lazy=True)
+    repo = db_session.query(Repository).filter(Repository.url == str(origin)).first()
+    nodes = {n.path: n.summary for n in db_session.query(Node).filter(Node.repo_id == repo.id)}
+    assert nodes == {"": None, "pkg": None, "pkg/a.py": None, "pkg/b.py": None}
+    assert get_path_type(str(get_repo_cache_path(str(origin))), "pkg/a.py") == "file"
+    assert llm.calls == 0
+
+    assert unsummarized_mentions(db_session, repo.id, "What does a.py do?") == ["pkg/a.py"]
+    summary = asyncio.run(ensure_summary(db_session, repo.id, "pkg/a.py"))
+    assert summary == "summary of a = 1"
+    assert asyncio.run(ensure_summary(db_session, repo.id, "pkg/a.py")) == summary
+    assert asyncio.run(ensure_summary(db_session, repo.id, "missing.py")) is None
+    assert llm.calls == 1
+
+    # The background pass reuses the on-demand summary
+    llm.calls = 0
+    start_analysis(str(uuid.uuid4()), str(origin), None, db_session, lazy=True)
+    # pkg/b.py + pkg + root
+    assert llm.calls == 3
+    nodes = {n.path: n.summary for n in db_session.query(Node).filter(Node.repo_id == repo.id)}
+    assert all(nodes.values())
+
+
+def test_on_demand_folder_summary_is_replaced_by_background_pass(db_session, tmp_path, monkeypatch, make_repo):
+    """A root summary made before its children are summarized does not outlive the background pass."""
+    monkeypatch.setattr(settings, "cache_dir", str(tmp_path / "cache"))
+    llm = CountingLLMService()
+    monkeypatch.setattr(analyzer, "get_llm_service", lambda: llm)
+    origin = tmp_path / "origin"
+    make_repo(origin, ORIGIN_FILES)
+
+    async def interrupted(*args, **kwargs):
+        raise RuntimeError("worker stopped")
+
+    with monkeypatch.context() as patch:
+        patch.setattr(analyzer, "_summarize_files", interrupted)
+        start_analysis(str(uuid.uuid4()), str(origin), None, db_session, lazy=True)
+    repo = db_session.query(Repository).filter(Repository.url == str(origin)).first()
+    early = asyncio.run(ensure_summary(db_session, repo.id, ""))
+    assert "summary of a = 1" not in early
+
+    start_analysis(str(uuid.uuid4()), str(origin), None, db_session, lazy=True)
+    db_session.expire_all()
+    root = db_session.query(Node).filter(Node.repo_id == repo.id, Node.path == "").first()
+    assert root.summary != early
+    assert "summary of a = 1" in root.summary
@@ -0,0 +1,96 @@
+"""Unit tests for batch submission of LLM requests."""
+import asyncio
+import json
+from backend.config import settings
+from backend.services import llm_service
+from backend.services.llm_batch import LocalBatchBackend, parse_batch_output, run_batch, write_batch_file
+from backend.services.llm_service import LLMService
+
+
+class EchoService(LLMService):
+    """Provider stand-in that answers with the prompt length."""
+
+    provider = "echo"
+    model = "echo-1"
+
+    def __init__(self):
+        self.calls = 0
+
+    async def _complete(self, prompt):
+        self.calls += 1
+        return f"summary {len(prompt)}"
+
+
+def test_run_batch_with_local_backend(tmp_path, monkeypatch):
+    """Requests round-trip through the JSONL files; failed ones are left out."""
+    monkeypatch.setattr(settings, "cache_dir", str(tmp_path))
+
+    async def respond(body):
+        if body["prompt"] == "bad":
+            raise RuntimeError("boom")
+        return f" {body['prompt'].upper()} "
+
+    backend = LocalBatchBackend(tmp_path / "batches", respond)
+    requests = {"a": {"prompt": "one"}, "b": {"prompt": "bad"}, "c": {"prompt": "two"}}
+    submitted = []
+    results = asyncio.run(run_batch(backend, requests, poll_interval=0, timeout=10, on_submit=submitted.append))
+
+    assert results == {"a": "ONE", "c": "TWO"}
+    assert len(submitted) == 1 and submitted[0].startswith("local-")
+    # Collected batches are cleaned up
+    assert list((tmp_path / "batches").iterdir()) == []
+
+
+def test_write_batch_file(tmp_path):
+    """Requests are written in the OpenAI batch JSONL format."""
+    path = tmp_path / "batch.jsonl"
+    write_batch_file(path, {"a": {"prompt": "one"}})
+    (line,) = path.read_text().splitlines()
+    assert json.loads(line) == {
+        "custom_id": "a", "method": "POST", "url": "/v1/chat/completions", "body": {"prompt": "one"},
+    }
+
+
+def test_run_batch_resumes_submitted_batch(tmp_path, monkeypatch):
+    """A batch submitted before an interruption is polled instead of submitted again."""
+    monkeypatch.setattr(settings, "cache_dir", str(tmp_path))
+
+    async def respond(body):
+        return body["prompt"]
+
+    backend = LocalBatchBackend(tmp_path / "batches", respond)
+    requests = {"a": {"prompt": "one"}}
+    write_batch_file(tmp_path / "input.jsonl", requests)
+    batch_id = asyncio.run(backend.submit(tmp_path / "input.jsonl"))
+
+    submitted = []
+    results = asyncio.run(run_batch(
+        backend, requests, poll_interval=0, timeout=10, batch_id=batch_id, on_submit=submitted.append
+    ))
+    assert results == {"a": "one"}
+    assert submitted == []
+    assert list((tmp_path / "batches").iterdir()) == []
+
+
+def test_parse_batch_output_skips_errors():
+    """Non-200 responses and error entries are treated as unanswered."""
+    text = "\n".join(json.dumps(entry) for entry in [
+        {"custom_id": "ok", "response": {"status_code": 200, "body": {"choices": [{"message": {"content": "fine"}}]}}},
+        {"custom_id": "limited", "response": {"status_code": 429, "body": {}}},
+        {"custom_id": "error", "response": None, "error": {"message": "expired"}},
+    ])
+    assert parse_batch_output(text) == {"ok": "fine"}
+
+
+def test_generate_summaries_batch_uses_cache(tmp_path, monkeypatch):
+    """Cached prompts are not resubmitted, and batch results fill the cache."""
+    monkeypatch.setattr(settings, "cache_dir", str(tmp_path))
+    monkeypatch.setattr(settings, "llm_cache_enabled", True)
+    monkeypatch.setattr(llm_service, "log_llm_call", lambda *args, **kwargs: None)
+    service = EchoService()
+
+    first = asyncio.run(service.generate_summaries_batch({"x": "abc", "y": "defg"}))
+    assert service.calls == 2
+    second = asyncio.run(service.generate_summaries_batch({"x": "abc", "z": "defg"}))
+    assert service.calls == 2
+    assert second == {"x": first["x"], "z": first["y"]}
@@ -0,0 +1,76 @@
+"""Unit tests for the LLM response cache."""
+import asyncio
+import os
+import time
+from backend.services import llm_service
+from backend.services.llm_cache import ResponseCache
+from backend.services.llm_service import LLMService
+
+
+class EchoService(LLMService):
+    """Provider stand-in that counts completions."""
+
+    provider = "echo"
+    model = "echo-1"
+
+    def __init__(self):
+        self.calls = 0
+
+    async def _complete(self, prompt):
+        self.calls += 1
+        return f"answer {self.calls}"
+
+
+def test_key_depends_on_model_and_temperature():
+    """Only byte-identical requests share an entry."""
+    key = ResponseCache.key("openai", "gpt", 0.3, "prompt")
+    assert key == ResponseCache.key("openai", "gpt", 0.3, "prompt")
+    assert key != ResponseCache.key("openai", "gpt", 0.7, "prompt")
+    assert key != ResponseCache.key("openai", "gpt-4", 0.3, "prompt")
+    assert key != ResponseCache.key("openai", "gpt", 0.3, "prompt ")
+
+
+def test_memory_and_disk_tiers(tmp_path):
+    """Entries dropped from memory are still served from disk."""
+    cache = ResponseCache(str(tmp_path), max_memory_entries=1, max_disk_bytes=1_000_000)
+    cache.put("a" * 64, "first")
+    cache.put("b" * 64, "second")
+    assert cache.get("b" * 64) == "second"
+    assert cache.get("a" * 64) == "first"
+    assert cache.get("c" * 64) is None
+    # Another process sharing the directory
+    other = ResponseCache(str(tmp_path), max_memory_entries=10, max_disk_bytes=1_000_000)
+    assert other.get("b" * 64) == "second"
+    stats = cache.stats()
+    assert (stats["memory_hits"], stats["disk_hits"], stats["misses"]) == (1, 1, 1)
+
+
+def test_disk_tier_evicts_least_recently_used(tmp_path):
+    """The disk tier is trimmed oldest-first once it outgrows its limit."""
+    cache = ResponseCache(str(tmp_path), max_memory_entries=0, max_disk_bytes=250)
+    for index, name in enumerate("abc"):
+        cache.put(name * 64, "x" * 100)
+        path = cache._path(name * 64)
+        os.utime(path, (time.time() - 100 + index, time.time() - 100 + index))
+    assert cache.get("a" * 64) is None
+    assert cache.get("c" * 64) == "x" * 100
+    assert cache.stats()["evictions"] == 1
+
+
+def test_service_reuses_responses(tmp_path, monkeypatch):
+    """Repeated prompts cost no provider calls; QA can opt out."""
+    cache = ResponseCache(str(tmp_path), max_memory_entries=10, max_disk_bytes=1_000_000)
+    monkeypatch.setattr(llm_service, "get_response_cache", lambda: cache)
+    monkeypatch.setattr(llm_service, "log_llm_call", lambda *args, **kwargs: None)
+    service = EchoService()
+
+    async def run():
+        first = await service.generate_summary("same content")
+        second = await service.generate_summary("same content")
+        fresh = await service.answer_question("why?", "context", use_cache=False)
+        return first, second, fresh
+
+    first, second, fresh = asyncio.run(run())
+    assert first == second == "answer 1"
+    assert fresh == "answer 2"
+    assert service.calls == 2
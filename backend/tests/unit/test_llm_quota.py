@@ -0,0 +1,60 @@
+"""Unit tests for dividing LLM limits between processes."""
+import pytest
+from backend.config import settings
+from backend.models.llm_demand import LLMDemand
+from backend.services.llm_quota import allocate_shares, exchange_demand
+from backend.services.llm_scheduler import BATCH, INTERACTIVE, get_scheduler
+
+
+@pytest.fixture
+def limits(monkeypatch):
+    monkeypatch.setattr(settings, "llm_requests_per_minute", 600)
+    monkeypatch.setattr(settings, "llm_tokens_per_minute", 0)
+    monkeypatch.setattr(settings, "llm_max_concurrency", 16)
+    monkeypatch.setattr(settings, "llm_limit_processes", 4)
+
+
+def _usage(requests=0.0, blocked=False, flows=()):
+    return {"requests": requests, "tokens": 0.0, "blocked": blocked, "flows": [list(flow) for flow in flows]}
+
+
+def test_interactive_first_then_fair_batch(limits):
+    """Q&A gets what it uses, batch processes split the rest by tenant, idle ones get nothing."""
+    shares = allocate_shares({
+        "api": {INTERACTIVE: _usage(60.0, flows=[("carol", "repo")])},
+        "worker-1": {BATCH: _usage(blocked=True, flows=[("alice", "big")])},
+        "worker-2": {BATCH: _usage(blocked=True, flows=[("alice", "other"), ("bob", "small")])},
+        "worker-3": {},
+    })
+    assert shares["api"] == pytest.approx(0.15)
+    # Alice's two repositories share her half; Bob has the other half
+    assert shares["worker-1"] == pytest.approx(0.85 * 0.25)
+    assert shares["worker-2"] == pytest.approx(0.85 * 0.75)
+    assert shares["worker-3"] == 0.0
+
+
+def test_unneeded_limits_are_divided_equally(limits):
+    """Processes that are not held back leave the rest to everyone."""
+    shares = allocate_shares({
+        "api": {},
+        "worker-1": {BATCH: _usage(120.0, flows=[("alice", "big")])},
+    })
+    assert shares["worker-1"] == pytest.approx(0.3 + 0.35)
+    assert shares["api"] == pytest.approx(0.35)
+    assert sum(shares.values()) == pytest.approx(1.0)
+
+
+def test_exchange_applies_share(db_session, limits):
+    """A process takes the share the published demand leaves it."""
+    scheduler = get_scheduler("test-quota")
+    assert scheduler._requests.capacity == 150
+    db_session.add(LLMDemand(process_id="host-2-0", demand={
+        "test-quota": {BATCH: _usage(blocked=True, flows=[("alice", "big")])},
+    }))
+    db_session.commit()
+
+    exchange_demand(db_session, "host-1-api")
+    assert db_session.query(LLMDemand).count() == 2
+    # This process is idle, so the busy one gets almost everything
+    assert scheduler._requests.capacity == 1
+    assert scheduler._max_concurrency == 1
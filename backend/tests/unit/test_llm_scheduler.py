@@ -0,0 +1,203 @@
+"""Unit tests for the LLM request scheduler."""
+import asyncio
+import time
+from backend.config import settings
+from backend.services.llm_scheduler import (
+    BATCH, FAILED, INTERACTIVE, OK, THROTTLED, LLMScheduler, TokenBucket, get_scheduler, scheduling,
+)
+
+
+def test_token_bucket_wait_time():
+    """An empty bucket refills at its per-minute rate."""
+    bucket = TokenBucket(600)
+    now = time.monotonic()
+    bucket.take(600, now)
+    assert bucket.wait_time(10, now) == 1.0
+    assert bucket.wait_time(10, now + 1.0) == 0.0
+    # Requests larger than the bucket wait for a full bucket, not forever
+    assert bucket.wait_time(10_000, now + 1.0) == 59.0
+
+
+def test_unlimited_scheduler_admits_immediately():
+    """Without limits, requests are only counted."""
+    scheduler = LLMScheduler()
+
+    async def run():
+        for _ in range(3):
+            await scheduler.acquire(100)
+
+    asyncio.run(run())
+    stats = scheduler.stats()
+    assert stats[BATCH]["admitted"] == 3
+    assert stats[BATCH]["queue_depth"] == 0
+
+
+def test_priority_and_fair_queuing():
+    """Interactive requests go first; tenants share the rate fairly."""
+    scheduler = LLMScheduler(requests_per_minute=1200)
+    scheduler._requests.level = 0
+    order = []
+
+    async def request(name, flow, tenant, priority=None):
+        with scheduling(flow=flow, tenant=tenant):
+            await scheduler.acquire(100, priority)
+        order.append(name)
+
+    async def run():
+        tasks = [
+            asyncio.create_task(request(name, "big-repo", "alice"))
+            for name in ("a1", "a2", "a3")
+        ]
+        tasks.append(asyncio.create_task(request("b1", "small-repo", "bob")))
+        tasks.append(asyncio.create_task(request("qa", "big-repo", "carol", INTERACTIVE)))
+        await asyncio.sleep(0)
+        assert scheduler.stats()[BATCH]["queue_depth"] == 4
+        await asyncio.gather(*tasks)
+
+    asyncio.run(run())
+    assert order[0] == "qa"
+    # Bob's single request is not stuck behind all of Alice's
+    assert order.index("b1") <= 2
+    stats = scheduler.stats()
+    assert stats[BATCH]["admitted"] == 4
+    assert stats[BATCH]["max_wait_ms"] > 0
+
+
+def test_cancelled_request_leaves_queue():
+    """A cancelled waiter does not hold up later requests."""
+    scheduler = LLMScheduler(requests_per_minute=1200)
+    scheduler._requests.level = 0
+
+    async def run():
+        waiting = asyncio.create_task(scheduler.acquire(100))
+        await asyncio.sleep(0)
+        waiting.cancel()
+        await asyncio.gather(waiting, return_exceptions=True)
+        assert scheduler.stats()[BATCH]["queue_depth"] == 0
+        await asyncio.wait_for(scheduler.acquire(100), timeout=2)
+
+    asyncio.run(run())
+
+
+def test_cancelled_after_admission_frees_slot():
+    """A request cancelled between admission and wake-up gives its slot back."""
+    scheduler = LLMScheduler(max_concurrency=1)
+
+    async def run():
+        await scheduler.acquire(10)
+        waiting = asyncio.create_task(scheduler.acquire(10))
+        await asyncio.sleep(0)
+        # Admits the waiter; it is woken on the next loop iteration
+        scheduler.release(OK)
+        waiting.cancel()
+        await asyncio.gather(waiting, return_exceptions=True)
+        assert scheduler.stats()["control"]["in_flight"] == 0
+        await asyncio.wait_for(scheduler.acquire(10), timeout=1)
+
+    asyncio.run(run())
+    assert scheduler.stats()["control"]["cancelled"] == 1
+
+
+def test_concurrency_adapts_to_throttling():
+    """The in-flight limit halves on 429s and grows back on success."""
+    scheduler = LLMScheduler(max_concurrency=8)
+
+    async def run():
+        await scheduler.acquire(10)
+        scheduler.release(THROTTLED)
+        assert scheduler.stats()["control"]["concurrency_limit"] == 4
+        # A burst of 429s from the same window halves only once
+        await scheduler.acquire(10)
+        scheduler.release(THROTTLED)
+        assert scheduler.stats()["control"]["concurrency_limit"] == 4
+        for _ in range(6):
+            await scheduler.acquire(10)
+            scheduler.release(OK)
+        assert scheduler.stats()["control"]["concurrency_limit"] == 5
+
+    asyncio.run(run())
+    assert scheduler.stats()["control"]["in_flight"] == 0
+
+
+def test_in_flight_requests_are_capped():
+    """Requests beyond the limit wait for a release."""
+    scheduler = LLMScheduler(max_concurrency=1)
+
+    async def run():
+        await scheduler.acquire(10)
+        waiting = asyncio.create_task(scheduler.acquire(10))
+        await asyncio.sleep(0.01)
+        assert not waiting.done()
+        scheduler.release(OK)
+        await asyncio.wait_for(waiting, timeout=1)
+
+    asyncio.run(run())
+
+
+def test_circuit_breaker_pauses_queue():
+    """Consecutive failures pause admission instead of failing requests."""
+    scheduler = LLMScheduler(max_concurrency=4, breaker_threshold=2, breaker_cooldown=0.2)
+
+    async def run():
+        for _ in range(2):
+            await scheduler.acquire(10)
+            scheduler.release(FAILED)
+        control = scheduler.stats()["control"]
+        assert control["breaker_trips"] == 1
+        assert control["paused_ms"] > 0
+        started = time.monotonic()
+        await asyncio.wait_for(scheduler.acquire(10), timeout=2)
+        assert time.monotonic() - started >= 0.15
+        # Half-open: one probe at a time until requests succeed again
+        assert scheduler.stats()["control"]["concurrency_limit"] == 1
+
+    asyncio.run(run())
+
+
+def test_limits_are_divided_between_processes(monkeypatch):
+    """Each process gets its share of the configured provider limits."""
+    monkeypatch.setattr(settings, "llm_requests_per_minute", 600)
+    monkeypatch.setattr(settings, "llm_tokens_per_minute", 0)
+    monkeypatch.setattr(settings, "llm_max_concurrency", 16)
+    monkeypatch.setattr(settings, "embedded_workers", 3)
+    monkeypatch.setattr(settings, "llm_limit_processes", 0)
+
+    scheduler = get_scheduler("test-shared-limits")
+    assert scheduler._requests.capacity == 150
+    assert scheduler._tokens is None
+    assert scheduler._max_concurrency == 4
+
+
+def test_demand_reports_blocked_flows():
+    """Requests held back by the limits mark their priority as blocked."""
+    scheduler = LLMScheduler(requests_per_minute=60)
+    scheduler._requests.level = 1
+
+    async def run():
+        with scheduling(flow="repo", tenant="alice"):
+            await scheduler.acquire(100)
+            waiting = asyncio.create_task(scheduler.acquire(100))
+            await asyncio.sleep(0)
+        demand = scheduler.demand()
+        waiting.cancel()
+        await asyncio.gather(waiting, return_exceptions=True)
+        return demand
+
+    demand = asyncio.run(run())
+    assert set(demand) == {BATCH}
+    assert demand[BATCH]["flows"] == [["alice", "repo"]]
+    assert demand[BATCH]["blocked"]
+    assert demand[BATCH]["requests"] > 0
+    # The waiting flow counts into the next window too, until it stops waiting
+    assert not scheduler.demand()[BATCH]["blocked"]
+    assert scheduler.demand() == {}
+
+
+def test_set_limits_rescales_share():
+    """A new share changes the buckets and keeps the adaptive limit's position."""
+    scheduler = LLMScheduler(requests_per_minute=100, max_concurrency=8)
+    scheduler._concurrency = 4.0
+    scheduler.set_limits(300, 0, 16)
+    assert scheduler._requests.capacity == 300
+    assert scheduler._tokens is None
+    assert scheduler.stats()["control"]["concurrency_limit"] == 8
@@ -1,14 +1,23 @@
 """Unit tests for LLM service."""
+import asyncio
+import json
+import httpx
 import pytest
 from unittest.mock import Mock, patch
-from backend.services.llm_service import get_llm_service, OpenAIService, OllamaService, DeepSeekService
+from backend.services import llm_service
+from backend.services.llm_cache import ResponseCache
+from backend.services.llm_http import close_http_clients, get_http_client
+from backend.services.llm_scheduler import LLMScheduler
+from backend.services.llm_service import (
+    get_llm_service, parse_retry_after, OpenAIService, OllamaService, DeepSeekService,
+)
 from backend.config import settings
 
 
 @pytest.fixture
 def mock_openai_client():
     """Mock OpenAI client."""
-    with patch('backend.services.llm_service.openai.OpenAI') as mock:
+    with patch('backend.services.llm_service.openai.AsyncOpenAI') as mock:
         mock_instance = Mock()
         mock.return_value = mock_instance
         mock_instance.chat.completions.create.return_value = Mock(
@@ -37,7 +46,95 @@ def test_ollama_service():
 def test_deepseek_service():
     """Test DeepSeek service initialization."""
     with patch.dict('os.environ', {'DEEPSEEK_API_KEY': 'test_key', 'LLM_PROVIDER': 'deepseek'}):
-        with patch('backend.services.llm_service.openai.OpenAI') as mock:
+        with patch('backend.services.llm_service.openai.AsyncOpenAI') as mock:
             service = DeepSeekService()
             assert service.model == settings.deepseek_model
 
+
+
+def test_http_clients_are_shared_per_loop():
+    """Each provider keeps one pooled client per event loop."""
+    async def get_clients():
+        first = get_http_client("ollama")
+        assert get_http_client("ollama") is first
+        assert get_http_client("openai") is not first
+        await close_http_clients()
+        assert first.is_closed
+        return first
+
+    first = asyncio.run(get_clients())
+    second = asyncio.run(get_clients())
+    assert second is not first
+
+
+def test_ollama_service_uses_pooled_client(monkeypatch):
+    """Ollama requests go through the shared client without blocking."""
+    requests = []
+
+    def handler(request):
+        requests.append(request)
+        return httpx.Response(200, json={"response": " Test summary "})
+
+    client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    monkeypatch.setattr(llm_service, "get_http_client", lambda provider: client)
+    service = OllamaService()
+
+    async def run():
+        return await asyncio.gather(service._complete("a"), service._complete("b"))
+
+    assert asyncio.run(run()) == ["Test summary", "Test summary"]
+    assert len(requests) == 2
+    assert requests[0].url.path == "/api/generate"
+
+
+def test_throttled_requests_are_retried(monkeypatch):
+    """A 429 is retried after its Retry-After; client errors are not retried."""
+    statuses = [429, 200, 400]
+
+    def handler(request):
+        status = statuses.pop(0)
+        if status == 429:
+            return httpx.Response(429, headers={"Retry-After": "0"})
+        return httpx.Response(status, json={"response": "ok"})
+
+    client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    monkeypatch.setattr(llm_service, "get_http_client", lambda provider: client)
+    monkeypatch.setattr(llm_service, "get_scheduler", lambda provider: scheduler)
+    scheduler = LLMScheduler(max_concurrency=4)
+    service = OllamaService()
+
+    assert asyncio.run(service._complete_with_retries("prompt", "file")) == "ok"
+    with pytest.raises(httpx.HTTPStatusError):
+        asyncio.run(service._complete_with_retries("prompt", "file"))
+    control = scheduler.stats()["control"]
+    assert (control["throttled"], control["ok"], control["rejected"]) == (1, 1, 1)
+
+
+def test_parse_retry_after():
+    """Retry-After may be seconds or an HTTP date."""
+    assert parse_retry_after("2.5") == 2.5
+    assert parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT") == 0.0
+    assert parse_retry_after(None) is None
+
+
+def test_ollama_answer_is_streamed_and_cached(tmp_path, monkeypatch):
+    """Answers stream token by token; the complete answer is cached."""
+    lines = [{"response": "Hello"}, {"response": " world"}, {"response": "", "done": True}]
+
+    def handler(request):
+        assert json.loads(request.content)["stream"] is True
+        return httpx.Response(200, content="\n".join(json.dumps(line) for line in lines))
+
+    cache = ResponseCache(str(tmp_path), max_memory_entries=10, max_disk_bytes=0)
+    client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    monkeypatch.setattr(llm_service, "get_http_client", lambda provider: client)
+    monkeypatch.setattr(llm_service, "get_response_cache", lambda: cache)
+    monkeypatch.setattr(llm_service, "log_llm_call", lambda *args, **kwargs: None)
+    service = OllamaService()
+
+    async def collect():
+        return [part async for part in service.stream_answer("why?", "context")]
+
+    assert asyncio.run(collect()) == ["Hello", " world"]
+    # Served whole from the cache the second time
+    assert asyncio.run(collect()) == ["Hello world"]
@@ -0,0 +1,115 @@
+"""Unit tests for the bare mirror pool."""
+import os
+import pytest
+from backend.config import settings
+from backend.services.git_service import (
+    BlobReader, get_changed_paths, get_file_tree, get_head_commit, get_repo_cache_path, list_folder,
+)
+from backend.services.mirror_pool import (
+    acquire_checkout, get_mirror_path, publish_checkout, release_checkout,
+)
+
+
+@pytest.fixture
+def make_origin(make_repo):
+    """Create a repository with two folders and a root file."""
+    def make(path):
+        repo = make_repo(path, {"pkg/a.py": "a = 1", "docs/guide.txt": "guide", "README.md": "readme"})
+        # Let file:// clones use partial-clone filters and fetch blobs by SHA
+        repo.git.config("uploadpack.allowFilter", "true")
+        repo.git.config("uploadpack.allowAnySHA1InWant", "true")
+        return repo
+    return make
+
+
+def test_checkouts_share_one_mirror(tmp_path, monkeypatch, make_origin, commit_files):
+    """Checkouts are separate worktrees of one mirror; publishing replaces the browsable one."""
+    monkeypatch.setattr(settings, "cache_dir", str(tmp_path / "cache"))
+    origin = make_origin(tmp_path / "origin")
+    url = f"file://{tmp_path / 'origin'}"
+
+    first = acquire_checkout(url)
+    commit_files(origin, {"pkg/a.py": "a = 2"})
+    second = acquire_checkout(url, base_commit=first.commit)
+    assert first.path != second.path
+    assert get_head_commit(first.path) != get_head_commit(second.path)
+    assert get_mirror_path(url).is_dir()
+    assert second.stats.mode == "blobless"
+
+    publish_checkout(second)
+    release_checkout(second)
+    cache_path = get_repo_cache_path(url)
+    reader = BlobReader(str(cache_path))
+    try:
+        assert reader.read("pkg/a.py") == b"a = 2"
+    finally:
+        reader.close()
+    assert [entry["name"] for entry in list_folder(str(cache_path), "")] == ["README.md", "docs", "pkg"]
+    assert not os.path.exists(os.path.join(str(tmp_path / "cache" / ".worktrees"), os.path.basename(second.path)))
+
+    release_checkout(first)
+    assert not os.path.exists(first.path)
+    # A failed analysis leaves the published checkout alone
+    failed = acquire_checkout(url)
+    release_checkout(failed)
+    assert get_head_commit(str(cache_path)) == second.commit
+
+
+def test_blobless_checkout_fetches_only_read_blobs(tmp_path, monkeypatch, make_origin):
+    """A blobless worktree stays empty; blobs are fetched when prefetched or read."""
+    monkeypatch.setattr(settings, "cache_dir", str(tmp_path / "cache"))
+    make_origin(tmp_path / "origin")
+
+    checkout = acquire_checkout(f"file://{tmp_path / 'origin'}")
+    reader = BlobReader(checkout.path)
+    try:
+        assert not os.path.exists(os.path.join(checkout.path, "pkg"))
+        files = {item["path"]: item for item in get_file_tree(checkout.path) if item["type"] == "file"}
+        assert {item["size"] for item in files.values()} == {None}
+
+        assert reader.prefetch([files["pkg/a.py"]["sha"]]) == 1
+        assert reader.prefetch([files["pkg/a.py"]["sha"]]) == 0
+        sizes = {item["path"]: item["size"] for item in get_file_tree(checkout.path) if item["type"] == "file"}
+        assert sizes == {"pkg/a.py": 5, "docs/guide.txt": None, "README.md": None}
+        assert reader.read("docs/guide.txt") == b"guide"
+    finally:
+        reader.close()
+        release_checkout(checkout)
+
+
+def test_sparse_checkout_limits_file_tree(tmp_path, monkeypatch, make_origin):
+    """A sparse checkout contains and lists only the configured folders."""
+    monkeypatch.setattr(settings, "cache_dir", str(tmp_path / "cache"))
+    monkeypatch.setattr(settings, "clone_mode", "sparse")
+    monkeypatch.setattr(settings, "clone_sparse_paths", "pkg")
+    make_origin(tmp_path / "origin")
+
+    checkout = acquire_checkout(f"file://{tmp_path / 'origin'}")
+    try:
+        assert checkout.stats.mode == "sparse"
+        assert checkout.stats.object_bytes > 0
+        paths = {item["path"] for item in get_file_tree(checkout.path)}
+        assert paths == {"pkg", "pkg/a.py", "README.md"}
+        assert not os.path.exists(os.path.join(checkout.path, "docs"))
+    finally:
+        release_checkout(checkout)
+
+
+def test_shallow_mirror_fetches_base_commit(tmp_path, monkeypatch, make_origin, commit_files):
+    """A shallow mirror still lets the analyzer diff against the last analyzed commit."""
+    monkeypatch.setattr(settings, "cache_dir", str(tmp_path / "cache"))
+    monkeypatch.setattr(settings, "clone_mode", "shallow")
+    origin = make_origin(tmp_path / "origin")
+    url = f"file://{tmp_path / 'origin'}"
+    release_checkout(acquire_checkout(url))
+    first = origin.head.commit.hexsha
+
+    commit_files(origin, {"pkg/a.py": "a = 2"})
+    origin.git.config("uploadpack.allowAnySHA1InWant", "true")
+    checkout = acquire_checkout(url, base_commit=first)
+    try:
+        assert checkout.commit == origin.head.commit.hexsha
+        assert checkout.stats.bytes_received > 0
+        assert get_changed_paths(checkout.path, first, checkout.commit)["modified"] == ["pkg/a.py"]
+    finally:
+        release_checkout(checkout)
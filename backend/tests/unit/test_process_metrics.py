@@ -0,0 +1,27 @@
+"""Unit tests for counters aggregated across processes."""
+from backend.models.process_metrics import ProcessMetrics
+from backend.services.process_metrics import aggregate_counters, publish_counters
+
+
+def test_counters_are_summed_across_processes(db_session):
+    """Counters add up, maxima stay maxima, and rates are recomputed."""
+    db_session.add(ProcessMetrics(process_id="host-1-0", role="worker", counters={
+        "summary_store": {"hits": 3, "misses": 1, "writes": 1, "hit_rate": 0.75},
+        "llm_scheduler": {"openai": {"batch": {"admitted": 2, "avg_wait_ms": 10.0, "max_wait_ms": 15.0}}},
+    }))
+    db_session.add(ProcessMetrics(process_id="host-2-0", role="worker", counters={
+        "summary_store": {"hits": 1, "misses": 3, "writes": 2, "hit_rate": 0.25},
+        "llm_scheduler": {"openai": {"batch": {"admitted": 6, "avg_wait_ms": 30.0, "max_wait_ms": 50.0}}},
+    }))
+    db_session.commit()
+    publish_counters(db_session, "host-3-api", "api")
+
+    totals = aggregate_counters(db_session)
+    assert totals["processes"] == {"worker": 2, "api": 1}
+    assert totals["summary_store"]["writes"] >= 3
+    batch = totals["llm_scheduler"]["openai"]["batch"]
+    assert batch == {"admitted": 8, "avg_wait_ms": 25.0, "max_wait_ms": 50.0}
+
+    # Republishing replaces the process's snapshot
+    publish_counters(db_session, "host-3-api", "api")
+    assert db_session.query(ProcessMetrics).count() == 3
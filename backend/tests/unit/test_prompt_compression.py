@@ -0,0 +1,42 @@
+"""Unit tests for compressing file contents before prompting."""
+import base64
+from backend.services.prompt_compression import LICENSE_PLACEHOLDER, compress_source
+
+
+def test_strips_license_headers_per_language():
+    """Leading license comments go; shebangs and ordinary doc comments stay."""
+    python = "#!/usr/bin/env python\n# Copyright 2024 Example\n# Licensed under MIT\n\nimport os\n"
+    assert compress_source("tool.py", python) == f"#!/usr/bin/env python\n# {LICENSE_PLACEHOLDER}\n\nimport os"
+
+    # Docstrings document the module even when they mention a license
+    docstring = '"""\nParse license files and report the copyright holders they name.\n"""\nx = 1\n'
+    assert compress_source("licenses.py", docstring) == docstring.strip()
+
+    c_like = "/*\n * SPDX-License-Identifier: Apache-2.0\n */\npackage main\n"
+    assert compress_source("main.go", c_like) == f"// {LICENSE_PLACEHOLDER}\npackage main"
+
+    doc = "// Package main runs the server.\npackage main\n"
+    assert compress_source("main.go", doc) == doc.strip()
+
+
+def test_collapses_whitespace_and_banners():
+    """Blank runs shrink to one line and separator comments disappear; indentation is kept."""
+    content = "def f():   \n    return 1\n\n\n\n# ==========================\ndef g():\n    pass\n\n"
+    assert compress_source("a.py", content) == "def f():\n    return 1\n\ndef g():\n    pass"
+    # Rulers are content in prose
+    assert "==========" in compress_source("README.md", "Title\n==========\n")
+
+
+def test_elides_encoded_data_and_literal_tables():
+    """Embedded blobs and long literal tables become placeholders."""
+    blob = base64.b64encode(bytes(range(256)) * 2).decode()
+    compressed = compress_source("icon.js", f'const ICON = "{blob}";\n')
+    assert compressed == f'const ICON = "[{len(blob)} chars of encoded data elided]";'
+
+    table = "TABLE = [\n" + "".join(f"    {i}, {i * i}, 0x{i:02x},\n" for i in range(40)) + "]\n"
+    lines = compress_source("table.py", table, min_literal_lines=30).splitlines()
+    assert lines[:6] == ["TABLE = [", "    0, 0, 0x00,", "    1, 1, 0x01,", "    2, 4, 0x02,", "    3, 9, 0x03,", "    4, 16, 0x04,"]
+    # The closing bracket is part of the run
+    assert lines[6] == "    ... [36 more lines of data elided]"
+    # Data files are their data
+    assert compress_source("data.json", table) == table.strip()
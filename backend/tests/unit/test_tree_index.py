@@ -0,0 +1,50 @@
+"""Unit tests for the in-memory repository tree index."""
+from backend.services.tree_index import TreeIndex
+
+FILE_TREE = [
+    {"path": "README.md", "type": "file"},
+    {"path": "src", "type": "folder"},
+    {"path": "src/app.py", "type": "file"},
+    {"path": "src/utils", "type": "folder"},
+    {"path": "src/utils/io.py", "type": "file"},
+    {"path": ".github", "type": "folder"},
+    {"path": "Zeta.txt", "type": "file"},
+]
+
+
+def test_children_are_direct_only():
+    """Only direct children are returned, folders first then by name."""
+    index = TreeIndex.from_file_tree(FILE_TREE)
+    assert index.children("") == [".github", "src", "README.md", "Zeta.txt"]
+    assert index.children("src") == ["src/utils", "src/app.py"]
+    assert index.children("src/app.py") == []
+
+
+def test_structure_listing():
+    """Structure listing matches the directory listing format and skips hidden entries."""
+    index = TreeIndex.from_file_tree(FILE_TREE)
+    assert index.structure_listing("") == "├── src/\n├── README.md\n└── Zeta.txt"
+    assert index.structure_listing("src/utils") == "└── io.py"
+
+
+def test_child_summaries():
+    """Child summaries only include direct children that have been summarized."""
+    index = TreeIndex.from_file_tree(FILE_TREE)
+    index.set_summary("src/app.py", "App entry point")
+    index.set_summary("src/utils/io.py", "IO helpers")
+    index.set_summary("src/utils", "Utilities")
+
+    assert index.child_summaries("src") == [
+        ("src/utils", "folder", "Utilities"),
+        ("src/app.py", "file", "App entry point"),
+    ]
+    assert [path for path, _, _ in index.summarized_descendants("")] == [
+        "src/utils", "src/app.py", "src/utils/io.py"
+    ]
+
+
+def test_missing_parents_are_created():
+    """Adding a nested path creates its parent folders."""
+    index = TreeIndex.from_file_tree([{"path": "a/b/c.py", "type": "file"}])
+    assert index.node_type("a") == "folder"
+    assert index.children("a") == ["a/b"]
@@ -0,0 +1,211 @@
+"""Analysis worker processes that drain the analysis job queue.
+
+Run standalone with `python -m backend.worker [--workers N]`, or let the
+API start `EMBEDDED_WORKERS` of them on startup.
+"""
+import argparse
+import logging
+import multiprocessing
+import os
+import signal
+import socket
+import sys
+import threading
+from sqlalchemy.orm import Session
+from backend.config import settings
+from backend.db.base import SessionLocal
+from backend.models.analysis_job import AnalysisJob
+from backend.models.task import Task, TaskStatus
+from backend.services.analyzer import start_analysis
+from backend.services.llm_quota import start_demand_exchange
+from backend.services.llm_scheduler import scheduling
+from backend.services.process_metrics import publish_counters
+from backend.services.job_queue import (
+    claim_job, complete_job, extend_lease, fail_job, release_orphaned_jobs
+)
+
+logger = logging.getLogger(__name__)
+
+
+def publish_worker_counters(db: Session, worker_id: str):
+    """Publish this worker's counters for the metrics endpoint; failures are only logged."""
+    try:
+        publish_counters(db, worker_id, "worker")
+    except Exception as e:
+        logger.warning(f"Could not publish counters of worker {worker_id}: {str(e)}")
+        db.rollback()
+
+
+class LeaseHeartbeat(threading.Thread):
+    """
+    Keeps a running job's lease alive while the analysis is in progress,
+    and publishes the worker's counters as it goes.
+    """
+
+    def __init__(self, job_id: str, worker_id: str):
+        super().__init__(name=f"heartbeat-{job_id}", daemon=True)
+        self.job_id = job_id
+        self.worker_id = worker_id
+        self._stopped = threading.Event()
+
+    def run(self):
+        interval = max(1.0, settings.job_visibility_timeout / 3)
+        while not self._stopped.wait(interval):
+            # Sessions are not thread-safe, so the heartbeat uses its own
+            db = SessionLocal()
+            try:
+                if not extend_lease(db, self.job_id, self.worker_id):
+                    logger.warning(f"Lost lease on job {self.job_id}")
+                    return
+                publish_worker_counters(db, self.worker_id)
+            except Exception as e:
+                logger.error(f"Heartbeat for job {self.job_id} failed: {str(e)}")
+            finally:
+                db.close()
+
+    def stop(self):
+        self._stopped.set()
+
+
+def process_job(db: Session, job: AnalysisJob, worker_id: str):
+    """
+    Run one claimed job and record its outcome.
+
+    Args:
+        db: Database session owned by this worker
+        job: Claimed AnalysisJob
+        worker_id: Identifier of this worker
+    """
+    heartbeat = LeaseHeartbeat(job.id, worker_id)
+    heartbeat.start()
+    try:
+        # LLM requests are shared fairly between passphrases and repositories
+        with scheduling(flow=job.repo_key or job.repo_url, tenant=job.passphrase):
+            start_analysis(
+                job.task_id, job.repo_url, job.depth, db, job.passphrase,
+                max_files=job.max_files, max_tokens=job.max_tokens, subtree=job.subtree,
+                lazy=job.lazy, batch=job.batch,
+            )
+    finally:
+        heartbeat.stop()
+        publish_worker_counters(db, worker_id)
+
+    # start_analysis records failures on the task instead of raising
+    db.expire_all()
+    task = db.query(Task).filter(Task.id == job.task_id).first()
+    if task is None or task.status == TaskStatus.FAILED.value:
+        fail_job(db, job, task.error_message if task else "Task not found")
+    else:
+        complete_job(db, job)
+
+
+def worker_loop(worker_index: int, stop_event):
+    """
+    Claim and run jobs until `stop_event` is set.
+
+    Each worker process opens its own database sessions.
+    """
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s [%(name)s] %(levelname)s: %(message)s',
+        handlers=[logging.StreamHandler(sys.stdout)],
+    )
+    # The parent handles shutdown signals and sets stop_event
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+    worker_id = f"{socket.gethostname()}-{os.getpid()}-{worker_index}"
+    logger.info(f"Worker {worker_id} started")
+    demand_exchange = start_demand_exchange(worker_id)
+    while not stop_event.is_set():
+        db = SessionLocal()
+        try:
+            job = claim_job(db, worker_id)
+            if job is not None:
+                process_job(db, job, worker_id)
+                continue
+        except Exception as e:
+            logger.error(f"Worker {worker_id} error: {str(e)}", exc_info=True)
+            db.rollback()
+        finally:
+            db.close()
+        stop_event.wait(settings.worker_poll_interval)
+    if demand_exchange:
+        demand_exchange.stop()
+        demand_exchange.join(timeout=5)
+    logger.info(f"Worker {worker_id} stopped")
+
+
+class WorkerPool:
+    """A set of worker processes sharing one stop event."""
+
+    def __init__(self, count: int):
+        # Spawned (not forked) so each worker builds its own engine and connections
+        context = multiprocessing.get_context("spawn")
+        self.stop_event = context.Event()
+        self.processes = [
+            context.Process(
+                target=worker_loop,
+                args=(index, self.stop_event),
+                name=f"r2ce-worker-{index}",
+                daemon=True,
+            )
+            for index in range(count)
+        ]
+
+    def start(self):
+        # Jobs left running by workers that died with this host's last pool
+        # resume from their checkpoints as soon as they are claimed again
+        db = SessionLocal()
+        try:
+            release_orphaned_jobs(db, socket.gethostname())
+        except Exception as e:
+            logger.error(f"Could not release orphaned jobs: {str(e)}")
+            db.rollback()
+        finally:
+            db.close()
+        for process in self.processes:
+            process.start()
+        logger.info(f"Started {len(self.processes)} analysis workers")
+
+    def stop(self, timeout: float = 10.0):
+        """Ask workers to stop after their current job; terminate stragglers."""
+        self.stop_event.set()
+        for process in self.processes:
+            process.join(timeout)
+            if process.is_alive():
+                # The job's lease expires and another worker retries it
+                process.terminate()
+
+    def join(self):
+        for process in self.processes:
+            process.join()
+
+
+def main():
+    """Run a pool of analysis workers until interrupted."""
+    parser = argparse.ArgumentParser(description="R2CE analysis worker")
+    parser.add_argument(
+        "--workers", type=int, default=settings.worker_count,
+        help="Number of worker processes",
+    )
+    args = parser.parse_args()
+
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s [%(name)s] %(levelname)s: %(message)s',
+        handlers=[logging.StreamHandler(sys.stdout)],
+    )
+    pool = WorkerPool(max(1, args.workers))
+
+    def shutdown(signum, frame):
+        logger.info("Shutting down workers...")
+        pool.stop_event.set()
+
+    signal.signal(signal.SIGTERM, shutdown)
+    signal.signal(signal.SIGINT, shutdown)
+    pool.start()
+    pool.join()
+
+
+if __name__ == "__main__":
+    main()
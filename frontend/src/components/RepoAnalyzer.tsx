@@ -27,7 +27,7 @@ const RepoAnalyzer: React.FC<RepoAnalyzerProps> = ({ onAnalysisComplete }) => {
     setProgress(0)
 
     try {
-      const response = await apiClient.analyze(repoUrl, 3, passphrase)
+      const response = await apiClient.analyze(repoUrl, passphrase)
       const { task_id } = response.data
       setTaskId(task_id)
 
@@ -46,8 +46,13 @@ api.interceptors.response.use(
 )
 
 export const apiClient = {
-  analyze: (repoUrl: string, depth: number = 3, passphrase: string) =>
-    api.post('/analyze', { repo_url: repoUrl, depth, passphrase }),
+  // depth is only sent when given; the server then analyzes every level
+  analyze: (repoUrl: string, passphrase: string, depth?: number) =>
+    api.post('/analyze', {
+      repo_url: repoUrl,
+      passphrase,
+      ...(depth !== undefined ? { depth } : {}),
+    }),
 
   getStatus: (taskId: string) =>
     api.get(`/status/${taskId}`),
@@ -34,8 +34,8 @@ async def list_tools() -> list[Tool]:
                     },
                     "depth": {
                         "type": "integer",
-                        "description": "Analysis depth",
-                        "default": 3
+                        "minimum": 0,
+                        "description": "Folder levels whose files are summarized; omit to analyze everything"
                     }
                 },
                 "required": ["repo_url"]
@@ -101,13 +101,11 @@ async def call_tool(name: str, arguments: dict[str, Any]) -> Sequence[TextConten
     async with httpx.AsyncClient(timeout=60.0) as client:
         try:
             if name == "analyze_repository":
-                response = await client.post(
-                    f"{api_base_url}/analyze",
-                    json={
-                        "repo_url": arguments["repo_url"],
-                        "depth": arguments.get("depth", 3)
-                    }
-                )
+                payload = {"repo_url": arguments["repo_url"]}
+                # Without a depth the API analyzes every level
+                if arguments.get("depth") is not None:
+                    payload["depth"] = arguments["depth"]
+                response = await client.post(f"{api_base_url}/analyze", json=payload)
                 response.raise_for_status()
                 result = response.json()
                 return [TextContent(